@@ -8,6 +8,8 @@ from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import Infras
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ReScheduleParametersRange
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParametersRange
 from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 from rsp.step_05_experiment_run.experiment_run import AVAILABLE_CPUS
 from rsp.utils.file_utils import check_create_folder
 
@@ -61,7 +63,7 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(),
+        global_constants=get_defaults(verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
     )
     # effect of SEQ heuristic (SIM-167)
     experiment_output_directory_with_seq = experiment_output_base_directory.replace("baseline", "with_SEQ")
@@ -80,7 +82,9 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(reschedule_heuristics=[ASPHeuristics.HEURISTIC_SEQ]),
+        global_constants=get_defaults(
+            reschedule_heuristics=[ASPHeuristics.HEURISTIC_SEQ], verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim
+        ),
         online_unrestricted_only=True,
     )
     # effect of delay model resolution with 2, 5, 10 (SIM-542)
@@ -102,7 +106,7 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(delay_model_resolution=2),
+        global_constants=get_defaults(delay_model_resolution=2, verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
         online_unrestricted_only=True,
     )
     experiment_output_directory_with_delay_model_resolution_5 = experiment_output_base_directory.replace("baseline", "with_delay_model_resolution_5")
@@ -124,7 +128,7 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(delay_model_resolution=5),
+        global_constants=get_defaults(delay_model_resolution=5, verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
         online_unrestricted_only=True,
     )
     experiment_output_directory_with_delay_model_resolution_10 = experiment_output_base_directory.replace("baseline", "with_delay_model_resolution_10")
@@ -145,7 +149,7 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(delay_model_resolution=10),
+        global_constants=get_defaults(delay_model_resolution=10, verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
         online_unrestricted_only=True,
     )
     # effect of --propagate (SIM-543)
@@ -167,7 +171,7 @@ def rsp_pipeline_baseline_and_calibrations(
         speed_data=speed_data,
         experiment_filter=experiment_filter,
         csv_only=csv_only,
-        global_constants=get_defaults(dl_propagate_partial=False),
+        global_constants=get_defaults(dl_propagate_partial=False, verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
         online_unrestricted_only=True,
     )
     return experiment_output_base_directory
@@ -0,0 +1,69 @@
+"""Mutual exclusion of resource occupations by an interval sweep.
+
+Occupations are given as NumPy arrays: resource (row and column), left-closed
+interval `[from_incl, to_excl)` and agent. Instead of expanding every
+occupation into its time steps, the occupations are sorted per resource by
+`from_incl`; an occupation overlaps an earlier one of the same resource iff
+its `from_incl` is below the running maximum of `to_excl` of the earlier
+occupations.
+"""
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+
+def find_overlapping_occupations(
+    rows: np.ndarray, columns: np.ndarray, from_incl: np.ndarray, to_excl: np.ndarray, agent_ids: Optional[np.ndarray] = None
+) -> List[Tuple[int, int]]:
+    """Pairs of occupations of the same resource with overlapping intervals.
+
+    Parameters
+    ----------
+    rows
+    columns
+        resources of the occupations
+    from_incl
+    to_excl
+        left-closed intervals of the occupations
+    agent_ids
+        if given, only pairs of occupations by different agents are reported
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        index pairs `(i, j)`, `i` before `j` in the order of the sweep (by resource and `from_incl`)
+    """
+    nb_occupations = len(from_incl)
+    if nb_occupations == 0:
+        return []
+    from_incl = np.asarray(from_incl, dtype=np.int64)
+    to_excl = np.asarray(to_excl, dtype=np.int64)
+    order = np.lexsort((to_excl, from_incl, columns, rows))
+    sorted_rows, sorted_columns = np.asarray(rows)[order], np.asarray(columns)[order]
+    new_resource = np.ones(nb_occupations, dtype=bool)
+    new_resource[1:] = (sorted_rows[1:] != sorted_rows[:-1]) | (sorted_columns[1:] != sorted_columns[:-1])
+
+    # shift the times of every resource above those of the previous resources, so a global running maximum is a running maximum per resource
+    min_time = min(from_incl.min(), to_excl.min())
+    span = max(from_incl.max(), to_excl.max()) - min_time + 1
+    offsets = (np.cumsum(new_resource) - 1) * span - min_time
+    sorted_from = from_incl[order] + offsets
+    sorted_to = to_excl[order] + offsets
+    running_max_to = np.maximum.accumulate(sorted_to)
+    # running maximum of the earlier occupations of the same resource
+    previous_max_to = np.empty(nb_occupations, dtype=np.int64)
+    previous_max_to[0] = sorted_from[0]
+    previous_max_to[1:] = running_max_to[:-1]
+    previous_max_to[new_resource] = sorted_from[new_resource]
+
+    pairs = []
+    for k in np.flatnonzero(sorted_from < previous_max_to).tolist():
+        # walk back as long as an earlier occupation may still reach into this one
+        j = k - 1
+        while j >= 0 and not new_resource[j + 1] and running_max_to[j] > sorted_from[k]:
+            if sorted_to[j] > sorted_from[k] and (agent_ids is None or agent_ids[order[j]] != agent_ids[order[k]]):
+                pairs.append((int(order[j]), int(order[k])))
+            j -= 1
+    return pairs
@@ -6,8 +6,10 @@ from typing import List
 from typing import NamedTuple
 from typing import Tuple
 
+import numpy as np
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
+from rsp.resource_occupation.mutual_exclusion import find_overlapping_occupations
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 from rsp.step_05_experiment_run.experiment_results import ExperimentResults
@@ -142,10 +144,19 @@ def verify_schedule_as_resource_occupations(  # noqa: C901
         for ro in occupations:
             assert ro.resource == resource
 
-    # 2. resource occupations must be mutually exclusive
-    for occupations in schedule_as_resource_occupations.sorted_resource_occupations_per_resource.values():
-        for ro_1, ro_2 in zip(occupations, occupations[1:]):
-            assert ro_2.interval.from_incl >= ro_1.interval.to_excl, f"{ro_1} {ro_2}"
+    # 2. resource occupations must be mutually exclusive (and sorted)
+    occupations_per_resource = schedule_as_resource_occupations.sorted_resource_occupations_per_resource.values()
+    all_occupations = [ro for occupations in occupations_per_resource for ro in occupations]
+    rows = np.array([ro.resource.row for ro in all_occupations], dtype=np.int64)
+    columns = np.array([ro.resource.column for ro in all_occupations], dtype=np.int64)
+    from_incl = np.array([ro.interval.from_incl for ro in all_occupations], dtype=np.int64)
+    to_excl = np.array([ro.interval.to_excl for ro in all_occupations], dtype=np.int64)
+    is_sorted = np.all((np.diff(from_incl) >= 0) | (np.diff(rows) != 0) | (np.diff(columns) != 0))
+    if not is_sorted or find_overlapping_occupations(rows=rows, columns=columns, from_incl=from_incl, to_excl=to_excl):
+        # find the first offending pair for the message
+        for occupations in occupations_per_resource:
+            for ro_1, ro_2 in zip(occupations, occupations[1:]):
+                assert ro_2.interval.from_incl >= ro_1.interval.to_excl, f"{ro_1} {ro_2}"
 
     # 3. resource occupations per agent must be for the relevant agent
     for agent_id, occupations in schedule_as_resource_occupations.sorted_resource_occupations_per_agent.items():
@@ -12,6 +12,8 @@ from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import Infras
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ReScheduleParameters
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParameters
 from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 from rsp.step_05_experiment_run.experiment_run import list_infrastructure_and_schedule_params_from_base_directory
 from rsp.step_05_experiment_run.experiment_run import run_experiment_agenda
 
@@ -100,7 +102,11 @@ def create_malfunction_agenda_from_infrastructure_and_schedule_ranges(
                         experiment_id += 1
                     grid_id += 1
             infra_id_schedule_id += 1
-    return ExperimentAgenda(experiment_name=experiment_name, experiments=experiments, global_constants=get_defaults(),)
+    return ExperimentAgenda(
+        experiment_name=experiment_name,
+        experiments=experiments,
+        global_constants=get_defaults(verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim),
+    )
 
 
 def get_filter(infra_id: int, schedule_id: int) -> Callable[[int, int], bool]:
@@ -11,8 +11,8 @@ from rsp.step_05_experiment_run.experiment_results_analysis import convert_list_
 from rsp.step_05_experiment_run.experiment_results_analysis import filter_experiment_results_analysis_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis import rescheduling_scopes_visualization
 from rsp.step_05_experiment_run.experiment_results_analysis import speed_up_scopes_visualization
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_experiment_results_analysis_data_frame
 from rsp.step_05_experiment_run.experiment_run import load_and_expand_experiment_results_from_data_folder
-from rsp.step_05_experiment_run.experiment_run import load_data_from_individual_csv_in_data_folder
 from rsp.step_05_experiment_run.experiment_run import load_experiment_agenda_from_file
 from rsp.step_06_analysis.compute_time_analysis.compute_time_analysis import hypothesis_one_analysis_visualize_agenda
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_costs
@@ -24,7 +24,14 @@ from rsp.step_06_analysis.plot_utils import plot_binned_box_plot
 from rsp.utils.pickle_helper import _pickle_load
 
 
-def main(experiment_base_directory: str = BASELINE_DATA_FOLDER, from_individual_csv: bool = True, experiments_of_interest=None):
+def main(
+    experiment_base_directory: str = BASELINE_DATA_FOLDER,
+    from_individual_csv: bool = True,
+    experiments_of_interest=None,
+    columns=None,
+    nb_processes: int = 1,
+    write_cache: bool = False,
+):
     agenda = _pickle_load(file_name="experiment_agenda.pkl", folder=BASELINE_DATA_FOLDER)
     with (Path(BASELINE_DATA_FOLDER) / "experiment_agenda.txt").open("w") as fp:
         _pp = pprint.PrettyPrinter(indent=4)
@@ -36,13 +43,19 @@ def main(experiment_base_directory: str = BASELINE_DATA_FOLDER, from_individual_
     # chapter 4: computational results
     # ==============================================================================================================
     if from_individual_csv:
-        experiment_data: DataFrame = load_data_from_individual_csv_in_data_folder(
-            experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", experiment_ids=experiments_of_interest
+        experiment_data: DataFrame = load_experiment_results_analysis_data_frame(
+            experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
+            experiment_ids=experiments_of_interest,
+            columns=columns,
         )
 
     else:
         _, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(
-            experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", experiment_ids=experiments_of_interest,
+            experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
+            experiment_ids=experiments_of_interest,
+            with_experiment_results=False,
+            nb_processes=nb_processes,
+            write_cache=write_cache,
         )
         experiment_data: DataFrame = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_analysis_list)
 
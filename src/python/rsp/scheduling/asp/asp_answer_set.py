@@ -0,0 +1,116 @@
+"""Typed decoding of clingo-dl answer sets.
+
+Instead of serializing models to strings and parsing them back with regular
+expressions, we walk the `clingo.Symbol` atoms of a model and the
+difference logic assignment once and collect everything the solution
+description needs.
+"""
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import clingo
+from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
+from flatland.envs.rail_trainrun_data_structures import Waypoint
+
+ASPAnswerSet = NamedTuple(
+    "ASPAnswerSet",
+    [
+        # shown atoms of the model
+        ("symbols", Tuple[clingo.Symbol, ...]),
+        # difference logic assignment (variable, value) of the model
+        ("dl_assignment", Tuple[Tuple[clingo.Symbol, int], ...]),
+        # all dl variables of the form (t<agent_id>,((r,c),d)), per agent sorted by time
+        ("trainruns", Dict[int, List[TrainrunWaypoint]]),
+        # late(T,V,D,W) or late(S,T,V,D,W) (scoped): weight W
+        ("late", List[int]),
+        # active_penalty(P,T,E) or active_penalty(P,T,E,S) (scoped): penalty P
+        ("active_penalty", List[int]),
+        # act_penalty_for_train(T,R,P): penalty P
+        ("act_penalty_for_train", List[int]),
+        ("nb_shared", int),
+    ],
+)
+
+
+def decode_answer_set(symbols: Iterable[clingo.Symbol], dl_assignment: Iterable[Tuple[clingo.Symbol, int]]) -> ASPAnswerSet:
+    """Decode the shown atoms and the difference logic assignment of a model
+    in a single pass.
+
+    Parameters
+    ----------
+    symbols
+        shown atoms of the model, see `clingo.Model.symbols(shown=True)`
+    dl_assignment
+        (variable, value) pairs, see `theory.Theory.assignment`
+
+    Returns
+    -------
+    ASPAnswerSet
+    """
+    symbols = tuple(symbols)
+    dl_assignment = tuple(dl_assignment)
+    late = []
+    active_penalty = []
+    act_penalty_for_train = []
+    nb_shared = 0
+    for symbol in symbols:
+        if symbol.type != clingo.SymbolType.Function:
+            continue
+        name = symbol.name
+        if name == "shared":
+            nb_shared += 1
+        elif name == "late":
+            late.append(symbol.arguments[-1].number)
+        elif name == "active_penalty":
+            active_penalty.append(symbol.arguments[0].number)
+        elif name == "act_penalty_for_train":
+            act_penalty_for_train.append(symbol.arguments[2].number)
+
+    trainruns: Dict[int, List[TrainrunWaypoint]] = {}
+    for variable, value in dl_assignment:
+        decoded = _decode_dl_variable(variable)
+        if decoded is None:
+            continue
+        agent_id, waypoint = decoded
+        trainruns.setdefault(agent_id, []).append(TrainrunWaypoint(scheduled_at=value, waypoint=waypoint))
+    for trainrun in trainruns.values():
+        trainrun.sort(key=lambda p: p.scheduled_at)
+
+    return ASPAnswerSet(
+        symbols=symbols,
+        dl_assignment=dl_assignment,
+        trainruns=trainruns,
+        late=late,
+        active_penalty=active_penalty,
+        act_penalty_for_train=act_penalty_for_train,
+        nb_shared=nb_shared,
+    )
+
+
+def answer_set_as_strings(answer_set: ASPAnswerSet) -> FrozenSet[str]:
+    """String representation of the answer set as used for persistence
+    (atoms and `dl(variable,value)` facts)."""
+    return frozenset([str(symbol) for symbol in answer_set.symbols] + [f"dl({variable},{value})" for variable, value in answer_set.dl_assignment])
+
+
+def _decode_dl_variable(variable: clingo.Symbol) -> Optional[Tuple[int, Waypoint]]:
+    """Decode dl variable `(t0,((3,5),3))` into agent id and waypoint, `None`
+    if the variable is not of this form."""
+    # (t0,((3,5),3)) # NOQA
+    if variable.type != clingo.SymbolType.Function or variable.name != "" or len(variable.arguments) != 2:
+        return None
+    train, vertex = variable.arguments
+    if train.type != clingo.SymbolType.Function or not train.name.startswith("t") or len(train.arguments) != 0:
+        return None
+    if vertex.type != clingo.SymbolType.Function or vertex.name != "" or len(vertex.arguments) != 2:
+        return None
+    position, direction = vertex.arguments
+    if position.type != clingo.SymbolType.Function or len(position.arguments) != 2 or direction.type != clingo.SymbolType.Number:
+        return None
+    r, c = position.arguments
+    return int(train.name[1:]), Waypoint(position=(r.number, c.number), direction=direction.number)
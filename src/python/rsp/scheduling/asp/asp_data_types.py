@@ -17,6 +17,9 @@ class ASPObjective(Enum):
     # minimize linear combination of route section penalties and delay
     MINIMIZE_DELAY_ROUTES_COMBINED = "minimize_delay_and_routes_combined"
 
+    # same as MINIMIZE_DELAY_ROUTES_COMBINED, but grounded per scope for incremental solving (includes the delay model)
+    MINIMIZE_DELAY_ROUTES_COMBINED_SCOPED = "minimize_delay_and_routes_combined_scoped"
+
 
 class ASPHeuristics(Enum):
     """enum value (key arbitrary) must be the same as encoding to be
@@ -33,3 +36,7 @@ class ASPHeuristics(Enum):
     # attempts to order conflicting trains by their possible arrival times at the edges where the conflict is located.
     # NOT USED YET (we do not give the data in re-scheduling yet)
     HEURISTIC_SEQ = "heuristic_SEQ"
+
+    # prefers the routes, visits and sequencing of the original schedule (warm start for re-scheduling).
+    # The data is only given if the schedule is passed to `ASPProblemDescription.factory_rescheduling`.
+    HEURISTIC_SCHEDULE = "heuristic_SCHEDULE"
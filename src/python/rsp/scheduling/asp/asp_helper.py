@@ -1,39 +1,64 @@
 import json
 import time
+from functools import lru_cache
 from threading import Timer
 from typing import Dict
 from typing import List
 from typing import NamedTuple
 from typing import Optional
 from typing import Set
+from typing import Tuple
 
 import clingo
 import numpy as np
 from importlib_resources import path
 
 from rsp.scheduling.asp import theory
+from rsp.scheduling.asp.asp_answer_set import answer_set_as_strings
+from rsp.scheduling.asp.asp_answer_set import ASPAnswerSet
+from rsp.scheduling.asp.asp_answer_set import decode_answer_set
 from rsp.scheduling.asp.asp_data_types import ASPHeuristics
 from rsp.scheduling.asp.asp_data_types import ASPObjective
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 from rsp.utils.rsp_logger import rsp_logger
 from rsp.utils.rsp_logger import VERBOSE
 
+IncumbentTraceEntry = NamedTuple(
+    "IncumbentTraceEntry",
+    [
+        # seconds since solve start
+        ("elapsed", float),
+        ("costs", Optional[int]),
+        # sum of the weights of late/4 (late/5 if scoped)
+        ("costs_from_lateness", int),
+        # sum of the penalties of active_penalty/3 (active_penalty/4 if scoped)
+        ("costs_from_route_section_penalties", int),
+    ],
+)
+
 FluxHelperResult = NamedTuple(
     "FluxHelperResult",
     [
-        # TODO SIM-121 asp_solver should use proper data structures instead of strings to represent answer sets
+        # string representation of the answer sets (for persistence and debugging)
         ("answer_sets", List[Set[str]]),
         ("stats", Dict),
         # future use for incremental solving?
         ("ctl", clingo.Control),
         ("dl", theory.Theory),
         ("asp_seed_value", Optional[int]),
+        # typed answer sets, in the same order as `answer_sets`
+        ("decoded_answer_sets", List[ASPAnswerSet]),
+        # one entry for every new incumbent, in the order found
+        ("incumbent_trace", List[IncumbentTraceEntry]),
+        # seconds spent parsing and grounding, see `_asp_ground`
+        ("grounding_time", float),
     ],
 )
 
 
 def flux_helper(
     asp_data: List[str],
+    asp_facts: Optional[List[clingo.Symbol]] = None,
     asp_objective: ASPObjective = ASPObjective.MINIMIZE_SUM_RUNNING_TIMES,
     asp_heuristics: Optional[List[ASPHeuristics]] = None,
     asp_seed_value: int = 94,
@@ -42,6 +67,8 @@ def flux_helper(
     verbose: bool = False,
     debug: bool = False,
     timeout: int = 10 * 60 * 60,
+    keep_only_incumbent: bool = True,
+    deadline: Optional[float] = None,
 ) -> FluxHelperResult:
     """Includes the necessary encodings and calls `_asp_helper` with them.
 
@@ -51,6 +78,8 @@ def flux_helper(
 
     asp_data
         data part
+    asp_facts
+        data part given as symbols, added without parsing
     asp_objective
         which asp objective should be applied if any
 
@@ -62,6 +91,12 @@ def flux_helper(
         do not optimize
     debug
     verbose
+    timeout
+        interrupt the solver if no model has been found for this time
+    keep_only_incumbent
+        keep only the first model with the best cost instead of all models with the best cost
+    deadline
+        anytime mode: interrupt the solver after this time since solve start and return the best model found so far
 
     Returns
     -------
@@ -70,23 +105,12 @@ def flux_helper(
     if debug:
         print(prg_text_joined)
 
-    with path("rsp_encodings", "encoding.lp") as encoding_path:
-        paths = [encoding_path]
-    rsp_logger.info(f"asp_heuristics={asp_heuristics}")
-    if asp_heuristics:
-        for asp_heurisic in asp_heuristics:
-            with path("rsp_encodings", f"{asp_heurisic.value}.lp") as heuristic_routes_path:
-                paths.append(heuristic_routes_path)
-    if asp_objective and not no_optimize:
-        with path("rsp_encodings", f"{asp_objective.value}.lp") as objetive_path:
-            paths.append(objetive_path)
-        if asp_objective in [ASPObjective.MINIMIZE_DELAY, ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED]:
-            with path("rsp_encodings", f"delay_linear_within_one_minute.lp") as delay_model_path:
-                paths.append(delay_model_path)
+    paths = _get_encoding_paths(asp_objective=asp_objective, asp_heuristics=asp_heuristics, no_optimize=no_optimize)
 
     flux_result = _asp_helper(
         encoding_files=paths,
         plain_encoding=prg_text_joined,
+        facts=asp_facts,
         asp_seed_value=asp_seed_value,
         nb_threads=nb_threads,
         verbose=verbose,
@@ -94,15 +118,144 @@ def flux_helper(
         no_optimize=no_optimize,
         asp_heuristics=asp_heuristics,
         timeout=timeout,
+        keep_only_incumbent=keep_only_incumbent,
+        deadline=deadline,
     )
 
     return flux_result
 
 
+def flux_helper_ground_incremental(
+    asp_data: List[str],
+    asp_facts: Optional[List[clingo.Symbol]] = None,
+    asp_objective: ASPObjective = ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED_SCOPED,
+    asp_heuristics: Optional[List[ASPHeuristics]] = None,
+    asp_seed_value: int = 94,
+    nb_threads: int = 2,
+    verbose: bool = False,
+    debug: bool = False,
+) -> Tuple[clingo.Control, theory.Theory, float]:
+    """Ground the base program once for incremental solving of several scopes
+    with `flux_helper_solve_scope`.
+
+    Parameters
+    ----------
+    asp_data
+        data part of the base problem (the least restricted scope)
+    asp_facts
+        data part of the base problem given as symbols
+    asp_objective
+        scoped objective, its encoding must contain a part `scope(s)`  guarded by the external `active(s)`
+    asp_heuristics
+    asp_seed_value
+    nb_threads
+    verbose
+    debug
+
+    Returns
+    -------
+    Tuple[clingo.Control, theory.Theory, float]
+        the grounded control, the registered difference logic propagator and the grounding time
+    """
+    prg_text_joined = "\n".join(asp_data)
+    if debug:
+        print(prg_text_joined)
+    paths = _get_encoding_paths(asp_objective=asp_objective, asp_heuristics=asp_heuristics, no_optimize=False)
+    ctl, dl = _asp_control(nb_threads=nb_threads, asp_heuristics=asp_heuristics, asp_seed_value=asp_seed_value)
+    grounding_time = _asp_ground(
+        ctl=ctl, encoding_files=paths, plain_encoding=prg_text_joined, facts=asp_facts, parts=[("base", [])], verbose=verbose, debug=debug
+    )
+    return ctl, dl, grounding_time
+
+
+def flux_helper_solve_scope(
+    ctl: clingo.Control,
+    dl: theory.Theory,
+    scope: str,
+    scope_asp_data: List[str],
+    asp_seed_value: Optional[int] = None,
+    verbose: bool = False,
+    debug: bool = False,
+    timeout: int = 10 * 60 * 60,
+    keep_only_incumbent: bool = True,
+    deadline: Optional[float] = None,
+) -> FluxHelperResult:
+    """Solve a scope on a control grounded by `flux_helper_ground_incremental`.
+
+    Only the scope part is grounded; the scope is active during this solve call only.
+    The statistics returned are the statistics of this solve step.
+
+    Parameters
+    ----------
+    ctl
+    dl
+    scope
+        name of the scope, must be a valid ASP constant
+    scope_asp_data
+        facts describing the restriction of the scope
+    asp_seed_value
+    verbose
+    debug
+    timeout
+    keep_only_incumbent
+    deadline
+
+    Returns
+    -------
+    FluxHelperResult
+    """
+    scope_symbol = clingo.Function(scope)
+    grounding_time = _asp_ground(
+        ctl=ctl,
+        plain_encoding="\n".join(scope_asp_data),
+        plain_encoding_part=f"scope_{scope}",
+        parts=[(f"scope_{scope}", []), ("scope", [scope_symbol])],
+        verbose=verbose,
+        debug=debug,
+    )
+    active = clingo.Function("active", [scope_symbol])
+    ctl.assign_external(active, True)
+    try:
+        decoded_answers, incumbent_trace = _asp_loop(
+            ctl=ctl, dl=dl, verbose=verbose, debug=debug, timeout=timeout, keep_only_incumbent=keep_only_incumbent, deadline=deadline
+        )
+        # take the statistics before releasing, releasing resets them
+        return _flux_helper_result(
+            ctl=ctl,
+            dl=dl,
+            asp_seed_value=asp_seed_value,
+            decoded_answers=decoded_answers,
+            incumbent_trace=incumbent_trace,
+            grounding_time=grounding_time,
+            verbose=verbose,
+        )
+    finally:
+        # the scope is never used again
+        ctl.release_external(active)
+
+
+def _get_encoding_paths(asp_objective: ASPObjective, asp_heuristics: Optional[List[ASPHeuristics]], no_optimize: bool) -> List[str]:
+    with path("rsp_encodings", "encoding.lp") as encoding_path:
+        paths = [encoding_path]
+    rsp_logger.info(f"asp_heuristics={asp_heuristics}")
+    if asp_heuristics:
+        for asp_heurisic in asp_heuristics:
+            with path("rsp_encodings", f"{asp_heurisic.value}.lp") as heuristic_routes_path:
+                paths.append(heuristic_routes_path)
+    if asp_objective and not no_optimize:
+        with path("rsp_encodings", f"{asp_objective.value}.lp") as objetive_path:
+            paths.append(objetive_path)
+        if asp_objective in [ASPObjective.MINIMIZE_DELAY, ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED]:
+            with path("rsp_encodings", f"delay_linear_within_one_minute.lp") as delay_model_path:
+                paths.append(delay_model_path)
+    return paths
+
+
 # snippets from https://code.sbb.ch/projects/TP_TMS_PAS/repos/kapaplan-asp/browse/src/solver/clingo_controller.py
 def _asp_helper(  # noqa: C901
     encoding_files: List[str],
     plain_encoding: Optional[str] = None,
+    facts: Optional[List[clingo.Symbol]] = None,
     verbose: bool = False,
     debug: bool = False,
     nb_threads: int = 2,
@@ -110,6 +263,8 @@ def _asp_helper(  # noqa: C901
     asp_heuristics: List[ASPHeuristics] = None,
     asp_seed_value: Optional[int] = None,
     timeout: int = 10 * 60 * 60,
+    keep_only_incumbent: bool = True,
+    deadline: Optional[float] = None,
 ) -> FluxHelperResult:
     """Runs clingo-dl with in the desired mode.
     Parameters
@@ -118,15 +273,40 @@ def _asp_helper(  # noqa: C901
         encodings as file list to load
     plain_encoding
         plain encoding as string
+    facts
+        facts as symbols
     verbose
         prints a lot to debug
+    keep_only_incumbent
+        keep only the first model with the best cost instead of all models with the best cost
+    deadline
+        anytime mode, see `_asp_loop`
     """
+    rsp_logger.info(f"no_optimize={no_optimize}")
+    ctl, dl = _asp_control(nb_threads=nb_threads, asp_heuristics=asp_heuristics, asp_seed_value=asp_seed_value)
+    grounding_time = _asp_ground(
+        ctl=ctl, encoding_files=encoding_files, plain_encoding=plain_encoding, facts=facts, parts=[("base", [])], verbose=verbose, debug=debug
+    )
+
+    decoded_answers, incumbent_trace = _asp_loop(
+        ctl=ctl, dl=dl, no_optimize=no_optimize, verbose=verbose, debug=debug, timeout=timeout, keep_only_incumbent=keep_only_incumbent, deadline=deadline,
+    )
+    return _flux_helper_result(
+        ctl=ctl,
+        dl=dl,
+        asp_seed_value=asp_seed_value,
+        decoded_answers=decoded_answers,
+        incumbent_trace=incumbent_trace,
+        grounding_time=grounding_time,
+        verbose=verbose,
+    )
+
+
+def _asp_control(nb_threads: int = 2, asp_heuristics: List[ASPHeuristics] = None, asp_seed_value: Optional[int] = None) -> Tuple[clingo.Control, theory.Theory]:
     # Info Max Ostrovski 2019-11-20: die import dl Variante
     # (https://www.cs.uni-potsdam.de/~torsten/hybris.pdf  Listing 1.8 line 9)
     # bezieht sich auf eine sehr alte clingo[DL] version. Im Rahmen einer einheitlichen API für alle clingo Erweiterungen
     # (clingo[DL], clingcon, clingo[LP]) ist die neue Variante mit der python theory zu verwenden.
-    rsp_logger.info(f"no_optimize={no_optimize}")
-
     dl = theory.Theory("clingodl", "clingo-dl")
     if GLOBAL_CONSTANTS.DL_PROPAGATE_PARTIAL:
         rsp_logger.info("running with --propagate=partial")
@@ -148,42 +328,94 @@ def _asp_helper(  # noqa: C901
     # find only first optimal model
     ctl.configuration.solve.opt_mode = "opt"  # noqa
     dl.register_propagator(ctl)
+    return ctl, dl
+
+
+@lru_cache(maxsize=None)
+def _read_encoding(encoding_path: str) -> str:
+    """The static encodings are read once per process."""
+    with open(encoding_path) as file:
+        return file.read()
+
+
+def _asp_ground(
+    ctl: clingo.Control,
+    parts: List[Tuple[str, List[clingo.Symbol]]],
+    encoding_files: Optional[List[str]] = None,
+    plain_encoding: Optional[str] = None,
+    plain_encoding_part: str = "base",
+    facts: Optional[List[clingo.Symbol]] = None,
+    verbose: bool = False,
+    debug: bool = False,
+) -> float:
+    """Load the encodings, add the facts through the backend and ground the
+    parts; returns the time for parsing and grounding in seconds.
 
+    Facts added through the backend are facts of the base part, they must be added before grounding it.
+    """
     if verbose:
         rsp_logger.log("taking encodings from {}".format(encoding_files), level=VERBOSE)
         if plain_encoding and debug:
             print("taking plain_encoding={}".format(plain_encoding))
-    for enc in encoding_files:
-        ctl.load(str(enc))
+    # parsing is included in the grounding time
+    grounding_start_time = time.time()
+    for enc in encoding_files or []:
+        ctl.add("base", [], _read_encoding(str(enc)))
     if plain_encoding:
-        ctl.add("base", [], plain_encoding)
+        ctl.add(plain_encoding_part, [], plain_encoding)
+    if facts:
+        with ctl.backend() as backend:
+            for fact in facts:
+                backend.add_rule([backend.add_atom(fact)])
     if verbose:
         print("Grounding starting...")
-    grounding_start_time = time.time()
-    ctl.ground([("base", [])])
+    ctl.ground(parts)
+    grounding_time = time.time() - grounding_start_time
     if verbose:
-        print("Grounding took {}s".format(time.time() - grounding_start_time))
+        print("Grounding took {}s".format(grounding_time))
+    return grounding_time
+
 
-    all_answers = _asp_loop(ctl=ctl, dl=dl, no_optimize=no_optimize, verbose=verbose, debug=debug, timeout=timeout)
+def _flux_helper_result(
+    ctl: clingo.Control,
+    dl: theory.Theory,
+    asp_seed_value: Optional[int],
+    decoded_answers: List[ASPAnswerSet],
+    incumbent_trace: List[IncumbentTraceEntry],
+    grounding_time: float,
+    verbose: bool = False,
+) -> FluxHelperResult:
+    all_answers = [answer_set_as_strings(answer_set) for answer_set in decoded_answers]
     statistics: Dict = ctl.statistics
 
     if verbose:
         print(all_answers)
+        print(f"incumbent_trace={incumbent_trace}")
         _print_configuration(ctl)
         _print_stats(statistics)
 
     # SIM-429 assert that our models are tight (sccs==0)
     assert statistics["problem"]["lp"]["sccs"] == 0, f'not tight statistics["problem"]["lp"]["sccs"]={statistics["problem"]["lp"]["sccs"]}'
 
-    return FluxHelperResult(all_answers, statistics, ctl, dl, asp_seed_value)
+    return FluxHelperResult(all_answers, statistics, ctl, dl, asp_seed_value, decoded_answers, incumbent_trace, grounding_time)
 
 
 def _asp_loop(  # noqa: C901
-    ctl: clingo.Control, dl: theory.Theory, no_optimize: bool = False, verbose: bool = False, debug: bool = False, timeout: int = 10 * 60 * 60
-):
+    ctl: clingo.Control,
+    dl: theory.Theory,
+    no_optimize: bool = False,
+    verbose: bool = False,
+    debug: bool = False,
+    timeout: int = 10 * 60 * 60,
+    keep_only_incumbent: bool = True,
+    deadline: Optional[float] = None,
+) -> Tuple[List[ASPAnswerSet], List[IncumbentTraceEntry]]:
     """Loop over models coming from the ASP solve call until optimal one found
     and return the first optimal.
 
+    In anytime mode (`deadline` given), the solver is interrupted at the deadline at the latest and the best model
+    found so far is returned, which is not necessarily optimal.
+
     Parameters
     ----------
     ctl
@@ -192,36 +424,52 @@ def _asp_loop(  # noqa: C901
     verbose
     debug
     timeout
-        interrupt the solver after this time. Solving only, does not cover grounding.
+        interrupt the solver if no model has been found for this time; the timer restarts with every model.
+        Solving only, does not cover grounding.
+    keep_only_incumbent
+        keep only the first model with the best cost (bounded memory) instead of all models with the best cost.
+    deadline
+        interrupt the solver after this time since solve start, regardless of models found.
+        Solving only, does not cover grounding.
 
     Returns
     -------
+    Tuple[List[ASPAnswerSet], List[IncumbentTraceEntry]]
+        the decoded models with the best cost found and the trace of incumbents
     """
     all_answers = []
+    incumbent_trace = []
     min_cost = np.inf
     timer = None
+    deadline_timer = None
+    solve_start_time = time.time()
 
     def on_model(model):
         try:
             nonlocal all_answers, min_cost, timer, no_optimize, dl
-            if len(model.cost) > 0:
-                cost = model.cost[0]
-                if cost < min_cost:
-                    if verbose:
-                        print("Optimization: {}".format(cost))
-                    min_cost = cost
-                    all_answers = []
-            # TODO SIM-121 convert to handable data structures instead of strings!
-            sol = str(model).split(" ")
-            if debug:
-                for v in sol:
-                    print(v)
-            for name, value in dl.assignment(model.thread_id):
-                v = f"dl({name},{value})"
-                sol.append(v)
+            cost = model.cost[0] if len(model.cost) > 0 else None
+            improved = cost is not None and cost < min_cost
+            if improved:
+                if verbose:
+                    print("Optimization: {}".format(cost))
+                min_cost = cost
+                all_answers = []
+            if len(all_answers) == 0 or not keep_only_incumbent:
+                elapsed = time.time() - solve_start_time
+                answer_set = decode_answer_set(symbols=model.symbols(shown=True), dl_assignment=dl.assignment(model.thread_id))
                 if debug:
-                    print(v)
-            all_answers.append(frozenset(sol))
+                    for v in answer_set_as_strings(answer_set):
+                        print(v)
+                if len(all_answers) == 0:
+                    incumbent_trace.append(
+                        IncumbentTraceEntry(
+                            elapsed=elapsed,
+                            costs=cost,
+                            costs_from_lateness=sum(answer_set.late),
+                            costs_from_route_section_penalties=sum(answer_set.active_penalty),
+                        )
+                    )
+                all_answers.append(answer_set)
             timer.cancel()
             timer = Timer(interval=timer.interval, function=timer.function)
             timer.start()
@@ -242,12 +490,21 @@ def _asp_loop(  # noqa: C901
         # TODO check with Potsdam why handle.wait() does not work as expected: https://potassco.org/clingo/python-api/5.4/
         timer = Timer(interval=timeout, function=interrupt)
         timer.start()
+        if deadline is not None:
+            # never restarted, unlike `timer`
+            deadline_timer = Timer(interval=max(deadline - (time.time() - solve_start_time), 0), function=interrupt)
+            deadline_timer.start()
         while not handle.wait():
             pass
+    timer.cancel()
+    if deadline_timer is not None:
+        deadline_timer.cancel()
     if len(all_answers) == 0:
         _print_stats(statistics=ctl.statistics)
         raise ValueError(f"ASP solver: No solution found. Interrupted={interrupted}")
-    return all_answers
+    if interrupted:
+        rsp_logger.info(f"ASP solver interrupted, returning the best model found after {len(incumbent_trace)} incumbents")
+    return all_answers, incumbent_trace
 
 
 def _print_stats(statistics, print_full_dump: bool = False):
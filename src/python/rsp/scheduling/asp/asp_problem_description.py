@@ -1,17 +1,25 @@
 from __future__ import print_function
 
+import bisect
+import itertools
+import time
+from functools import lru_cache
 from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
 
+import clingo
 import networkx as nx
-from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
+from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.scheduling.asp import theory
 from rsp.scheduling.asp.asp_data_types import ASPHeuristics
 from rsp.scheduling.asp.asp_data_types import ASPObjective
 from rsp.scheduling.asp.asp_helper import flux_helper
+from rsp.scheduling.asp.asp_helper import flux_helper_ground_incremental
+from rsp.scheduling.asp.asp_helper import flux_helper_solve_scope
 from rsp.scheduling.asp.asp_solution_description import ASPSolutionDescription
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
 from rsp.scheduling.scheduling_problem import get_sources_for_topo
@@ -20,6 +28,30 @@ from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 
 
+# blocked time b(R,B) of every resource
+RESOURCE_BLOCKED_TIME = 1
+
+
+def _tuple_symbol(*arguments: clingo.Symbol) -> clingo.Symbol:
+    # a function without name is a tuple
+    return clingo.Function("", list(arguments))
+
+
+@lru_cache(maxsize=None)
+def _train_symbol(agent_id: int) -> clingo.Symbol:
+    return clingo.Function(f"t{agent_id}")
+
+
+@lru_cache(maxsize=None)
+def _resource_symbol(resource_id: Tuple[int, int]) -> clingo.Symbol:
+    return clingo.Function("resource_{}_{}".format(*resource_id))
+
+
+@lru_cache(maxsize=None)
+def _number_symbol(number: int) -> clingo.Symbol:
+    return clingo.Number(number)
+
+
 class ASPProblemDescription:
     def __init__(
         self,
@@ -30,6 +62,7 @@ class ASPProblemDescription:
         nb_threads: int = 2,
         no_optimize: bool = False,
         timeout: int = 10 * 60 * 60,
+        deadline: Optional[float] = None,
     ):
         self.schedule_problem_description = schedule_problem_description
         self.asp_seed_value = asp_seed_value
@@ -37,14 +70,32 @@ class ASPProblemDescription:
         self.nb_threads = nb_threads
         self.no_optimize = no_optimize
         self.asp_heuristics: Optional[List[ASPHeuristics]] = asp_heuristics
+        # the timeout counts since the last model, the deadline (anytime mode) since solve start
         self.timeout = timeout
+        self.deadline = deadline
+        # seconds spent building `asp_program` and `asp_facts` in the factory
+        self.build_program_time: float = 0.0
+        # statements given as text
+        self.asp_program: List[str] = []
+        # facts given as symbols, added through the backend without being parsed, see `get_asp_program_dump` for their text
+        self.asp_facts: List[clingo.Symbol] = []
+        self._waypoint_symbols: Dict[Waypoint, clingo.Symbol] = {}
+        # resource -> edges on the resource (ordered set, i.e. dict with `None` values)
+        self._resource_table: Dict[Tuple[int, int], Dict[clingo.Symbol, None]] = {}
+        # incremental solving: the base problem is grounded once and each scope only adds its restriction
+        self.incremental_base: Optional["ASPProblemDescription"] = None
+        self.scope: Optional[str] = None
+        self.scope_asp_program: List[str] = []
+        self._incremental_control = None
 
     @staticmethod
     def factory_rescheduling(
         schedule_problem_description: ScheduleProblemDescription,
         additional_costs_at_targets: Dict[int, Dict[Waypoint, int]] = None,
         asp_seed_value: Optional[int] = None,
+        schedule_trainruns: Optional[TrainrunDict] = None,
     ) -> "ASPProblemDescription":
+        start_time = time.time()
         asp_problem = ASPProblemDescription(
             schedule_problem_description=schedule_problem_description,
             asp_objective=ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED,
@@ -53,18 +104,92 @@ class ASPProblemDescription:
             no_optimize=False,  # Optimize if set to False
             # we're not interested in times longer than 10 minutes in re-scheduling
             timeout=10 * 60,
+            deadline=GLOBAL_CONSTANTS.RESCHEDULE_DEADLINE,
         )
         asp_problem._build_asp_program(
             schedule_problem_description=schedule_problem_description,
             add_minimumrunnigtime_per_agent=False,
             additional_costs_at_targets=additional_costs_at_targets,
         )
+        asp_problem._add_schedule_heuristics(schedule_trainruns=schedule_trainruns)
+        asp_problem.build_program_time = time.time() - start_time
+        return asp_problem
+
+    @staticmethod
+    def factory_rescheduling_incremental_base(
+        schedule_problem_description: ScheduleProblemDescription, asp_seed_value: Optional[int] = None, schedule_trainruns: Optional[TrainrunDict] = None
+    ) -> "ASPProblemDescription":
+        """Base problem for incremental re-scheduling: it is grounded once and
+        its scopes (including the base problem itself) are solved on the same
+        grounding, see `factory_rescheduling_scope`."""
+        start_time = time.time()
+        asp_problem = ASPProblemDescription(
+            schedule_problem_description=schedule_problem_description,
+            asp_objective=ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED_SCOPED,
+            asp_heuristics=GLOBAL_CONSTANTS.RESCHEDULE_HEURISTICS,
+            asp_seed_value=asp_seed_value,
+            no_optimize=False,
+            # we're not interested in times longer than 10 minutes in re-scheduling
+            timeout=10 * 60,
+            deadline=GLOBAL_CONSTANTS.RESCHEDULE_DEADLINE,
+        )
+        asp_problem._build_asp_program(schedule_problem_description=schedule_problem_description, add_minimumrunnigtime_per_agent=False)
+        asp_problem._add_schedule_heuristics(schedule_trainruns=schedule_trainruns)
+        asp_problem.build_program_time = time.time() - start_time
+        return asp_problem
+
+    @staticmethod
+    def factory_rescheduling_scope(
+        incremental_base: "ASPProblemDescription",
+        scope: str,
+        schedule_problem_description: ScheduleProblemDescription,
+        additional_costs_at_targets: Dict[int, Dict[Waypoint, int]] = None,
+    ) -> "ASPProblemDescription":
+        """Re-scheduling problem solved on the grounding of `incremental_base`.
+
+        Parameters
+        ----------
+        incremental_base
+            see `factory_rescheduling_incremental_base`
+        scope
+            name of the scope, must be a valid ASP constant and unique for the `incremental_base`
+        schedule_problem_description
+            must be a restriction of the `incremental_base`'s problem, see `schedule_problem_description_is_restriction`
+        additional_costs_at_targets
+
+        Returns
+        -------
+        ASPProblemDescription
+        """
+        start_time = time.time()
+        asp_problem = ASPProblemDescription(
+            schedule_problem_description=schedule_problem_description,
+            asp_objective=incremental_base.asp_objective,
+            asp_heuristics=incremental_base.asp_heuristics,
+            asp_seed_value=incremental_base.asp_seed_value,
+            nb_threads=incremental_base.nb_threads,
+            no_optimize=False,
+            timeout=incremental_base.timeout,
+            deadline=incremental_base.deadline,
+        )
+        asp_problem.incremental_base = incremental_base
+        asp_problem.scope = scope
+        asp_problem.scope_asp_program = asp_problem._build_scope_asp_program(
+            scope=scope,
+            schedule_problem_description=schedule_problem_description,
+            base_schedule_problem_description=incremental_base.schedule_problem_description,
+            additional_costs_at_targets=additional_costs_at_targets,
+        )
+        asp_problem.asp_program = incremental_base.asp_program + asp_problem.scope_asp_program
+        asp_problem.asp_facts = incremental_base.asp_facts
+        asp_problem.build_program_time = time.time() - start_time
         return asp_problem
 
     @staticmethod
     def factory_scheduling(
         schedule_problem_description: ScheduleProblemDescription, asp_seed_value: Optional[int] = None, no_optimize: bool = False
     ) -> "ASPProblemDescription":
+        start_time = time.time()
         asp_problem = ASPProblemDescription(
             schedule_problem_description=schedule_problem_description,
             asp_objective=ASPObjective.MINIMIZE_SUM_RUNNING_TIMES,
@@ -80,12 +205,30 @@ class ASPProblemDescription:
             # minimize_total_sum_of_running_times.lp requires minimumrunningtime(agent_id,<minimumrunningtime)
             add_minimumrunnigtime_per_agent=True,
         )
+        asp_problem.build_program_time = time.time() - start_time
         return asp_problem
 
     @staticmethod
     def _sanitize_waypoint(waypoint: Waypoint):
         return tuple([tuple(waypoint.position), int(waypoint.direction)])
 
+    def _waypoint_symbol(self, waypoint: Waypoint) -> clingo.Symbol:
+        """Symbol `((r,c),d)` of the waypoint, same as `_sanitize_waypoint`."""
+        symbol = self._waypoint_symbols.get(waypoint)
+        if symbol is None:
+            row, column = waypoint.position
+            symbol = _tuple_symbol(_tuple_symbol(_number_symbol(row), _number_symbol(column)), _number_symbol(int(waypoint.direction)))
+            self._waypoint_symbols[waypoint] = symbol
+        return symbol
+
+    def _edge_symbol(self, entry_waypoint: Waypoint, exit_waypoint: Waypoint) -> clingo.Symbol:
+        return _tuple_symbol(self._waypoint_symbol(entry_waypoint), self._waypoint_symbol(exit_waypoint))
+
+    def get_asp_program_dump(self) -> List[str]:
+        """Text of the whole program (statements and facts) for persistence
+        and debugging."""
+        return self.asp_program + [f"{fact}." for fact in self.asp_facts]
+
     def _implement_train(self, agent_id: int, start_vertices: List[Waypoint], target_vertices: List[Waypoint]):
         """Rule 2 each train is scheduled.
 
@@ -132,43 +275,63 @@ class ASPProblemDescription:
         ----------
         """
 
+        train = _train_symbol(agent_id)
+        entry_vertex = self._waypoint_symbol(entry_waypoint)
+        exit_vertex = self._waypoint_symbol(exit_waypoint)
+        edge = _tuple_symbol(entry_vertex, exit_vertex)
+
         # add edge: edge(T,V,V')
-        self.asp_program.append("edge(t{}, {},{}).".format(agent_id, self._sanitize_waypoint(entry_waypoint), self._sanitize_waypoint(exit_waypoint)))
+        self.asp_facts.append(clingo.Function("edge", [train, entry_vertex, exit_vertex]))
 
         # minimum waiting time: w(T,E,W)
         # TODO workaround we use waiting times to model train-specific minimum travel time;
         #      instead we should use train-specific route graphs which are linked by resources only!
-        self.asp_program.append(
-            "w(t{}, ({},{}),{}).".format(agent_id, self._sanitize_waypoint(entry_waypoint), self._sanitize_waypoint(exit_waypoint), int(minimum_travel_time))
-        )
-        # minimum running time: m(E,M)
-        self.asp_program.append("m(({},{}),{}).".format(self._sanitize_waypoint(entry_waypoint), self._sanitize_waypoint(exit_waypoint), 0))
-
-        # declare resource
-        # TODO SIM-144 resource may be declared multiple times, maybe we should declare resource by
-        #      loop over grid cells and their transitions
-        self.asp_program.append(
-            "resource(resource_{}_{},({},{})).".format(*resource_id, self._sanitize_waypoint(entry_waypoint), self._sanitize_waypoint(exit_waypoint))
-        )
-
-        # TODO SIM-129: release time = 1 to allow for synchronization in FLATland - can we get rid of it?
-        self.asp_program.append("b(resource_{}_{},1).".format(*resource_id))
+        self.asp_facts.append(clingo.Function("w", [train, edge, _number_symbol(int(minimum_travel_time))]))
+        # declare resource: the edge is shared by all trains, the facts m, resource and b are added once by `_implement_resources`
+        self._resource_table.setdefault(resource_id, {})[edge] = None
 
         # add train-specific route penalty (T,E,P) for minimize_delay_and_routes_combined.lp
         # N.B. we do not use penalty(E,P) as for objective minimize_routes.lp and heuristic_ROUTES.lp
         if route_section_penalty > 0:
             # penalty(T,E,P) # noqa: E800
-            self.asp_program.append(
-                "penalty(t{},({},{}),{}).".format(
-                    agent_id, self._sanitize_waypoint(entry_waypoint), self._sanitize_waypoint(exit_waypoint), route_section_penalty
-                )
-            )
+            self.asp_facts.append(clingo.Function("penalty", [train, edge, _number_symbol(route_section_penalty)]))
+
+    def _implement_resources(self):
+        """Add the edges collected in the resource table by
+        `_implement_route_section`: one fact per edge for `m` and `resource`
+        and one fact per resource for `b`."""
+        for resource_id, edges in self._resource_table.items():
+            resource = _resource_symbol(resource_id)
+            # TODO SIM-129: release time = 1 to allow for synchronization in FLATland - can we get rid of it?
+            self.asp_facts.append(clingo.Function("b", [resource, _number_symbol(RESOURCE_BLOCKED_TIME)]))
+            for edge in edges:
+                # minimum running time: m(E,M)
+                self.asp_facts.append(clingo.Function("m", [edge, _number_symbol(0)]))
+                self.asp_facts.append(clingo.Function("resource", [resource, edge]))
 
     def solve(self, verbose: bool = False) -> ASPSolutionDescription:
         """Return the solver and return solver-specific solution
         description."""
+        if self.incremental_base is not None:
+            ctl, dl, base_grounding_time = self.incremental_base._ground_incremental(verbose=verbose)
+            asp_solution = flux_helper_solve_scope(
+                ctl=ctl,
+                dl=dl,
+                scope=self.scope,
+                scope_asp_data=self.scope_asp_program,
+                asp_seed_value=self.asp_seed_value,
+                verbose=verbose,
+                timeout=self.timeout,
+                deadline=self.deadline,
+            )
+            if base_grounding_time is not None:
+                # the first scope solved on the base pays for building and grounding the base
+                self.build_program_time += self.incremental_base.build_program_time
+                asp_solution = asp_solution._replace(grounding_time=asp_solution.grounding_time + base_grounding_time)
+            return ASPSolutionDescription(asp_solution=asp_solution, schedule_problem_description=self.schedule_problem_description)
         asp_solution = flux_helper(
             self.asp_program,
+            asp_facts=self.asp_facts,
             asp_objective=self.asp_objective,
             asp_heuristics=self.asp_heuristics,
             asp_seed_value=self.asp_seed_value,
@@ -176,9 +339,28 @@ class ASPProblemDescription:
             no_optimize=self.no_optimize,
             verbose=verbose,
             timeout=self.timeout,
+            deadline=self.deadline,
         )
         return ASPSolutionDescription(asp_solution=asp_solution, schedule_problem_description=self.schedule_problem_description)
 
+    def _ground_incremental(self, verbose: bool = False) -> Tuple[clingo.Control, theory.Theory, Optional[float]]:
+        """Ground the base problem on first use; the grounding time is `None`
+        if the base problem has been grounded before."""
+        if self._incremental_control is not None:
+            ctl, dl = self._incremental_control
+            return ctl, dl, None
+        ctl, dl, grounding_time = flux_helper_ground_incremental(
+            self.asp_program,
+            asp_facts=self.asp_facts,
+            asp_objective=self.asp_objective,
+            asp_heuristics=self.asp_heuristics,
+            asp_seed_value=self.asp_seed_value,
+            nb_threads=self.nb_threads,
+            verbose=verbose,
+        )
+        self._incremental_control = ctl, dl
+        return ctl, dl, grounding_time
+
     @staticmethod
     def convert_position_and_entry_direction_to_waypoint(r: int, c: int, d: int) -> Waypoint:
         """
@@ -206,6 +388,8 @@ class ASPProblemDescription:
         # preparation
         _new_asp_program = []
         self.asp_program = _new_asp_program
+        self.asp_facts = []
+        self._resource_table = {}
 
         # dirty work around to silence ASP complaining "info: atom does not occur in any rule head"
         # (we don't use all features in encoding.lp)
@@ -237,9 +421,14 @@ class ASPProblemDescription:
                     route_section_penalty=schedule_problem_description.route_section_penalties[agent_id].get((entry_waypoint, exit_waypoint), 0),
                 )
 
-            _new_asp_program += self._translate_route_dag_constraints_to_asp(
+            self.asp_facts += self._translate_route_dag_constraints_to_asp(
                 agent_id=agent_id, topo=schedule_problem_description.topo_dict[agent_id], freeze=freeze
             )
+        self._implement_resources()
+
+        if GLOBAL_CONSTANTS.PRECOMPUTE_SHARED:
+            _new_asp_program.append("shared_precomputed.")
+            self.asp_facts += self._build_shared_asp_program(schedule_problem_description=schedule_problem_description)
 
         if add_minimumrunnigtime_per_agent:
             for agent_id in self.schedule_problem_description.minimum_travel_time_dict:
@@ -259,7 +448,7 @@ class ASPProblemDescription:
                     self.asp_program.append("delayatearliest(t{},{},{}).".format(agent_id, vertex, penalty))
 
         # inject weight lateness
-        if self.asp_objective == ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED:
+        if self.asp_objective in [ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED, ASPObjective.MINIMIZE_DELAY_ROUTES_COMBINED_SCOPED]:
             _new_asp_program.append(f"#const weight_lateness_seconds = {schedule_problem_description.weight_lateness_seconds}.")
 
         # inject delay model parameterization
@@ -289,26 +478,138 @@ class ASPProblemDescription:
         agent_id
         freeze
         """
-        frozen: List[TrainrunWaypoint] = []
-        train = "t{}".format(agent_id)
+        frozen: List[clingo.Symbol] = []
+        train = _train_symbol(agent_id)
 
         # 2019-12-03 discussion with Potsdam (SIM-146)
         # - no diff-constraints in addition to earliest/latest -> should be added immediately
         # - no route constraints in addition to visit -> should be added immediately
         for waypoint, scheduled_at in freeze.latest.items():
-            vertex = self._sanitize_waypoint(waypoint)
-            time = scheduled_at
-
-            # add earliest constraint
+            # add latest constraint
             # l(t1,1,2).
-            frozen.append(f"l({train},{vertex},{time}).")
+            frozen.append(clingo.Function("l", [train, self._waypoint_symbol(waypoint), _number_symbol(scheduled_at)]))
 
         for waypoint, scheduled_at in freeze.earliest.items():
-            vertex = self._sanitize_waypoint(waypoint)
-            time = scheduled_at
-
             # add earliest constraint
             # e(t1,1,2).
-            frozen.append(f"e({train},{vertex},{time}).")
+            frozen.append(clingo.Function("e", [train, self._waypoint_symbol(waypoint), _number_symbol(scheduled_at)]))
 
         return frozen
+
+    def _build_shared_asp_program(self, schedule_problem_description: ScheduleProblemDescription) -> List[clingo.Symbol]:
+        """Possible resource conflicts `shared/4` as in `encoding.lp`: edges
+        `(V,V')` of train `T` and `(U,U')` of train `T'` on the same resource
+        with `e(T,V) <= e(T',U) < l(T,V') + b`.
+
+        Instead of joining all pairs of edges, we sort the edges per resource by earliest entry
+        and find the second edges of every edge by binary search. As in the encoding, the second edge needs only an
+        earliest entry, the first edge also a latest exit.
+        Only one direction is given, the encoding adds the symmetric facts.
+
+        Parameters
+        ----------
+        schedule_problem_description
+
+        Returns
+        -------
+        List[clingo.Symbol]
+        """
+        # resource -> [(earliest entry, latest exit or None, train, edge)]
+        resource_index: Dict[Tuple[int, int], List[Tuple[int, Optional[int], clingo.Symbol, clingo.Symbol]]] = {}
+        for agent_id, topo in schedule_problem_description.topo_dict.items():
+            route_dag_constraints = schedule_problem_description.route_dag_constraints_dict[agent_id]
+            train = _train_symbol(agent_id)
+            for (entry_waypoint, exit_waypoint) in topo.edges:
+                if entry_waypoint not in route_dag_constraints.earliest:
+                    continue
+                edge = self._edge_symbol(entry_waypoint, exit_waypoint)
+                # resource of an edge is the cell of its entry waypoint, see `_build_asp_program`
+                resource_index.setdefault(entry_waypoint.position, []).append(
+                    (route_dag_constraints.earliest[entry_waypoint], route_dag_constraints.latest.get(exit_waypoint), train, edge)
+                )
+
+        shared = []
+        for occupations in resource_index.values():
+            occupations.sort(key=lambda occupation: occupation[0])
+            earliest_entries = [earliest for earliest, _, _, _ in occupations]
+            for earliest, latest, train, edge in occupations:
+                if latest is None:
+                    continue
+                first = bisect.bisect_left(earliest_entries, earliest)
+                last = bisect.bisect_left(earliest_entries, latest + RESOURCE_BLOCKED_TIME)
+                for _, _, other_train, other_edge in occupations[first:last]:
+                    if other_train != train:
+                        shared.append(clingo.Function("shared", [train, edge, other_train, other_edge]))
+        return shared
+
+    def _add_schedule_heuristics(self, schedule_trainruns: Optional[TrainrunDict]):
+        """Add the data for `ASPHeuristics.HEURISTIC_SCHEDULE` if the heuristic
+        is used and the schedule is given."""
+        if schedule_trainruns is None or self.asp_heuristics is None or ASPHeuristics.HEURISTIC_SCHEDULE not in self.asp_heuristics:
+            return
+        self.asp_program += self._build_schedule_heuristics_asp_program(schedule_trainruns=schedule_trainruns)
+
+    def _build_schedule_heuristics_asp_program(self, schedule_trainruns: TrainrunDict) -> List[str]:
+        """Routes, visits and the order on the resources of the schedule, see
+        `heuristic_SCHEDULE.lp`.
+
+        Parameters
+        ----------
+        schedule_trainruns
+            the original schedule
+
+        Returns
+        -------
+        List[str]
+        """
+        heuristics_program = []
+        # resource -> [(entry time, train, edge)]
+        resource_occupations: Dict[Tuple[int, int], List[Tuple[int, str, str]]] = {}
+        for agent_id, trainrun in schedule_trainruns.items():
+            train = "t{}".format(agent_id)
+            for trainrun_waypoint in trainrun:
+                heuristics_program.append(f"schedule_visit({train},{self._sanitize_waypoint(trainrun_waypoint.waypoint)}).")
+            for entry_trainrun_waypoint, exit_trainrun_waypoint in zip(trainrun, trainrun[1:]):
+                edge = f"({self._sanitize_waypoint(entry_trainrun_waypoint.waypoint)},{self._sanitize_waypoint(exit_trainrun_waypoint.waypoint)})"
+                heuristics_program.append(f"schedule_route({train},{edge}).")
+                # resource of an edge is the cell of its entry waypoint, see `_build_asp_program`
+                resource_occupations.setdefault(entry_trainrun_waypoint.waypoint.position, []).append((entry_trainrun_waypoint.scheduled_at, train, edge))
+        for occupations in resource_occupations.values():
+            # combinations of the sorted occupations keep their order
+            for (_, train, edge), (_, train_after, edge_after) in itertools.combinations(sorted(occupations), 2):
+                if train_after != train:
+                    heuristics_program.append(f"schedule_seq({train},{edge},{train_after},{edge_after}).")
+        return heuristics_program
+
+    def _build_scope_asp_program(
+        self,
+        scope: str,
+        schedule_problem_description: ScheduleProblemDescription,
+        base_schedule_problem_description: ScheduleProblemDescription,
+        additional_costs_at_targets: Dict[int, Dict[Waypoint, int]] = None,
+    ) -> List[str]:
+        """Facts restricting the base problem to the scope, see
+        `minimize_delay_and_routes_combined_scoped.lp`."""
+        scope_program = []
+        for agent_id, topo in schedule_problem_description.topo_dict.items():
+            train = "t{}".format(agent_id)
+            base_topo = base_schedule_problem_description.topo_dict[agent_id]
+            for waypoint in base_topo.nodes:
+                if waypoint not in topo.nodes:
+                    scope_program.append(f"scope_forbidden_vertex({scope},{train},{self._sanitize_waypoint(waypoint)}).")
+            for (entry_waypoint, exit_waypoint) in base_topo.edges:
+                if entry_waypoint in topo.nodes and exit_waypoint in topo.nodes and not topo.has_edge(entry_waypoint, exit_waypoint):
+                    scope_program.append(
+                        f"scope_forbidden_edge({scope},{train},({self._sanitize_waypoint(entry_waypoint)},{self._sanitize_waypoint(exit_waypoint)}))."
+                    )
+            route_dag_constraints = schedule_problem_description.route_dag_constraints_dict[agent_id]
+            for waypoint in topo.nodes:
+                vertex = self._sanitize_waypoint(waypoint)
+                scope_program.append(f"scope_e({scope},{train},{vertex},{route_dag_constraints.earliest[waypoint]}).")
+                scope_program.append(f"scope_l({scope},{train},{vertex},{route_dag_constraints.latest[waypoint]}).")
+        if additional_costs_at_targets is not None:
+            for agent_id, target_penalties in additional_costs_at_targets.items():
+                for waypoint, penalty in target_penalties.items():
+                    assert penalty >= 0, f"{agent_id} has penalty {penalty}"
+                    scope_program.append(f"scope_delayatearliest({scope},t{agent_id},{self._sanitize_waypoint(waypoint)},{penalty}).")
+        return scope_program
@@ -1,40 +1,114 @@
-import re
 from typing import List
 from typing import Set
+from typing import Tuple
 
+import clingo
 import numpy as np
 from flatland.envs.rail_trainrun_data_structures import Trainrun
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
-from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
-from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.resource_occupation.mutual_exclusion import find_overlapping_occupations
+from rsp.scheduling.asp.asp_answer_set import ASPAnswerSet
 from rsp.scheduling.asp.asp_helper import FluxHelperResult
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
 from rsp.scheduling.scheduling_problem import get_sources_for_topo
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
+
+
+def _get_occupations(trainrun_dict: TrainrunDict, release_time: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Resource occupations of the train runs as arrays `rows, columns,
+    from_incl, to_excl, agent_ids`, agent by agent in the order of the train
+    runs."""
+    occupations = [
+        (wp_1.waypoint.position[0], wp_1.waypoint.position[1], wp_1.scheduled_at, wp_2.scheduled_at + release_time, agent_id)
+        for agent_id, trainrun in trainrun_dict.items()
+        for wp_1, wp_2 in zip(trainrun, trainrun[1:])
+    ]
+    return (
+        tuple(np.array(column, dtype=np.int64).reshape(-1) for column in zip(*occupations))
+        if occupations
+        else tuple(np.empty(0, dtype=np.int64) for _ in range(5))
+    )
 
 
 class ASPSolutionDescription:
     def __init__(self, asp_solution: FluxHelperResult, schedule_problem_description: ScheduleProblemDescription):
         self.asp_solution: FluxHelperResult = asp_solution
         self.answer_set: Set[str] = self.asp_solution.answer_sets[0]
+        self.decoded_answer_set: ASPAnswerSet = self.asp_solution.decoded_answer_sets[0]
         self.schedule_problem_description: ScheduleProblemDescription = schedule_problem_description
 
     def verify_correctness(self):
+        """Verify the solution at `GLOBAL_CONSTANTS.VERIFICATION_LEVEL`."""
+        if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.off:
+            return
+        if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.fast and self.__class__.is_correct_fast(
+            self.schedule_problem_description, self.asp_solution
+        ):
+            return
         self.__class__.verify_correctness_helper(self.schedule_problem_description, self.asp_solution)
 
+    @staticmethod  # noqa: C901
+    def is_correct_fast(schedule_problem_description: ScheduleProblemDescription, asp_solution: FluxHelperResult) -> bool:  # noqa: C901
+        """Same checks as `verify_correctness_helper`, without messages: time
+        differences per train run are checked with NumPy, constraints only for
+        the visited waypoints and mutual exclusion by sorting the occupations
+        per resource instead of enumerating every time step (as in `verify_correctness_helper`).
+
+        Returns
+        -------
+        bool
+            whether `verify_correctness_helper` passes
+        """
+        answer_set: ASPAnswerSet = asp_solution.decoded_answer_sets[0]
+
+        trainrun_dict = {}
+        for agent_id, topo in schedule_problem_description.topo_dict.items():
+            route_dag_constraints = schedule_problem_description.route_dag_constraints_dict[agent_id]
+            trainrun_waypoints = answer_set.trainruns.get(agent_id, [])
+            trainrun_dict[agent_id] = trainrun_waypoints
+            if len(trainrun_waypoints) == 0:
+                return False
+            waypoints = [trainrun_waypoint.waypoint for trainrun_waypoint in trainrun_waypoints]
+            times = np.array([trainrun_waypoint.scheduled_at for trainrun_waypoint in trainrun_waypoints])
+
+            # 1.1 and 1.3 strictly increasing and minimum running time
+            if not np.all(np.diff(times) >= max(1, schedule_problem_description.minimum_travel_time_dict[agent_id])):
+                return False
+            # 1.2 source and sink
+            if waypoints[0] not in topo or topo.in_degree(waypoints[0]) > 0 or waypoints[-1] not in topo or topo.out_degree(waypoints[-1]) > 0:
+                return False
+            # 1.4 topology and 1.5 no cycles
+            if not all(topo.has_edge(wp_1, wp_2) for wp_1, wp_2 in zip(waypoints, waypoints[1:])) or len(set(waypoints)) != len(waypoints):
+                return False
+            # 2. constraints
+            for trainrun_waypoint in trainrun_waypoints:
+                earliest = route_dag_constraints.earliest.get(trainrun_waypoint.waypoint)
+                latest = route_dag_constraints.latest.get(trainrun_waypoint.waypoint)
+                if (earliest is not None and trainrun_waypoint.scheduled_at < earliest) or (latest is not None and trainrun_waypoint.scheduled_at > latest):
+                    return False
+
+        # 3. mutual exclusion and release time
+        if len(find_overlapping_occupations(*_get_occupations(trainrun_dict=trainrun_dict, release_time=1))) > 0:
+            return False
+
+        # 4. costs
+        return asp_solution.stats["summary"]["costs"][0] == np.sum(answer_set.late) + np.sum(answer_set.active_penalty) + np.sum(
+            answer_set.act_penalty_for_train
+        )
+
     # TODO SIM-517 harmonize with verify trainruns?
     @staticmethod  # noqa: C901
     def verify_correctness_helper(schedule_problem_description: ScheduleProblemDescription, asp_solution: FluxHelperResult):  # noqa: C901
         """Verify that solution is consistent."""
 
-        answer_set = asp_solution.answer_sets[0]
+        answer_set: ASPAnswerSet = asp_solution.decoded_answer_sets[0]
 
         trainrun_dict = {}
 
         for agent_id in schedule_problem_description.topo_dict:
-            var_prefix = "dl((t{},".format(agent_id)
-            agent_facts = filter(lambda s: s.startswith(str(var_prefix)), answer_set)
             source_waypoints = list(get_sources_for_topo(schedule_problem_description.topo_dict[agent_id]))
             sink_waypoints = list(get_sinks_for_topo(schedule_problem_description.topo_dict[agent_id]))
             route_dag_constraints = schedule_problem_description.route_dag_constraints_dict[agent_id]
@@ -42,9 +116,8 @@ class ASPSolutionDescription:
             minimum_running_time = schedule_problem_description.minimum_travel_time_dict[agent_id]
             topo = schedule_problem_description.topo_dict[agent_id]
 
-            # filter out dl entries that are zero and not relevant to us
-            trainrun_waypoints = list(map(ASPSolutionDescription._parse_dl_fact, agent_facts))
-            trainrun_waypoints.sort(key=lambda p: p.scheduled_at)
+            # already sorted by scheduled_at
+            trainrun_waypoints = answer_set.trainruns.get(agent_id, [])
             trainrun_dict[agent_id] = trainrun_waypoints
             waypoints = {trainrun_waypoint.waypoint for trainrun_waypoint in trainrun_waypoints}
             schedule = {trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in trainrun_waypoints}
@@ -89,41 +162,23 @@ class ASPSolutionDescription:
                     )
 
         # 3. verify mututal exclusion and release time
-        resource_occupations = {}
-        for agent_id, trainrun in trainrun_dict.items():
-            for wp1, wp2 in zip(trainrun, trainrun[1:]):
-                resource = wp1.waypoint.position
-                # TODO SIM-129 release time 1 hard-coded
-                for time in range(wp1.scheduled_at, wp2.scheduled_at + 1):
-                    occupation = (resource, time)
-                    if occupation in resource_occupations:
-                        assert (
-                            agent_id == resource_occupations[occupation]
-                        ), f"(3) conflicting resource occuptions {occupation} for {agent_id} and {resource_occupations[occupation]}"
-                    resource_occupations[occupation] = agent_id
+        # TODO SIM-129 release time 1 hard-coded
+        occupations = _get_occupations(trainrun_dict=trainrun_dict, release_time=1)
+        conflicts = find_overlapping_occupations(*occupations)
+        if len(conflicts) > 0:
+            # report the conflict in the same order as enumerating the time steps of the occupations agent by agent
+            rows, columns, from_incl, _, agent_ids = occupations
+            first, second = min(conflicts, key=lambda conflict: (max(conflict), max(from_incl[conflict[0]], from_incl[conflict[1]])))
+            earlier, later = min(first, second), max(first, second)
+            occupation = ((int(rows[later]), int(columns[later])), int(max(from_incl[first], from_incl[second])))
+            assert False, f"(3) conflicting resource occuptions {occupation} for {agent_ids[later]} and {agent_ids[earlier]}"
 
         # 4. check costs are sum of lates and active_penalty
-        solver_result: Set[str] = answer_set
-
-        # 'active_penalty(30,t48,(((21,24),3),((21,23),3)))', 'active_penalty(30,t6,(((52,37),0),((52,36),3)))' #noqa
-        penalty_first_item_pattern = re.compile(r"[a-z_]+\(([0-9]+),")
-        # 'late(t6,((22,28),1),959,1)', 'late(t6,((22,28),1),957,50)', 'late(t6,((22,28),1),958,1)'#noqa
-        # act_penalty_for_train(T,R,P)#noqa
-        penalty_last_item_pattern = re.compile(r".*,([0-9]+)\)")
-
         # minimize_delay_and_routes_combined.lp: late and active_penalty #noqa
-
-        active_penalty_string = [s for s in solver_result if "active_penalty(" in s]
-
-        late_string = [s for s in solver_result if s.startswith("late(")]
-        active_penalty = [int(penalty_first_item_pattern.match(s).group(1)) for s in active_penalty_string]
-
         # minimize_total_sum_of_running_times.lp: act_penalty_for_train #noqa
-        act_penalty_for_train_string = [s for s in solver_result if s.startswith("act_penalty_for_train(")]
-        act_penalty_for_train = [int(penalty_last_item_pattern.match(s).group(1)) for s in act_penalty_for_train_string]
-
-        late = [int(penalty_last_item_pattern.match(s).group(1)) for s in late_string]
-        assert asp_solution.stats["summary"]["costs"][0] == np.sum(late) + np.sum(active_penalty) + np.sum(act_penalty_for_train)
+        assert asp_solution.stats["summary"]["costs"][0] == np.sum(answer_set.late) + np.sum(answer_set.active_penalty) + np.sum(
+            answer_set.act_penalty_for_train
+        )
 
     def get_trainruns_dict(self) -> TrainrunDict:
         """Get train runs for all agents: waypoints and entry times."""
@@ -134,30 +189,14 @@ class ASPSolutionDescription:
         # take stats of last multi-shot call
         return self.asp_solution.stats["summary"]["models"]["enumerated"] > 0
 
-    @staticmethod
-    def _parse_dl_fact(value: str) -> TrainrunWaypoint:
-        # dl((t0,((3,5),3)),5) # NOQA
-        p = re.compile(r"dl\(\(t[^,]+,\(\(([0-9]+),([0-9]+)\),(.+)\)\),([0-9]+)\)")
-        m = p.match(value)
-        r = int(m.group(1))
-        c = int(m.group(2))
-        d = int(m.group(3))
-        entry = int(m.group(4))
-
-        return TrainrunWaypoint(scheduled_at=entry, waypoint=Waypoint(position=(r, c), direction=d))
-
     def get_trainrun_for_agent(self, agent_id: int) -> Trainrun:
         """Get train run of the agent in the solution."""
         return self._get_solution_trainrun(agent_id)
 
     def _get_solution_trainrun(self, agent_id) -> Trainrun:
-        var_prefix = "dl((t{},".format(agent_id)
-        agent_facts = filter(lambda s: s.startswith(str(var_prefix)), self.answer_set)
         start_waypoint = list(get_sources_for_topo(self.schedule_problem_description.topo_dict[agent_id]))[0]
-        # filter out dl entries that are zero and not relevant to us
-        path = list(filter(lambda pse: pse.scheduled_at > 0 or pse.waypoint == start_waypoint, map(self.__class__._parse_dl_fact, agent_facts)))
-        path.sort(key=lambda p: p.scheduled_at)
-        return path
+        # filter out dl entries that are zero and not relevant to us (trainruns are already sorted by scheduled_at)
+        return [pse for pse in self.decoded_answer_set.trainruns.get(agent_id, []) if pse.scheduled_at > 0 or pse.waypoint == start_waypoint]
 
     def get_objective_value(self) -> float:
         costs_ = self.asp_solution.stats["summary"]["costs"]
@@ -176,10 +215,10 @@ class ASPSolutionDescription:
         return self.get_total_time() - self.get_solve_time()
 
     def extract_list_of_lates(self) -> List[str]:
-        return list(filter(lambda s: s.startswith("late("), self.answer_set))
+        return [str(symbol) for symbol in self.decoded_answer_set.symbols if symbol.type == clingo.SymbolType.Function and symbol.name == "late"]
 
     def extract_list_of_active_penalty(self) -> List[str]:
-        return list(filter(lambda s: s.startswith("active_penalty("), self.answer_set))
+        return [str(symbol) for symbol in self.decoded_answer_set.symbols if symbol.type == clingo.SymbolType.Function and symbol.name == "active_penalty"]
 
     def extract_nb_resource_conflicts(self) -> int:
-        return len(list(filter(lambda s: s.startswith("shared("), self.answer_set)))
+        return self.decoded_answer_set.nb_shared
@@ -9,7 +9,9 @@ from rsp.scheduling.asp.asp_helper import configuration_as_dict_from_control
 from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
 from rsp.scheduling.asp.asp_solution_description import ASPSolutionDescription
 from rsp.scheduling.schedule import SchedulingExperimentResult
-from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import has_path_in_route_dag
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
 
 _pp = pprint.PrettyPrinter(indent=4)
 
@@ -33,11 +35,7 @@ def solve_problem(problem: ASPProblemDescription, debug: bool = False, verbose:
     # --------------------------------------------------------------------------------------
     # Preparations
     # --------------------------------------------------------------------------------------
-    minimum_number_of_shortest_paths_over_all_agents = np.min(
-        [len(get_paths_in_route_dag(topo)) for agent_id, topo in problem.schedule_problem_description.topo_dict.items()]
-    )
-
-    if minimum_number_of_shortest_paths_over_all_agents == 0:
+    if not all(has_path_in_route_dag(topo) for topo in problem.schedule_problem_description.topo_dict.values()):
         raise Exception("At least one Agent has no path to its target!")
 
     # --------------------------------------------------------------------------------------
@@ -52,6 +50,8 @@ def solve_problem(problem: ASPProblemDescription, debug: bool = False, verbose:
     if debug:
         print("####train runs dict")
         print(_pp.pformat(trainruns_dict))
+    # the program text is only built if it is kept (`PersistenceProfile.slim` drops it and re-generates it on demand)
+    solver_program = problem.get_asp_program_dump() if debug or GLOBAL_CONSTANTS.PERSISTENCE_PROFILE == PersistenceProfile.full else None
     return (
         SchedulingExperimentResult(
             total_reward=-np.inf,
@@ -65,7 +65,12 @@ def solve_problem(problem: ASPProblemDescription, debug: bool = False, verbose:
             solver_result=solution.answer_set,
             solver_configuration=configuration_as_dict_from_control(solution.asp_solution.ctl),
             solver_seed=solution.asp_solution.asp_seed_value,
-            solver_program=problem.asp_program,
+            solver_program=solver_program,
+            build_program_time=problem.build_program_time,
+            grounding_time=solution.asp_solution.grounding_time,
+            nb_facts=len(problem.asp_program) + len(problem.asp_facts),
+            program_size=len("\n".join(solver_program)) if solver_program is not None else None,
+            incumbent_trace=solution.asp_solution.incumbent_trace,
         ),
         solution,
     )
@@ -1,14 +1,20 @@
 import pprint
+from typing import Dict
+from typing import List
 from typing import Optional
 
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
+from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.scheduling.asp.asp_data_types import ASPHeuristics
 from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
 from rsp.scheduling.asp.asp_solve_problem import solve_problem
 from rsp.scheduling.schedule import SchedulingExperimentResult
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
 from rsp.scheduling.scheduling_problem import route_dag_constraints_dict_pretty_print
+from rsp.scheduling.scheduling_problem import schedule_problem_description_is_restriction
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 from rsp.utils.rsp_logger import rsp_logger
 
 _pp = pprint.PrettyPrinter(indent=4)
@@ -44,33 +50,121 @@ def asp_schedule_wrapper(
     return schedule_result
 
 
+def _additional_costs_at_targets(reschedule_problem_description: ScheduleProblemDescription, schedule: TrainrunDict) -> Dict[int, Dict[Waypoint, int]]:
+    return {
+        agent_id: {
+            sink: reschedule_problem_description.route_dag_constraints_dict[agent_id].earliest[sink] - schedule[agent_id][-1].scheduled_at
+            for sink in get_sinks_for_topo(topo)
+        }
+        for agent_id, topo in reschedule_problem_description.topo_dict.items()
+    }
+
+
+def asp_program_dump(schedule_problem_description: ScheduleProblemDescription, schedule: Optional[TrainrunDict] = None) -> List[str]:
+    """Re-generate the ASP program (`SchedulingExperimentResult.solver_program`)
+    of a scheduling or re-scheduling problem without solving it.
+
+    The program depends on `GLOBAL_CONSTANTS`, which must be those of the run. The re-scheduling program is always
+    the one solved from scratch, also if the problem was solved incrementally.
+
+    Parameters
+    ----------
+    schedule_problem_description
+    schedule
+        `None` for the scheduling problem, the schedule for a re-scheduling problem
+
+    Returns
+    -------
+    List[str]
+    """
+    if schedule is None:
+        return ASPProblemDescription.factory_scheduling(schedule_problem_description=schedule_problem_description).get_asp_program_dump()
+    return ASPProblemDescription.factory_rescheduling(
+        schedule_problem_description=schedule_problem_description,
+        additional_costs_at_targets=_additional_costs_at_targets(reschedule_problem_description=schedule_problem_description, schedule=schedule),
+        schedule_trainruns=schedule,
+    ).get_asp_program_dump()
+
+
+def asp_reschedule_incremental_base(
+    reschedule_problem_description: ScheduleProblemDescription, schedule: TrainrunDict, asp_seed_value: Optional[int] = None
+) -> Optional[ASPProblemDescription]:
+    """Prepare incremental re-scheduling of the scopes restricting
+    `reschedule_problem_description`, see `asp_reschedule_wrapper`.
+
+    Returns
+    -------
+    Optional[ASPProblemDescription]
+        `None` if the re-scheduling heuristics cannot be used incrementally
+    """
+    if ASPHeuristics.HEURISTIC_DELAY in GLOBAL_CONSTANTS.RESCHEDULE_HEURISTICS:
+        rsp_logger.warning(f"no incremental re-scheduling with {ASPHeuristics.HEURISTIC_DELAY}")
+        return None
+    return ASPProblemDescription.factory_rescheduling_incremental_base(
+        schedule_problem_description=reschedule_problem_description, asp_seed_value=asp_seed_value, schedule_trainruns=schedule
+    )
+
+
 def asp_reschedule_wrapper(
-    reschedule_problem_description: ScheduleProblemDescription, schedule: TrainrunDict, asp_seed_value: Optional[int] = None, debug: bool = False,
+    reschedule_problem_description: ScheduleProblemDescription,
+    schedule: TrainrunDict,
+    asp_seed_value: Optional[int] = None,
+    debug: bool = False,
+    incremental_base: Optional[ASPProblemDescription] = None,
+    scope: Optional[str] = None,
 ) -> SchedulingExperimentResult:
     """Solve the Re-Scheduling Problem (i.e. with malfunction).
 
+    Parameters
+    ----------
+    reschedule_problem_description
+    schedule
+    asp_seed_value
+    debug
+    incremental_base
+        if given and `reschedule_problem_description` is a restriction of its problem, solve on its grounding,
+        see `asp_reschedule_incremental_base`.
+    scope
+        unique name of the scope, required for incremental solving
+
     Returns
     -------
     SchedulingExperimentResult
     """
     rsp_logger.info("reschedule_wrapper")
 
-    additional_costs_at_targets = {
-        agent_id: {
-            sink: reschedule_problem_description.route_dag_constraints_dict[agent_id].earliest[sink] - schedule[agent_id][-1].scheduled_at
-            for sink in get_sinks_for_topo(topo)
-        }
-        for agent_id, topo in reschedule_problem_description.topo_dict.items()
-    }
-    reschedule_problem: ASPProblemDescription = ASPProblemDescription.factory_rescheduling(
-        schedule_problem_description=reschedule_problem_description, additional_costs_at_targets=additional_costs_at_targets, asp_seed_value=asp_seed_value
-    )
-
+    additional_costs_at_targets = _additional_costs_at_targets(reschedule_problem_description=reschedule_problem_description, schedule=schedule)
     if debug:
         print("###reschedule")
         route_dag_constraints_dict_pretty_print(reschedule_problem_description.route_dag_constraints_dict)
 
-    reschedule_result, asp_solution = solve_problem(problem=reschedule_problem, debug=debug)
+    reschedule_result, asp_solution = None, None
+    if (
+        incremental_base is not None
+        and scope is not None
+        and schedule_problem_description_is_restriction(restricted=reschedule_problem_description, base=incremental_base.schedule_problem_description)
+    ):
+        reschedule_problem: ASPProblemDescription = ASPProblemDescription.factory_rescheduling_scope(
+            incremental_base=incremental_base,
+            scope=scope,
+            schedule_problem_description=reschedule_problem_description,
+            additional_costs_at_targets=additional_costs_at_targets,
+        )
+        try:
+            reschedule_result, asp_solution = solve_problem(problem=reschedule_problem, debug=debug)
+        except ValueError as e:
+            rsp_logger.warning(f"incremental re-scheduling of {scope} failed, solving from scratch: {e}")
+    elif incremental_base is not None:
+        rsp_logger.info(f"{scope} is not a restriction of the incremental base, solving from scratch")
+
+    if reschedule_result is None:
+        reschedule_problem: ASPProblemDescription = ASPProblemDescription.factory_rescheduling(
+            schedule_problem_description=reschedule_problem_description,
+            additional_costs_at_targets=additional_costs_at_targets,
+            asp_seed_value=asp_seed_value,
+            schedule_trainruns=schedule,
+        )
+        reschedule_result, asp_solution = solve_problem(problem=reschedule_problem, debug=debug)
     if debug:
         print("###lates")
         print(asp_solution.extract_list_of_lates())
@@ -1,7 +1,6 @@
 """Generic route dag generation."""
 from collections import deque
 from typing import Dict
-from typing import List
 from typing import Optional
 from typing import Set
 
@@ -11,8 +10,17 @@ from flatland.envs.rail_trainrun_data_structures import Trainrun
 from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
 from flatland.envs.rail_trainrun_data_structures import Waypoint
 
-from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
+from rsp.scheduling.route_dag import route_dag_from_topo
+from rsp.scheduling.route_dag import route_dag_has_node
+from rsp.scheduling.route_dag import route_dag_nodes
+from rsp.scheduling.route_dag import route_dag_reachable_given_must_be_visited
+from rsp.scheduling.route_dag import route_dag_remove_nodes
+from rsp.scheduling.route_dag import RouteDAG
+from rsp.scheduling.scheduling_problem import get_waypoints_on_all_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraints
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.utils.rsp_logger import rsp_logger
 
@@ -82,6 +90,94 @@ def _propagate_latest(force_latest: Set[Waypoint], latest_dict: Dict[Waypoint, i
             open_queue.append(predecessor)
 
 
+def propagate_earliest_topological(
+    dag: RouteDAG, earliest_dict: Dict[Waypoint, int], force_earliest: Set[Waypoint], minimum_travel_time: int
+) -> Dict[Waypoint, int]:
+    """Same as `_propagate_earliest`, but in a single forward pass in
+    topological order, every edge is relaxed once.
+
+    Caveat: `earliest_dict` is modified.
+
+    Parameters
+    ----------
+    dag
+    earliest_dict
+    force_earliest: earliest must not be changed
+    minimum_travel_time
+    """
+    return _propagate_topological(dag=dag, values_dict=earliest_dict, forced=force_earliest, minimum_travel_time=minimum_travel_time, forward=True)
+
+
+def propagate_latest_topological(dag: RouteDAG, latest_dict: Dict[Waypoint, int], force_latest: Set[Waypoint], minimum_travel_time: int) -> Dict[Waypoint, int]:
+    """Same as `_propagate_latest`, but in a single backward pass in
+    topological order, every edge is relaxed once.
+
+    Caveat: `latest_dict` is modified.
+
+    Parameters
+    ----------
+    dag
+    latest_dict
+    force_latest: latest must not be changed
+    minimum_travel_time
+    """
+    return _propagate_topological(dag=dag, values_dict=latest_dict, forced=force_latest, minimum_travel_time=minimum_travel_time, forward=False)
+
+
+def _propagate_topological(  # noqa: C901
+    dag: RouteDAG, values_dict: Dict[Waypoint, int], forced: Set[Waypoint], minimum_travel_time: int, forward: bool
+) -> Dict[Waypoint, int]:
+    """Forward: `value(v) = min(value(v), value(u) + minimum_travel_time)` for
+    edges `(u,v)`; backward: `value(u) = max(value(u), value(v) -
+    minimum_travel_time)`. Only nodes reachable from `forced` (along the
+    direction of propagation) are updated, `forced` nodes are never updated.
+
+    Forward, the edges are scanned by ascending target, backward by descending source:
+    since indices are in topological order, the origin of an edge is final when the edge is scanned.
+
+    The scan is a plain loop over the edge arrays: route DAGs are long and narrow (about one edge per topological
+    level), so vectorizing over the edges of each level costs more numpy calls than it saves (10 times slower on the
+    regression data).
+    """
+    assert forced.issubset(set(values_dict.keys()))
+    try:
+        assert all(route_dag_has_node(dag, waypoint) for waypoint in forced)
+    except AssertionError as e:
+        rsp_logger.error(f"forced={forced}, topo.nodes={route_dag_nodes(dag)}")
+        raise e
+    nb_nodes = len(dag.waypoints)
+    values = [np.inf if forward else -np.inf] * nb_nodes
+    for waypoint, value in values_dict.items():
+        i = dag.index.get(waypoint)
+        if i is not None:
+            values[i] = value
+    is_forced = [False] * nb_nodes
+    for waypoint in forced:
+        is_forced[dag.index[waypoint]] = True
+    reached = list(is_forced)
+
+    if forward:
+        targets = np.repeat(np.arange(nb_nodes), np.diff(dag.predecessor_offsets))
+        alive = dag.mask[dag.predecessor_indices] & dag.mask[targets]
+        edges = zip(dag.predecessor_indices[alive].tolist(), targets[alive].tolist())
+        for origin, destination in edges:
+            if reached[origin] and not is_forced[destination]:
+                values[destination] = min(values[destination], values[origin] + minimum_travel_time)
+                reached[destination] = True
+    else:
+        alive = dag.mask[dag.edge_sources] & dag.mask[dag.edge_targets]
+        edges = zip(dag.edge_targets[alive][::-1].tolist(), dag.edge_sources[alive][::-1].tolist())
+        for origin, destination in edges:
+            if reached[origin] and not is_forced[destination]:
+                values[destination] = max(values[destination], values[origin] - minimum_travel_time)
+                reached[destination] = True
+
+    for i in range(nb_nodes):
+        if reached[i] and not is_forced[i]:
+            values_dict[dag.waypoints[i]] = values[i]
+    return values_dict
+
+
 def _propagate_latest_forward_constant(earliest_dict: Dict[Waypoint, int], latest_arrival: int, max_window_size_from_earliest: int) -> Dict[Waypoint, int]:
     """Extract latest by adding a constant value to earliest.
 
@@ -101,45 +197,6 @@ def _propagate_latest_forward_constant(earliest_dict: Dict[Waypoint, int], lates
     return latest_dict
 
 
-def _get_reachable_given_frozen_set(topo: nx.DiGraph, must_be_visited: List[Waypoint]) -> Set[Waypoint]:
-    """Determines which vertices can still be reached given the frozen set. We
-    take all funnels forward and backward from these points and then the
-    intersection of those. A source and sink node only have a forward and
-    backward funnel, respectively. In FLATland, the source node is always
-    unique, the sink node is made unique by a dummy node at the end (the agent
-    may enter from more than one direction ino the target cell.)
-
-    Parameters
-    ----------
-    topo
-        directed graph
-    must_be_visited
-        the waypoints that must be visited
-
-    Returns
-    -------
-    """
-    forward_reachable = {waypoint: set() for waypoint in topo.nodes}
-    backward_reachable = {waypoint: set() for waypoint in topo.nodes}
-
-    # collect descendants and ancestors of freeze
-    for waypoint in must_be_visited:
-        forward_reachable[waypoint] = set(nx.descendants(topo, waypoint))
-        backward_reachable[waypoint] = set(nx.ancestors(topo, waypoint))
-
-    # reflexivity: add waypoint to its own closure (needed for building reachable_set below)
-    for waypoint in topo.nodes:
-        forward_reachable[waypoint].add(waypoint)
-        backward_reachable[waypoint].add(waypoint)
-
-    # reachable are only those that are either in the forward or backward "funnel" of all force freezes!
-    reachable_set = set(topo.nodes)
-    for waypoint in must_be_visited:
-        forward_and_backward_reachable = forward_reachable[waypoint].union(backward_reachable[waypoint])
-        reachable_set.intersection_update(forward_and_backward_reachable)
-    return reachable_set
-
-
 def propagate(  # noqa C901
     earliest_dict: Dict[Waypoint, int],
     latest_dict: Dict[Waypoint, int],
@@ -173,9 +230,11 @@ def propagate(  # noqa C901
     # remove nodes not reachable given the must_be_visited
     assert set(force_earliest).issubset(topo.nodes)
     assert set(force_latest).issubset(topo.nodes)
-    reachable = _get_reachable_given_frozen_set(topo=topo, must_be_visited=must_be_visited)
+    dag = route_dag_from_topo(topo)
+    reachable = route_dag_reachable_given_must_be_visited(dag=dag, must_be_visited=must_be_visited)
     to_remove = {v for v in topo.nodes if v not in reachable}
-    topo.remove_nodes_from(to_remove)
+    remove_nodes_from_topo(topo, to_remove)
+    dag = route_dag_remove_nodes(dag, to_remove)
     try:
         assert set(must_be_visited).issubset(reachable)
     except AssertionError as e:
@@ -194,8 +253,8 @@ def propagate(  # noqa C901
     for key in not_reachable_latest:
         del latest_dict[key]
 
-    _propagate_earliest(earliest_dict=earliest_dict, force_earliest=force_earliest, minimum_travel_time=minimum_travel_time, topo=topo)
-    _propagate_latest(force_latest=force_latest, latest_dict=latest_dict, minimum_travel_time=minimum_travel_time, topo=topo)
+    propagate_earliest_topological(dag=dag, earliest_dict=earliest_dict, force_earliest=force_earliest, minimum_travel_time=minimum_travel_time)
+    propagate_latest_topological(dag=dag, latest_dict=latest_dict, force_latest=force_latest, minimum_travel_time=minimum_travel_time)
     if max_window_size_from_earliest < np.inf:
         latest_forward = _propagate_latest_forward_constant(
             earliest_dict=earliest_dict, latest_arrival=latest_arrival, max_window_size_from_earliest=max_window_size_from_earliest
@@ -204,22 +263,19 @@ def propagate(  # noqa C901
             latest_backward_time = latest_dict.get(waypoint)
             latest_dict[waypoint] = min(latest_forward_time, latest_backward_time)
         # apply latest again for consistency
-        _propagate_latest(force_latest=force_latest, latest_dict=latest_dict, minimum_travel_time=minimum_travel_time, topo=topo)
-
-    def _remove_waypoint_from_earliest_latest_topo(waypoint):
-        if waypoint in earliest_dict:
-            earliest_dict.pop(waypoint)
-        if waypoint in latest_dict:
-            latest_dict.pop(waypoint)
-        topo.remove_node(waypoint)
+        propagate_latest_topological(dag=dag, latest_dict=latest_dict, force_latest=force_latest, minimum_travel_time=minimum_travel_time)
 
     # remove nodes not reachable in time
     to_remove = set()
     for waypoint in topo.nodes:
         if waypoint not in earliest_dict or waypoint not in latest_dict or earliest_dict[waypoint] > latest_dict[waypoint]:  # noqa: W504
             to_remove.add(waypoint)
-    for wp in to_remove:
-        _remove_waypoint_from_earliest_latest_topo(wp)
+    for waypoint in to_remove:
+        if waypoint in earliest_dict:
+            earliest_dict.pop(waypoint)
+        if waypoint in latest_dict:
+            latest_dict.pop(waypoint)
+    remove_nodes_from_topo(topo, to_remove)
 
 
 def _get_delayed_trainrun_waypoint_after_malfunction(
@@ -265,7 +321,8 @@ def verify_consistency_of_route_dag_constraints_for_agent(  # noqa: C901
     0. assert all referenced waypoints are in topo
     1. all waypoints in topo must have earliest and latest s.t. earliest <= latest
     2. verify that all points up to malfunction are visited,
-    3a. verify that all source-sink paths go through these points
+    2a. verify that all source-sink paths go through these points
+    2b. verify that all waypoints in topo can be visited given these points
     4. verify that latest-earliest <= max_window_size_from_earliest
 
     Parameters
@@ -282,6 +339,16 @@ def verify_consistency_of_route_dag_constraints_for_agent(  # noqa: C901
     Returns
     -------
     """
+    if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.off:
+        return
+    if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.fast and _is_consistent_route_dag_constraints_fast(
+        agent_id=agent_id,
+        route_dag_constraints=route_dag_constraints,
+        topo=topo,
+        malfunction=malfunction,
+        max_window_size_from_earliest=max_window_size_from_earliest,
+    ):
+        return
 
     all_waypoints = topo.nodes
 
@@ -303,11 +370,7 @@ def verify_consistency_of_route_dag_constraints_for_agent(  # noqa: C901
     # 2. verify that all points up to malfunction are forced to be visited
     if malfunction:
         # 2a. verify that all source-sink paths go through these points
-        all_paths = get_paths_in_route_dag(topo)
-        all_path_vertices = [set(path) for path in all_paths]
-        vertices_of_all_paths = all_path_vertices[0]
-        for path_vertices in all_path_vertices[1:]:
-            vertices_of_all_paths.intersection_update(path_vertices)
+        vertices_of_all_paths = get_waypoints_on_all_paths_in_route_dag(topo)
 
         for waypoint, earliest in route_dag_constraints.earliest.items():
             # everything before malfunction must be the same
@@ -320,6 +383,11 @@ def verify_consistency_of_route_dag_constraints_for_agent(  # noqa: C901
                     earliest >= malfunction.time_step + malfunction.malfunction_duration
                 ), f"agent {agent_id} with malfunction {malfunction}. Found earliest={earliest} for {waypoint}"
 
+        # 2b. verify that all waypoints in topo can be visited given these points
+        frozen = [waypoint for waypoint, earliest in route_dag_constraints.earliest.items() if earliest <= malfunction.time_step]
+        not_reachable = set(all_waypoints).difference(route_dag_reachable_given_must_be_visited(dag=route_dag_from_topo(topo), must_be_visited=frozen))
+        assert len(not_reachable) == 0, f"agent {agent_id}: {not_reachable} cannot be visited given {frozen}"
+
     # 3. verify that latest-earliest <= max_window_size_from_earliest
     for waypoint in route_dag_constraints.earliest:
         assert route_dag_constraints.latest[waypoint] - route_dag_constraints.earliest[waypoint] <= max_window_size_from_earliest, (
@@ -328,6 +396,49 @@ def verify_consistency_of_route_dag_constraints_for_agent(  # noqa: C901
         )
 
 
+def _is_consistent_route_dag_constraints_fast(
+    agent_id: int,
+    route_dag_constraints: RouteDAGConstraints,
+    topo: nx.DiGraph,
+    malfunction: Optional[ExperimentMalfunction],
+    max_window_size_from_earliest: int,
+) -> bool:
+    """Same checks as `verify_consistency_of_route_dag_constraints_for_agent`
+    without messages: waypoints are compared as sets and time windows as NumPy
+    arrays; both checks of the frozen waypoints use the same `RouteDAG`.
+
+    Returns
+    -------
+    bool
+        whether `verify_consistency_of_route_dag_constraints_for_agent` passes
+    """
+    earliest_dict, latest_dict = route_dag_constraints.earliest, route_dag_constraints.latest
+    # 0. and 1. exactly the waypoints in topo have earliest and latest
+    nodes = set(topo.nodes)
+    if earliest_dict.keys() != nodes or latest_dict.keys() != nodes:
+        return False
+    waypoints = list(earliest_dict.keys())
+    earliest = np.array([earliest_dict[waypoint] for waypoint in waypoints], dtype=float)
+    latest = np.array([latest_dict[waypoint] for waypoint in waypoints], dtype=float)
+    # 1. earliest <= latest and 3. latest - earliest <= max_window_size_from_earliest
+    if not np.all(earliest <= latest) or not np.all(latest - earliest <= max_window_size_from_earliest):
+        return False
+    if malfunction:
+        # 2. up to the malfunction: frozen, afterwards: not before the end of the malfunction for the malfunction agent
+        frozen_mask = earliest <= malfunction.time_step
+        if not np.all(latest[frozen_mask] == earliest[frozen_mask]):
+            return False
+        if agent_id == malfunction.agent_id and not np.all(earliest[~frozen_mask] >= malfunction.time_step + malfunction.malfunction_duration):
+            return False
+        frozen = [waypoint for waypoint, is_frozen in zip(waypoints, frozen_mask) if is_frozen]
+        # 2a. on all source-sink paths and 2b. all waypoints can be visited given the frozen waypoints
+        if not set(frozen).issubset(get_waypoints_on_all_paths_in_route_dag(topo)):
+            return False
+        if len(nodes.difference(route_dag_reachable_given_must_be_visited(dag=route_dag_from_topo(topo), must_be_visited=frozen))) > 0:
+            return False
+    return True
+
+
 def verify_trainrun_satisfies_route_dag_constraints(agent_id, route_dag_constraints, scheduled_trainrun):
     """Does the route_dag_constraints reflect the force freeze, route DAG and
     malfunctions correctly?
@@ -340,6 +451,8 @@ def verify_trainrun_satisfies_route_dag_constraints(agent_id, route_dag_constrai
         verify that this whole train run is part of the solution space.
         With malfunctions, caller must ensure that only relevant part is passed to be verified!
     """
+    if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.off:
+        return
 
     scheduled_dict = {trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in scheduled_trainrun}
     for waypoint, scheduled_at in scheduled_dict.items():
@@ -0,0 +1,249 @@
+"""Compact array-backed route DAG.
+
+The waypoints of a route DAG are interned to consecutive indices in
+topological order, i.e. every edge goes from a smaller to a larger index.
+Successors and predecessors are stored in compressed sparse row (CSR) form:
+the successors of node `i` are `edge_targets[successor_offsets[i]:successor_offsets[i+1]]`.
+
+Nodes are removed by clearing their entry in `mask`; the arrays are shared
+between a route DAG and all its restrictions, so restricting is a copy of the
+mask only. Use `route_dag_from_topo` and `route_dag_to_topo` to convert from and to `nx.DiGraph`.
+The route DAG of the base graph of views from `topo_view` is built once and shared by the route DAGs of all its views.
+"""
+import weakref
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Set
+from typing import Tuple
+
+import networkx as nx
+import numpy as np
+from flatland.envs.rail_trainrun_data_structures import Waypoint
+
+from rsp.scheduling.scheduling_problem import RouteDagEdge
+from rsp.scheduling.scheduling_problem import topo_view_base_and_removed_nodes
+
+RouteDAG = NamedTuple(
+    "RouteDAG",
+    [
+        # index -> waypoint, in topological order
+        ("waypoints", Tuple[Waypoint, ...]),
+        # waypoint -> index
+        ("index", Dict[Waypoint, int]),
+        # edges sorted by source, `edge_targets` are the CSR successor indices
+        ("edge_sources", np.ndarray),
+        ("edge_targets", np.ndarray),
+        ("successor_offsets", np.ndarray),
+        # edges sorted by target
+        ("predecessor_offsets", np.ndarray),
+        ("predecessor_indices", np.ndarray),
+        # `True` for the nodes of the route DAG, `False` for removed nodes
+        ("mask", np.ndarray),
+    ],
+)
+
+
+# base graph of views from `topo_view` -> (number of nodes and edges of the base graph when converted, its route DAG)
+_BASE_ROUTE_DAGS: "weakref.WeakKeyDictionary[nx.DiGraph, Tuple[Tuple[int, int], RouteDAG]]" = weakref.WeakKeyDictionary()
+
+
+def route_dag_from_topo(topo: nx.DiGraph) -> RouteDAG:
+    """Convert an acyclic `nx.DiGraph` into a `RouteDAG`.
+
+    For a view from `topo_view`, the route DAG of its base graph is converted once (again only if nodes or edges
+    have been added to or removed from the base graph) and restricted to the view.
+
+    Parameters
+    ----------
+    topo
+
+    Returns
+    -------
+    RouteDAG
+    """
+    base, removed_nodes = topo_view_base_and_removed_nodes(topo)
+    if base is topo:
+        return _route_dag_from_graph(topo)
+    size = (base.number_of_nodes(), base.number_of_edges())
+    cached_size, dag = _BASE_ROUTE_DAGS.get(base, (None, None))
+    if cached_size != size:
+        dag = _route_dag_from_graph(base)
+        _BASE_ROUTE_DAGS[base] = (size, dag)
+    return route_dag_remove_nodes(dag, removed_nodes)
+
+
+def _route_dag_from_graph(topo: nx.DiGraph) -> RouteDAG:
+    waypoints = tuple(nx.topological_sort(topo))
+    index = {waypoint: i for i, waypoint in enumerate(waypoints)}
+    edges = np.array([(index[source], index[target]) for source, target in topo.edges], dtype=np.int32).reshape(-1, 2)
+    return _route_dag_from_edges(waypoints=waypoints, index=index, sources=edges[:, 0], targets=edges[:, 1])
+
+
+def _route_dag_from_edges(waypoints: Tuple[Waypoint, ...], index: Dict[Waypoint, int], sources: np.ndarray, targets: np.ndarray) -> RouteDAG:
+    nb_nodes = len(waypoints)
+    assert np.all(sources < targets), "waypoints must be in topological order"
+    by_source = np.lexsort((targets, sources))
+    by_target = np.lexsort((sources, targets))
+    return RouteDAG(
+        waypoints=waypoints,
+        index=index,
+        edge_sources=sources[by_source],
+        edge_targets=targets[by_source],
+        successor_offsets=_csr_offsets(sources, nb_nodes),
+        predecessor_offsets=_csr_offsets(targets, nb_nodes),
+        predecessor_indices=sources[by_target],
+        mask=np.ones(nb_nodes, dtype=bool),
+    )
+
+
+def _csr_offsets(rows: np.ndarray, nb_nodes: int) -> np.ndarray:
+    offsets = np.zeros(nb_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=nb_nodes), out=offsets[1:])
+    return offsets
+
+
+def route_dag_to_topo(dag: RouteDAG) -> nx.DiGraph:
+    """Convert the nodes and edges of a `RouteDAG` (without removed nodes)
+    into an `nx.DiGraph`, e.g. for plotting."""
+    topo = nx.DiGraph()
+    topo.add_nodes_from(route_dag_nodes(dag))
+    topo.add_edges_from(route_dag_edges(dag))
+    return topo
+
+
+def route_dag_remove_nodes(dag: RouteDAG, waypoints: Iterable[Waypoint]) -> RouteDAG:
+    """Restriction of `dag` without `waypoints`; `dag` is not modified.
+
+    Waypoints not in `dag` are ignored as in `nx.DiGraph.remove_nodes_from`.
+    """
+    mask = dag.mask.copy()
+    mask[[dag.index[waypoint] for waypoint in waypoints if waypoint in dag.index]] = False
+    return dag._replace(mask=mask)
+
+
+def route_dag_has_node(dag: RouteDAG, waypoint: Waypoint) -> bool:
+    i = dag.index.get(waypoint)
+    return i is not None and bool(dag.mask[i])
+
+
+def route_dag_nodes(dag: RouteDAG) -> List[Waypoint]:
+    """Nodes in topological order."""
+    return [dag.waypoints[i] for i in np.flatnonzero(dag.mask)]
+
+
+def _alive_edges(dag: RouteDAG) -> np.ndarray:
+    return dag.mask[dag.edge_sources] & dag.mask[dag.edge_targets]
+
+
+def route_dag_edges(dag: RouteDAG) -> List[RouteDagEdge]:
+    alive = _alive_edges(dag)
+    return [(dag.waypoints[source], dag.waypoints[target]) for source, target in zip(dag.edge_sources[alive], dag.edge_targets[alive])]
+
+
+def route_dag_successors(dag: RouteDAG, waypoint: Waypoint) -> List[Waypoint]:
+    i = dag.index[waypoint]
+    start, end = dag.successor_offsets[i], dag.successor_offsets[i + 1]
+    successors = dag.edge_targets[start:end]
+    return [dag.waypoints[j] for j in successors[dag.mask[successors]]]
+
+
+def route_dag_predecessors(dag: RouteDAG, waypoint: Waypoint) -> List[Waypoint]:
+    i = dag.index[waypoint]
+    start, end = dag.predecessor_offsets[i], dag.predecessor_offsets[i + 1]
+    predecessors = dag.predecessor_indices[start:end]
+    return [dag.waypoints[j] for j in predecessors[dag.mask[predecessors]]]
+
+
+def route_dag_in_degrees(dag: RouteDAG) -> np.ndarray:
+    """In-degree of every node index (0 for removed nodes)."""
+    return np.bincount(dag.edge_targets[_alive_edges(dag)], minlength=len(dag.waypoints))
+
+
+def route_dag_out_degrees(dag: RouteDAG) -> np.ndarray:
+    """Out-degree of every node index (0 for removed nodes)."""
+    return np.bincount(dag.edge_sources[_alive_edges(dag)], minlength=len(dag.waypoints))
+
+
+def route_dag_sources(dag: RouteDAG) -> List[Waypoint]:
+    """Nodes without incoming edges, see `get_sources_for_topo`."""
+    return [dag.waypoints[i] for i in np.flatnonzero(dag.mask & (route_dag_in_degrees(dag) == 0))]
+
+
+def route_dag_sinks(dag: RouteDAG) -> List[Waypoint]:
+    """Nodes without outgoing edges, see `get_sinks_for_topo`."""
+    return [dag.waypoints[i] for i in np.flatnonzero(dag.mask & (route_dag_out_degrees(dag) == 0))]
+
+
+def route_dag_reachable_given_must_be_visited(dag: RouteDAG, must_be_visited: Iterable[Waypoint]) -> Set[Waypoint]:
+    """Determines which nodes can still be visited on a source-sink path
+    through all waypoints of `must_be_visited`: the nodes that are descendants
+    or ancestors of every waypoint in `must_be_visited`.
+
+    If the waypoints of `must_be_visited` lie on one path (e.g. the frozen part of a train run),
+    this takes a single forward and a single backward sweep:
+    with `w_1 < ... < w_k` in topological order, a node `v` is reachable iff `w_i <= v <= w_{i+1}` for some `i`
+    (with `w_0` and `w_{k+1}` below and above everything), i.e. iff the first `w_j` above `v` follows the last `w_i` below `v`.
+    Otherwise, the descendants and ancestors of every waypoint are intersected.
+
+    Parameters
+    ----------
+    dag
+    must_be_visited
+        the waypoints that must be visited, must be nodes of `dag`
+
+    Returns
+    -------
+    Set[Waypoint]
+    """
+    must_be_visited_indices = sorted({dag.index[waypoint] for waypoint in must_be_visited})
+    assert all(dag.mask[i] for i in must_be_visited_indices), f"must_be_visited={must_be_visited} not in {route_dag_nodes(dag)}"
+    nb_nodes = len(dag.waypoints)
+    nb_must_be_visited = len(must_be_visited_indices)
+    mask = dag.mask.tolist()
+
+    # last_below[v]: largest i with w_i <= v (0 if none); first_above[v]: smallest j with v <= w_j (k+1 if none)
+    last_below = [0] * nb_nodes
+    first_above = [nb_must_be_visited + 1] * nb_nodes
+    for i, w in enumerate(must_be_visited_indices, start=1):
+        last_below[w] = i
+        first_above[w] = i
+    # largest i with w_i < v (strictly), to check that the waypoints lie on one path
+    last_strictly_below = [0] * nb_nodes
+
+    alive = dag.mask[dag.edge_sources] & dag.mask[dag.edge_targets]
+    sources, targets = dag.edge_sources[alive], dag.edge_targets[alive]
+    by_target = np.argsort(targets, kind="stable")
+    for source, target in zip(sources[by_target].tolist(), targets[by_target].tolist()):
+        if last_below[source] > last_strictly_below[target]:
+            last_strictly_below[target] = last_below[source]
+            last_below[target] = max(last_below[target], last_below[source])
+    for source, target in zip(sources[::-1].tolist(), targets[::-1].tolist()):
+        if first_above[target] < first_above[source]:
+            first_above[source] = first_above[target]
+
+    if all(last_strictly_below[w] >= i - 1 for i, w in enumerate(must_be_visited_indices, start=1)):
+        return {dag.waypoints[v] for v in range(nb_nodes) if mask[v] and first_above[v] <= last_below[v] + 1}
+
+    # not on one path
+    reachable = set(np.flatnonzero(dag.mask).tolist())
+    for w in must_be_visited_indices:
+        reachable.intersection_update(_closure(dag, w, forward=True) | _closure(dag, w, forward=False))
+    return {dag.waypoints[v] for v in reachable}
+
+
+def _closure(dag: RouteDAG, start: int, forward: bool) -> Set[int]:
+    """Descendants (forward) or ancestors (backward) of `start`, including
+    `start`."""
+    offsets, neighbours = (dag.successor_offsets, dag.edge_targets) if forward else (dag.predecessor_offsets, dag.predecessor_indices)
+    closure = {start}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        start, end = offsets[node], offsets[node + 1]
+        for neighbour in neighbours[start:end].tolist():
+            if dag.mask[neighbour] and neighbour not in closure:
+                closure.add(neighbour)
+                stack.append(neighbour)
+    return closure
@@ -1,4 +1,5 @@
 import os
+import zlib
 from typing import Dict
 from typing import List
 from typing import NamedTuple
@@ -10,6 +11,7 @@ from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
 from rsp.global_data_configuration import EXPERIMENT_INFRA_SUBDIRECTORY_NAME
 from rsp.global_data_configuration import EXPERIMENT_SCHEDULE_SUBDIRECTORY_NAME
+from rsp.scheduling.asp.asp_helper import IncumbentTraceEntry
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParameters
@@ -27,12 +29,51 @@ SchedulingExperimentResult = NamedTuple(
         ("nb_conflicts", int),
         ("route_dag_constraints", Optional[RouteDAGConstraintsDict]),
         ("solver_statistics", Dict),
+        # `CompressedAnswerSet` in results pickled with `PersistenceProfile.slim`, see `get_answer_set`
         ("solver_result", Set[str]),
         ("solver_configuration", Dict),
         ("solver_seed", int),
+        # `None` in results pickled with `PersistenceProfile.slim`, see `experiment_results_solver_program`
         ("solver_program", Optional[List[str]]),
+        # seconds to build the ASP program in Python
+        ("build_program_time", Optional[float]),
+        # seconds for parsing and grounding the ASP program
+        ("grounding_time", Optional[float]),
+        # number of statements (mostly facts) in the ASP program
+        ("nb_facts", Optional[int]),
+        # number of characters of the ASP program text, `None` if the text has not been built (`PersistenceProfile.slim`)
+        ("program_size", Optional[int]),
+        # new incumbents found by the solver over time
+        ("incumbent_trace", Optional[List[IncumbentTraceEntry]]),
     ],
 )
+# results pickled before the last fields were introduced have `None` for them
+SchedulingExperimentResult.__new__.__defaults__ = (None, None, None, None, None)
+
+# answer set as pickled with `PersistenceProfile.slim`: the sorted atoms, one per line, zlib-compressed
+CompressedAnswerSet = NamedTuple("CompressedAnswerSet", [("data", bytes)])
+
+
+def compress_answer_set(answer_set: Set[str]) -> CompressedAnswerSet:
+    return CompressedAnswerSet(data=zlib.compress("\n".join(sorted(answer_set)).encode()))
+
+
+def get_answer_set(result: SchedulingExperimentResult) -> Optional[Set[str]]:
+    """Answer set of the result, decompressed if it has been pickled with
+    `PersistenceProfile.slim`."""
+    if isinstance(result.solver_result, CompressedAnswerSet):
+        text = zlib.decompress(result.solver_result.data).decode()
+        return set(text.split("\n")) if len(text) > 0 else set()
+    return result.solver_result
+
+
+def slim_scheduling_experiment_result(result: SchedulingExperimentResult) -> SchedulingExperimentResult:
+    """Result as pickled with `PersistenceProfile.slim`: answer set compressed,
+    ASP program dropped."""
+    if result.solver_result is not None and not isinstance(result.solver_result, CompressedAnswerSet):
+        result = result._replace(solver_result=compress_answer_set(result.solver_result))
+    return result._replace(solver_program=None)
+
 
 Schedule = NamedTuple("Schedule", [("schedule_problem_description", ScheduleProblemDescription), ("schedule_experiment_result", SchedulingExperimentResult)])
 
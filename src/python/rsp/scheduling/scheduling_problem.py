@@ -1,10 +1,15 @@
 """Route DAG data structures and utils."""
+import itertools
 import pprint
 from enum import Enum
+from typing import Callable
 from typing import Dict
+from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import NamedTuple
+from typing import Optional
+from typing import Set
 from typing import Tuple
 
 import networkx as nx
@@ -67,6 +72,48 @@ def schedule_problem_description_equals(s1: ScheduleProblemDescription, s2: Sche
     return True
 
 
+def schedule_problem_description_is_restriction(restricted: ScheduleProblemDescription, base: ScheduleProblemDescription) -> bool:  # noqa: C901
+    """Tests whether every solution of `restricted` is a solution of `base`:
+    same agents, minimum travel times, route section penalties and lateness
+    weight, sub-DAGs with sources and sinks from `base` and time windows
+    within `base` windows.
+
+    Parameters
+    ----------
+    restricted
+    base
+
+    Returns
+    -------
+    bool
+    """
+    if restricted.topo_dict.keys() != base.topo_dict.keys():
+        return False
+    if restricted.minimum_travel_time_dict != base.minimum_travel_time_dict or restricted.weight_lateness_seconds != base.weight_lateness_seconds:
+        return False
+    for agent_id, restricted_topo in restricted.topo_dict.items():
+        base_topo = base.topo_dict[agent_id]
+        if not set(restricted_topo.edges).issubset(base_topo.edges) or not set(restricted_topo.nodes).issubset(base_topo.nodes):
+            return False
+        if not set(get_sources_for_topo(restricted_topo)).issubset(get_sources_for_topo(base_topo)):
+            return False
+        if not set(get_sinks_for_topo(restricted_topo)).issubset(get_sinks_for_topo(base_topo)):
+            return False
+        base_penalties = base.route_section_penalties[agent_id]
+        restricted_penalties = restricted.route_section_penalties[agent_id]
+        for edge in restricted_topo.edges:
+            if base_penalties.get(edge, 0) != restricted_penalties.get(edge, 0):
+                return False
+        restricted_constraints = restricted.route_dag_constraints_dict[agent_id]
+        base_constraints = base.route_dag_constraints_dict[agent_id]
+        for waypoint in restricted_topo.nodes:
+            if restricted_constraints.earliest[waypoint] < base_constraints.earliest.get(waypoint, np.inf):
+                return False
+            if restricted_constraints.latest[waypoint] > base_constraints.latest.get(waypoint, -np.inf):
+                return False
+    return True
+
+
 def route_dag_constraints_dict_from_list_of_train_run_waypoint(l: List[TrainrunWaypoint]) -> Dict[TrainrunWaypoint, int]:
     """Generate dictionary of scheduled time at waypoint.
 
@@ -80,26 +127,81 @@ def route_dag_constraints_dict_from_list_of_train_run_waypoint(l: List[TrainrunW
     return {trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in l}
 
 
-def get_paths_in_route_dag(topo: nx.DiGraph) -> List[List[Waypoint]]:
+def get_paths_in_route_dag(topo: nx.DiGraph, number_of_paths: Optional[int] = None) -> List[List[Waypoint]]:
     """Get the paths of all source nodes (no incoming edges) to all sink nodes
     (no outgoing edges).
 
     Parameters
     ----------
     topo: DiGraph
+    number_of_paths
+        only the first paths in the order of `iterate_paths_in_route_dag`; all paths if `None`
 
     Returns
     -------
     List[List[Waypoint]]
     """
-    sources = get_sources_for_topo(topo)
-    sinks = get_sinks_for_topo(topo)
-    all_paths = []
-    for source in sources:
-        for sink in sinks:
-            source_sink_paths = list(nx.all_simple_paths(topo, source, sink))
-            all_paths += source_sink_paths
-    return all_paths
+    return list(itertools.islice(iterate_paths_in_route_dag(topo), number_of_paths))
+
+
+def iterate_paths_in_route_dag(topo: nx.DiGraph) -> Iterator[List[Waypoint]]:
+    """Generate the source-sink paths lazily, in the order of
+    `nx.all_simple_paths` per source and sink.
+
+    The depth-first search only enters nodes from which the sink can be reached, so the next path is found
+    in time linear in the size of the route DAG, regardless of the number of paths.
+    """
+    reaching_sinks = {sink: nx.ancestors(topo, sink) for sink in get_sinks_for_topo(topo)}
+    for source in get_sources_for_topo(topo):
+        for sink, reaching_sink in reaching_sinks.items():
+            if source not in reaching_sink:
+                continue
+            path = [source]
+            stack = [iter(topo.successors(source))]
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    stack.pop()
+                    path.pop()
+                elif child == sink:
+                    yield path + [sink]
+                elif child in reaching_sink:
+                    path.append(child)
+                    stack.append(iter(topo.successors(child)))
+
+
+def has_path_in_route_dag(topo: nx.DiGraph) -> bool:
+    """Is there a source-sink path? Single nodes without edges are no paths
+    (same as for `get_paths_in_route_dag`)."""
+    return topo.number_of_edges() > 0
+
+
+def _count_paths_from_sources(order: List[Waypoint], predecessors: Callable[[Waypoint], Iterator[Waypoint]]) -> Dict[Waypoint, int]:
+    """Number of paths from any source to every node, in `order` along
+    `predecessors`; Python integers do not overflow."""
+    count = {}
+    for waypoint in order:
+        count[waypoint] = sum(count[predecessor] for predecessor in predecessors(waypoint)) or 1
+    return count
+
+
+def get_number_of_paths_in_route_dag(topo: nx.DiGraph) -> int:
+    """Number of source-sink paths, the same as
+    `len(get_paths_in_route_dag(topo))`, by dynamic programming in time linear
+    in the size of the route DAG."""
+    count = _count_paths_from_sources(list(nx.topological_sort(topo)), topo.predecessors)
+    return sum(count[sink] for sink in get_sinks_for_topo(topo) if topo.in_degree(sink) > 0)
+
+
+def get_waypoints_on_all_paths_in_route_dag(topo: nx.DiGraph) -> Set[Waypoint]:
+    """Waypoints visited by every source-sink path: the number of paths
+    through a waypoint (paths from sources times paths to sinks) equals the
+    number of paths."""
+    order = list(nx.topological_sort(topo))
+    from_sources = _count_paths_from_sources(order, topo.predecessors)
+    to_sinks = _count_paths_from_sources(order[::-1], topo.successors)
+    number_of_paths = get_number_of_paths_in_route_dag(topo)
+    return {waypoint for waypoint in order if from_sources[waypoint] * to_sinks[waypoint] == number_of_paths and topo.degree(waypoint) > 0}
 
 
 def get_sinks_for_topo(topo: nx.DiGraph) -> Iterator[Waypoint]:
@@ -112,6 +214,96 @@ def get_sources_for_topo(topo: nx.DiGraph) -> Iterator[Waypoint]:
     return sources
 
 
+class _HiddenNodes:
+    """Node filter of a topology view: hides the nodes in `hidden`."""
+
+    def __init__(self, hidden: Set[Waypoint]):
+        self.hidden = hidden
+
+    def __call__(self, waypoint: Waypoint) -> bool:
+        return waypoint not in self.hidden
+
+
+class TopoView(nx.DiGraph):
+    """Read-only view of a base graph without some of its nodes, see
+    `topo_view`.
+
+    A view is pickled (and deep-copied) as its base graph and the removed nodes: the filtered adjacency of
+    `nx.subgraph_view` holds local functions, which cannot be pickled.
+    Graphs networkx creates from a view (e.g. by `copy`) are plain graphs of this class.
+    """
+
+    # base graph if this is a view, `None` for plain graphs
+    _base: Optional[nx.DiGraph] = None
+
+    def __reduce__(self):
+        if self._base is None:
+            return TopoView, (), self.__dict__
+        return TopoView, (), {"_base": self._base, "_hidden": self._NODE_OK.hidden}
+
+    def __setstate__(self, state: dict):
+        if state.get("_base") is None:
+            self.__dict__.update(state)
+            return
+        self.__dict__.update(nx.subgraph_view(state["_base"], filter_node=_HiddenNodes(state["_hidden"])).__dict__)
+        self._base = state["_base"]
+
+
+def _topo_view_of_base(base: nx.DiGraph, hidden: Set[Waypoint]) -> TopoView:
+    view = TopoView()
+    view.__setstate__({"_base": base, "_hidden": hidden})
+    return view
+
+
+def _is_topo_view(topo: nx.DiGraph) -> bool:
+    return isinstance(topo, TopoView) and topo._base is not None
+
+
+def _topo_view_base(topo: nx.DiGraph) -> nx.DiGraph:
+    """Base graph of a view from `topo_view`, the graph itself otherwise."""
+    return topo._base if _is_topo_view(topo) else topo
+
+
+def topo_view_base_and_removed_nodes(topo: nx.DiGraph) -> Tuple[nx.DiGraph, Set[Waypoint]]:
+    """Base graph and removed nodes of a view from `topo_view`, the graph
+    itself and no nodes otherwise."""
+    if _is_topo_view(topo):
+        return topo._base, topo._NODE_OK.hidden
+    return topo, set()
+
+
+def topo_view(topo: nx.DiGraph) -> TopoView:
+    """Copy-on-write restriction of `topo`.
+
+    The view is read-only and shares the nodes and edges of the underlying base graph,
+    it only holds the set of nodes removed by `remove_nodes_from_topo`.
+    Neither the base graph nor other views of it are affected by removing nodes from the view.
+    A view of a view is a view of the same base graph with a copy of the removed nodes.
+    The base graph must not be modified as long as views of it are in use.
+
+    Parameters
+    ----------
+    topo
+        a graph or a view from `topo_view`
+
+    Returns
+    -------
+    TopoView
+    """
+    if _is_topo_view(topo):
+        return _topo_view_of_base(topo._base, set(topo._NODE_OK.hidden))
+    return _topo_view_of_base(topo, set())
+
+
+def remove_nodes_from_topo(topo_: nx.DiGraph, waypoints: Iterable[Waypoint]):
+    """Same as `topo_.remove_nodes_from(waypoints)`, for graphs and for views
+    from `topo_view`."""
+    if _is_topo_view(topo_):
+        topo_._NODE_OK.hidden.update(set(waypoints))
+    else:
+        topo_.remove_nodes_from(waypoints)
+
+
 def path_stats(nb_paths: List[int]) -> str:
     return (
         f"min={min(nb_paths)}, "
@@ -127,6 +319,11 @@ def topo_from_agent_paths(agent_paths: AgentPaths) -> nx.DiGraph:
     """Extract  the agent's topology. Skip agent paths that make the graph
     acyclic. Every single path is acyclic by construction.
 
+    The paths are added one after the other without copying the graph:
+    a topological order of the accumulated graph is maintained online (Pearce-Kelly),
+    so that only the edges of a path that go backwards in this order need a (local) cycle check.
+    Skipped paths leave neither nodes nor edges in the graph.
+
     Parameters
     ----------
     agent_paths: AgentPaths
@@ -138,36 +335,89 @@ def topo_from_agent_paths(agent_paths: AgentPaths) -> nx.DiGraph:
     """
 
     topo = nx.DiGraph()
+    order: Dict[Waypoint, int] = {}
     skip_count = 0
     for index, path in enumerate(agent_paths):
-        topo_path = nx.DiGraph()
-
-        # add edges only to a copy
-        topo_copy = topo.copy()
-        for wp1, wp2 in zip(path, path[1:]):
-            topo_copy.add_edge(wp1, wp2)
-            topo_path.add_edge(wp1, wp2)
-
         # the path must have no cycles
-        topo_path_cycles = list(nx.simple_cycles(topo_path))
-        assert len(topo_path_cycles) == 0, f"cycle in shortest path {index}: {topo_path_cycles}"
+        assert len(set(path)) == len(path), f"cycle in shortest path {index}: {path}"
 
-        # if the copy has no cycles, take the copy.
-        cycles = list(nx.simple_cycles(topo_copy))
-        if len(cycles) == 0:
-            topo = topo_copy
+        # if adding the path gives no cycles, add it.
+        if _update_topological_order_for_path(topo=topo, order=order, path=path):
+            topo.add_edges_from(zip(path, path[1:]))
         else:
             skip_count += 1
     if skip_count > 0:
         rsp_logger.info(f"skipped {skip_count}  paths of {len(agent_paths)}")
 
-    cycles = list(nx.simple_cycles(topo))
-
-    assert len(cycles) == 0, f"cycle in re-combination of shortest paths, {cycles}"
-    assert len(get_paths_in_route_dag(topo)) > 0, "no path after removing loopy paths"
+    assert has_path_in_route_dag(topo), "no path after removing loopy paths"
     return topo
 
 
+def _update_topological_order_for_path(topo: nx.DiGraph, order: Dict[Waypoint, int], path: List[Waypoint]) -> bool:  # noqa: C901
+    """Update the topological order `order` of `topo` for the edges of `path`
+    (`topo` is not modified).
+
+    Returns `False` and leaves `order` unchanged if the edges of `path` would close a cycle in `topo`.
+    """
+    # edges of the path not yet in `topo`
+    pending_successors: Dict[Waypoint, List[Waypoint]] = {}
+    pending_predecessors: Dict[Waypoint, List[Waypoint]] = {}
+    # undo log: previous position of every node re-ordered and the nodes new in `order`
+    previous_order: Dict[Waypoint, int] = {}
+    new_nodes: List[Waypoint] = []
+
+    def successors(node: Waypoint) -> Iterator[Waypoint]:
+        if node in topo:
+            yield from topo.successors(node)
+        yield from pending_successors.get(node, [])
+
+    def predecessors(node: Waypoint) -> Iterator[Waypoint]:
+        if node in topo:
+            yield from topo.predecessors(node)
+        yield from pending_predecessors.get(node, [])
+
+    for wp1, wp2 in zip(path, path[1:]):
+        for waypoint in (wp1, wp2):
+            if waypoint not in order:
+                order[waypoint] = len(order)
+                new_nodes.append(waypoint)
+        if topo.has_edge(wp1, wp2):
+            continue
+        lower, upper = order[wp2], order[wp1]
+        if lower < upper:
+            # the edge goes backwards in the current order: the nodes in between have to be re-ordered,
+            # reaching `wp1` from `wp2` means a cycle
+            forward = {wp2}
+            stack = [wp2]
+            while stack:
+                for successor in successors(stack.pop()):
+                    if successor == wp1:
+                        for waypoint, position in previous_order.items():
+                            order[waypoint] = position
+                        for waypoint in new_nodes:
+                            del order[waypoint]
+                        return False
+                    if successor not in forward and order[successor] < upper:
+                        forward.add(successor)
+                        stack.append(successor)
+            backward = {wp1}
+            stack = [wp1]
+            while stack:
+                for predecessor in predecessors(stack.pop()):
+                    if predecessor not in backward and order[predecessor] > lower:
+                        backward.add(predecessor)
+                        stack.append(predecessor)
+            # the ancestors of `wp1` go before the descendants of `wp2`, re-using their positions
+            reordered = sorted(backward, key=order.__getitem__) + sorted(forward, key=order.__getitem__)
+            positions = sorted(order[waypoint] for waypoint in reordered)
+            for waypoint, position in zip(reordered, positions):
+                previous_order.setdefault(waypoint, order[waypoint])
+                order[waypoint] = position
+        pending_successors.setdefault(wp1, []).append(wp2)
+        pending_predecessors.setdefault(wp2, []).append(wp1)
+    return True
+
+
 def _get_topology_from_agents_path_dict(agents_paths_dict: AgentsPathsDict) -> TopoDict:
     """get topology from agent paths.
 
@@ -16,6 +16,8 @@ from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import Schedu
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import SpeedData
 from rsp.step_01_agenda_expansion.global_constants import get_defaults
 from rsp.step_01_agenda_expansion.global_constants import GlobalConstants
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 
 
 def span_n_grid(collected_parameters: List, open_dimensions: List) -> list:
@@ -124,5 +126,9 @@ def create_experiment_agenda_from_infrastructure_and_schedule_ranges(
                 grid_id += 1
             infra_id_schedule_id += 1
     return ExperimentAgenda(
-        experiment_name=experiment_name, global_constants=get_defaults() if global_constants is None else global_constants, experiments=experiments
+        experiment_name=experiment_name,
+        global_constants=get_defaults(verification_level=VerificationLevel.fast, persistence_profile=PersistenceProfile.slim)
+        if global_constants is None
+        else global_constants,
+        experiments=experiments,
     )
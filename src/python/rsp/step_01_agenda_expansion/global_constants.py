@@ -1,10 +1,35 @@
+from enum import Enum
 from typing import List
 from typing import NamedTuple
+from typing import Optional
 
 from frozenlist import FrozenList
 
 from rsp.scheduling.asp.asp_data_types import ASPHeuristics
 
+
+class VerificationLevel(Enum):
+    """How thoroughly solutions, route DAG constraints and experiment results
+    are verified."""
+
+    # no verification
+    off = "off"
+    # same pass/fail answer as `full`, checked in bulk; a failure is re-checked with `full` for the detailed message
+    fast = "fast"
+    # exhaustive checks, for regression tests
+    full = "full"
+
+
+class PersistenceProfile(Enum):
+    """What of the solver results is pickled with the experiment results."""
+
+    # everything, for debugging
+    full = "full"
+    # trainruns, route DAG constraints and statistics; the answer sets are compressed and the ASP programs dropped
+    # (they are re-generated on demand, see `experiment_results_solver_program`)
+    slim = "slim"
+
+
 GlobalConstants = NamedTuple(
     "GlobalConstants",
     [
@@ -16,6 +41,16 @@ GlobalConstants = NamedTuple(
         ("DELAY_MODEL_RESOLUTION", int),
         ("DL_PROPAGATE_PARTIAL", bool),
         ("NB_RANDOM", int),
+        # ground online_unrestricted once and solve the restricted scopes on the same grounding
+        ("INCREMENTAL_RESCHEDULING", bool),
+        # compute shared/4 in Python instead of letting the grounder join all pairs of edges
+        ("PRECOMPUTE_SHARED", bool),
+        # anytime re-scheduling: interrupt the solver after this many seconds and take the best model found (None: solve to optimality)
+        ("RESCHEDULE_DEADLINE", Optional[float]),
+        # verification of solutions, route DAG constraints and experiment results
+        ("VERIFICATION_LEVEL", VerificationLevel),
+        # what of the solver results is pickled with the experiment results
+        ("PERSISTENCE_PROFILE", PersistenceProfile),
     ],
 )
 
@@ -32,6 +67,11 @@ def get_defaults(
     delay_model_resolution=1,
     dl_propagate_partial=True,
     nb_random=5,
+    incremental_rescheduling=False,
+    precompute_shared=False,
+    reschedule_deadline=None,
+    verification_level=VerificationLevel.full,
+    persistence_profile=PersistenceProfile.full,
 ):
     return GlobalConstants(
         RELEASE_TIME=release_time,
@@ -42,9 +82,18 @@ def get_defaults(
         DELAY_MODEL_RESOLUTION=delay_model_resolution,
         DL_PROPAGATE_PARTIAL=dl_propagate_partial,
         NB_RANDOM=nb_random,
+        INCREMENTAL_RESCHEDULING=incremental_rescheduling,
+        PRECOMPUTE_SHARED=precompute_shared,
+        RESCHEDULE_DEADLINE=reschedule_deadline,
+        VERIFICATION_LEVEL=verification_level,
+        PERSISTENCE_PROFILE=persistence_profile,
     )
 
 
+# agendas pickled before the last fields were introduced get their defaults
+GlobalConstants.__new__.__defaults__ = tuple(get_defaults())[-5:]
+
+
 class GlobalConstantsCls(object):
     _instance = None
 
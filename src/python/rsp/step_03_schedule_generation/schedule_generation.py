@@ -6,6 +6,7 @@ from rsp.scheduling.asp_wrapper import asp_schedule_wrapper
 from rsp.scheduling.propagate import propagate
 from rsp.scheduling.schedule import save_schedule
 from rsp.scheduling.schedule import Schedule
+from rsp.scheduling.scheduling_problem import get_number_of_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
 from rsp.scheduling.scheduling_problem import get_sources_for_topo
@@ -42,8 +43,7 @@ def create_schedule_problem_description_from_instructure(
     topo_dict = {agent_id: topo.copy() for agent_id, topo in infrastructure.topo_dict.items()}
     # reduce topo_dict to number_of_shortest_paths_per_agent_schedule
     for _, topo in topo_dict.items():
-        paths = get_paths_in_route_dag(topo)
-        paths = paths[:number_of_shortest_paths_per_agent_schedule]
+        paths = get_paths_in_route_dag(topo, number_of_paths=number_of_shortest_paths_per_agent_schedule)
         remaining_vertices = {vertex for path in paths for vertex in path}
         topo.remove_nodes_from(set(topo.nodes).difference(remaining_vertices))
 
@@ -84,8 +84,8 @@ def gen_schedule(schedule_parameters: ScheduleParameters, infrastructure: Infras
     )
     if debug:
         for agent_id, topo in schedule_problem.topo_dict.items():
-            rsp_logger.info(f"    {agent_id} has {len(get_paths_in_route_dag(topo))} paths in scheduling")
-            rsp_logger.info(f"    {agent_id} has {len(get_paths_in_route_dag(infrastructure.topo_dict[agent_id]))} paths in infrastructure")
+            rsp_logger.info(f"    {agent_id} has {get_number_of_paths_in_route_dag(topo)} paths in scheduling")
+            rsp_logger.info(f"    {agent_id} has {get_number_of_paths_in_route_dag(infrastructure.topo_dict[agent_id])} paths in infrastructure")
 
     schedule_result = asp_schedule_wrapper(schedule_problem_description=schedule_problem, asp_seed_value=schedule_parameters.asp_seed_value, debug=debug)
     rsp_logger.info(f"done gen_schedule {schedule_parameters}")
@@ -0,0 +1,176 @@
+"""Append-only completion manifest of the experiments in an experiment data
+folder.
+
+`run_experiment_from_to_file` appends one JSON line per finished (or failed) experiment, so resuming an agenda
+only needs to read the manifest instead of unpickling every experiment result. Every line is written with a single
+`os.write` on a file opened in append mode, so lines of concurrent workers do not interleave.
+The last line of an experiment wins.
+
+Run this module to rebuild the manifest of a data folder from the experiment files in it:
+
+    python src/python/rsp/step_05_experiment_run/experiment_manifest.py <experiment data folder>
+"""
+import glob
+import hashlib
+import json
+import os
+import sys
+from enum import Enum
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+
+from rsp.global_data_configuration import BASELINE_DATA_FOLDER
+from rsp.global_data_configuration import EXPERIMENT_DATA_SUBDIRECTORY_NAME
+from rsp.utils.file_utils import check_create_folder
+from rsp.utils.file_utils import get_experiment_id_from_filename
+from rsp.utils.rsp_logger import rsp_logger
+
+MANIFEST_FILE_NAME = "manifest.jsonl"
+
+
+class ExperimentStatus(Enum):
+    # experiment results pickled (and analysis data written)
+    done = "done"
+    # only analysis data written (csv or analysis store), the experiment is run again when resuming
+    csv_only = "csv_only"
+    failed = "failed"
+
+
+ManifestEntry = NamedTuple(
+    "ManifestEntry",
+    [
+        ("experiment_id", int),
+        ("status", ExperimentStatus),
+        # base name of the experiment file in the data folder (pkl, or csv or analysis store partition for `csv_only`), `None` if failed
+        ("file_name", Optional[str]),
+        ("size", Optional[int]),
+        # sha256 of the experiment file
+        ("checksum", Optional[str]),
+        ("start_time", Optional[str]),
+        ("elapsed_time", Optional[float]),
+    ],
+)
+
+
+def _manifest_path(experiment_data_directory: str) -> str:
+    return os.path.join(experiment_data_directory, MANIFEST_FILE_NAME)
+
+
+def exists_manifest(experiment_data_directory: str) -> bool:
+    return os.path.isfile(_manifest_path(experiment_data_directory))
+
+
+def _entry_to_line(entry: ManifestEntry) -> str:
+    return json.dumps(dict(entry._asdict(), status=entry.status.value)) + "\n"
+
+
+def file_checksum(file_name: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as file_in:
+        for chunk in iter(lambda: file_in.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def create_manifest_entry(
+    experiment_id: int, status: ExperimentStatus, file_name: Optional[str] = None, start_time: Optional[str] = None, elapsed_time: Optional[float] = None
+) -> ManifestEntry:
+    """Manifest entry for an experiment file (with its size and
+    checksum)."""
+    return ManifestEntry(
+        experiment_id=experiment_id,
+        status=status,
+        file_name=os.path.basename(file_name) if file_name is not None else None,
+        size=os.path.getsize(file_name) if file_name is not None else None,
+        checksum=file_checksum(file_name) if file_name is not None else None,
+        start_time=start_time,
+        elapsed_time=elapsed_time,
+    )
+
+
+def append_to_manifest(experiment_data_directory: str, entry: ManifestEntry):
+    """Append an entry to the manifest (atomically, workers may append
+    concurrently)."""
+    check_create_folder(experiment_data_directory)
+    fd = os.open(_manifest_path(experiment_data_directory), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, _entry_to_line(entry).encode())
+    finally:
+        os.close(fd)
+
+
+def load_manifest(experiment_data_directory: str) -> Dict[int, ManifestEntry]:
+    """Last manifest entry per experiment id; empty if there is no manifest.
+
+    Lines that cannot be parsed (e.g. truncated by a crash) are skipped.
+    """
+    entries = {}
+    if not exists_manifest(experiment_data_directory):
+        return entries
+    with open(_manifest_path(experiment_data_directory), "r") as file_in:
+        for line_number, line in enumerate(file_in):
+            try:
+                entry = json.loads(line)
+                entry = ManifestEntry(**dict(entry, status=ExperimentStatus(entry["status"])))
+            except (ValueError, TypeError, KeyError) as e:
+                rsp_logger.warning(f"skipping line {line_number} of {_manifest_path(experiment_data_directory)}: {e}")
+                continue
+            entries[entry.experiment_id] = entry
+    return entries
+
+
+def load_done_experiment_ids(experiment_data_directory: str) -> Set[int]:
+    """Experiments whose results have been pickled according to the manifest.
+
+    Without manifest (e.g. a data folder from before the manifest was introduced), the manifest is rebuilt first.
+    """
+    if not exists_manifest(experiment_data_directory) and os.path.isdir(experiment_data_directory):
+        repair_manifest(experiment_data_directory)
+    return {experiment_id for experiment_id, entry in load_manifest(experiment_data_directory).items() if entry.status == ExperimentStatus.done}
+
+
+def repair_manifest(experiment_data_directory: str) -> Dict[int, ManifestEntry]:
+    """Rebuild the manifest from the experiment files in the data folder (the
+    timings of the experiments are lost).
+
+    An experiment with exactly one pkl is `done`, an experiment with csv but without pkl is `csv_only`;
+    experiments with several pkls are left out (and hence run again), as in `load_experiments_results`.
+
+    Parameters
+    ----------
+    experiment_data_directory
+
+    Returns
+    -------
+    Dict[int, ManifestEntry]
+        the new manifest
+    """
+    pkls: Dict[int, list] = {}
+    for file_name in sorted(glob.glob(os.path.join(experiment_data_directory, "experiment_[0-9][0-9][0-9][0-9]_*.pkl"))):
+        pkls.setdefault(get_experiment_id_from_filename(file_name), []).append(file_name)
+    csvs: Dict[int, list] = {}
+    for file_name in sorted(glob.glob(os.path.join(experiment_data_directory, "experiment_[0-9][0-9][0-9][0-9]_*.csv"))):
+        csvs.setdefault(get_experiment_id_from_filename(file_name), []).append(file_name)
+
+    entries = {}
+    for experiment_id in sorted(set(pkls) | set(csvs)):
+        if len(pkls.get(experiment_id, [])) == 1:
+            entries[experiment_id] = create_manifest_entry(experiment_id=experiment_id, status=ExperimentStatus.done, file_name=pkls[experiment_id][0])
+        elif experiment_id not in pkls:
+            entries[experiment_id] = create_manifest_entry(experiment_id=experiment_id, status=ExperimentStatus.csv_only, file_name=csvs[experiment_id][-1])
+        else:
+            rsp_logger.warning(f"experiment {experiment_id} has {len(pkls[experiment_id])} pkls in {experiment_data_directory}, leaving it out")
+
+    # replace the manifest atomically
+    tmp_path = _manifest_path(experiment_data_directory) + ".tmp"
+    with open(tmp_path, "w") as file_out:
+        file_out.writelines(_entry_to_line(entry) for entry in entries.values())
+    os.replace(tmp_path, _manifest_path(experiment_data_directory))
+    rsp_logger.info(f"rebuilt manifest of {experiment_data_directory} with {len(entries)} experiments")
+    return entries
+
+
+if __name__ == "__main__":
+    repair_manifest(experiment_data_directory=sys.argv[1] if len(sys.argv) > 1 else f"{BASELINE_DATA_FOLDER}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}")
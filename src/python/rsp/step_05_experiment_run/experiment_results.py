@@ -1,6 +1,7 @@
 """`ExperimentResults` are raw data structures from experiments, without post-
 processing for analysis."""
 import glob
+from typing import List
 from typing import NamedTuple
 from typing import Optional
 from typing import Set
@@ -8,10 +9,13 @@ from typing import Set
 from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
 from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.scheduling.asp_wrapper import asp_program_dump
 from rsp.scheduling.schedule import SchedulingExperimentResult
+from rsp.scheduling.schedule import slim_scheduling_experiment_result
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentParameters
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.utils.pickle_helper import _pickle_load
 
@@ -63,13 +67,52 @@ def load_experiments_results(experiment_data_folder_name: str, experiment_id: in
     return _pickle_load(file_names[0])
 
 
+def slim_experiment_results(experiment_results: ExperimentResults) -> ExperimentResults:
+    """Experiment results as pickled with `PersistenceProfile.slim`: answer
+    sets compressed and ASP programs dropped."""
+    return experiment_results._replace(
+        **{
+            field: slim_scheduling_experiment_result(result)
+            for field, result in experiment_results._asdict().items()
+            if field.startswith("results_") and result is not None
+        }
+    )
+
+
+def experiment_results_solver_program(experiment_results: ExperimentResults, scope: str) -> List[str]:
+    """ASP program of a scope; re-generated from the scope's problem if it has
+    been dropped (`PersistenceProfile.slim`), see `asp_program_dump`.
+
+    Parameters
+    ----------
+    experiment_results
+    scope
+        "schedule" or a re-scheduling scope
+
+    Returns
+    -------
+    List[str]
+    """
+    solver_program = experiment_results._asdict()[f"results_{scope}"].solver_program
+    if solver_program is not None:
+        return solver_program
+    return asp_program_dump(
+        schedule_problem_description=experiment_results._asdict()[f"problem_{scope}"],
+        schedule=None if scope == "schedule" else experiment_results.results_schedule.trainruns_dict,
+    )
+
+
 def plausibility_check_experiment_results(experiment_results: ExperimentResults):
     """Verify the following experiment expectations:
 
     1. a) same waypoint in schedule and re-schedule -> waypoint also in scope perfect re-schedule
        b) same waypoint and time in schedule and re-schedule -> same waypoint and ant time also in re-schedule delta perfect
     2. number of routing alternatives should be decreasing from full to delta
+
+    Skipped if `GLOBAL_CONSTANTS.VERIFICATION_LEVEL` is `off`.
     """
+    if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.off:
+        return
     route_dag_constraints_offline_delta = experiment_results.results_offline_delta.route_dag_constraints
 
     # 1.
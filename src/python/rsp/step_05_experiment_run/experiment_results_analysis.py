@@ -19,6 +19,7 @@ from flatland.envs.rail_trainrun_data_structures import Waypoint
 from numpy import inf
 from pandas import DataFrame
 
+from rsp.scheduling.asp.asp_helper import IncumbentTraceEntry
 from rsp.scheduling.schedule import SchedulingExperimentResult
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentParameters
@@ -79,6 +80,39 @@ def solver_statistics_times_total_without_solve_from_experiment_results(results:
     return results.solver_statistics["summary"]["times"]["total"] - results.solver_statistics["summary"]["times"]["solve"]
 
 
+def solver_statistics_grounded_rules_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return results.solver_statistics["problem"]["lp"]["rules"]
+
+
+def solver_statistics_grounded_atoms_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return results.solver_statistics["problem"]["lp"]["atoms"]
+
+
+def _nan_if_none(value) -> float:
+    # not recorded in results from before the field was introduced
+    return np.nan if value is None else value
+
+
+def build_program_time_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return _nan_if_none(results.build_program_time)
+
+
+def grounding_time_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return _nan_if_none(results.grounding_time)
+
+
+def nb_facts_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return _nan_if_none(results.nb_facts)
+
+
+def program_size_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> float:
+    return _nan_if_none(results.program_size)
+
+
+def incumbent_trace_from_experiment_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> List[IncumbentTraceEntry]:
+    return results.incumbent_trace if results.incumbent_trace is not None else []
+
+
 def trainrun_dict_from_results(results: SchedulingExperimentResult, p: ScheduleProblemDescription) -> TrainrunDict:
     return results.trainruns_dict
 
@@ -260,6 +294,15 @@ experiment_results_analysis_all_scopes_fields = {
     "solver_statistics_times_sat": (float, solver_statistics_times_sat_from_experiment_results),
     "solver_statistics_times_unsat": (float, solver_statistics_times_unsat_from_experiment_results),
     "solver_statistics_times_total_without_solve": (float, solver_statistics_times_total_without_solve_from_experiment_results),
+    "solver_statistics_grounded_rules": (float, solver_statistics_grounded_rules_from_experiment_results),
+    "solver_statistics_grounded_atoms": (float, solver_statistics_grounded_atoms_from_experiment_results),
+    # split of non-solve time into Python preprocessing and grounding
+    "build_program_time": (float, build_program_time_from_experiment_results),
+    "grounding_time": (float, grounding_time_from_experiment_results),
+    "nb_facts": (float, nb_facts_from_experiment_results),
+    "program_size": (float, program_size_from_experiment_results),
+    # solution quality over time, see `plot_incumbent_traces`
+    "incumbent_trace": (List[IncumbentTraceEntry], incumbent_trace_from_experiment_results),
     "solver_statistics_choices": (float, solver_statistics_choices_from_results),
     "solver_statistics_conflicts": (float, solver_statistics_conflicts_from_results),
     "summed_user_accu_propagations": (float, summed_user_accu_propagations_from_results),
@@ -296,6 +339,8 @@ speedup_scopes_ratio_fields = {
     "costs_ratio": "solver_statistics_costs",
     "speed_up_solve_time": "solver_statistics_times_solve",
     "speed_up_non_solve_time": "solver_statistics_times_total_without_solve",
+    "speed_up_build_program_time": "build_program_time",
+    "speed_up_grounding_time": "grounding_time",
     "nb_resource_conflicts_ratio": "nb_resource_conflicts",
     "solver_statistics_conflicts_ratio": "solver_statistics_conflicts",
     "solver_statistics_choices_ratio": "solver_statistics_choices",
@@ -322,7 +367,7 @@ online_random_average_fields = [
         + list(experiment_results_analysis_rescheduling_scopes_fields.keys())
         + list(prediction_scopes_fields.keys())
     )
-    if prefix != "solution" and "_per_" not in prefix and not prefix.startswith("vertex_")
+    if prefix not in ["solution", "incumbent_trace"] and "_per_" not in prefix and not prefix.startswith("vertex_")
 ]
 
 ExperimentResultsAnalysis = NamedTuple(
@@ -357,6 +402,17 @@ ExperimentResultsAnalysis = NamedTuple(
 )
 
 
+def _assert_optimality(condition: bool, msg: str):
+    """Assert a property that holds for optimal solutions only.
+
+    With a re-scheduling deadline, the solver may return a non-optimal incumbent, so the property is only logged as a warning.
+    """
+    if GLOBAL_CONSTANTS.RESCHEDULE_DEADLINE is None:
+        assert condition, msg
+    elif not condition:
+        rsp_logger.warning(f"not optimal with deadline {GLOBAL_CONSTANTS.RESCHEDULE_DEADLINE}: {msg}")
+
+
 def plausibility_check_experiment_results_analysis(experiment_results_analysis: ExperimentResultsAnalysis):
     experiment_id = experiment_results_analysis.experiment_id
 
@@ -377,12 +433,12 @@ def plausibility_check_experiment_results_analysis(experiment_results_analysis:
             assert costs == (costs_from_lateness + costs_from_route_section_penalties), msg
         except AssertionError as e:
             rsp_logger.warn(str(e))
-        assert costs >= experiment_results_analysis.costs_online_unrestricted, msg
+        _assert_optimality(costs >= experiment_results_analysis.costs_online_unrestricted, msg)
         assert costs >= experiment_results_analysis.malfunction_duration, msg
 
     for scope in ["offline_fully_restricted", "offline_delta"]:
         costs = experiment_results_analysis._asdict()[f"costs_{scope}"]
-        assert costs == experiment_results_analysis.costs_online_unrestricted, msg
+        _assert_optimality(costs == experiment_results_analysis.costs_online_unrestricted, msg)
 
     assert experiment_results_analysis.costs_online_unrestricted >= experiment_results_analysis.malfunction_duration, (
         f"costs_online_unrestricted {experiment_results_analysis.costs_online_unrestricted} should be greater than malfunction duration, "
@@ -396,6 +452,10 @@ def convert_list_of_experiment_results_analysis_to_data_frame(l: List[Experiment
     return df
 
 
+# columns read by `filter_experiment_results_analysis_data_frame`
+FILTER_EXPERIMENT_RESULTS_ANALYSIS_COLUMNS = ["solver_statistics_times_total_online_unrestricted"]
+
+
 def filter_experiment_results_analysis_data_frame(
     experiment_data: pd.DataFrame,
     min_time_online_unrestricted: int = 60,
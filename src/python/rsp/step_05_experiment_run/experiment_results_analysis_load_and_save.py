@@ -1,6 +1,9 @@
 import os
+from functools import partial
 from typing import Callable
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
@@ -10,7 +13,13 @@ from pandas import DataFrame
 
 from rsp.global_data_configuration import BASELINE_DATA_FOLDER
 from rsp.global_data_configuration import EXPERIMENT_DATA_SUBDIRECTORY_NAME
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
+from rsp.step_05_experiment_run.experiment_manifest import ExperimentStatus
+from rsp.step_05_experiment_run.experiment_manifest import file_checksum
+from rsp.step_05_experiment_run.experiment_manifest import load_manifest
 from rsp.step_05_experiment_run.experiment_results import ExperimentResults
+from rsp.step_05_experiment_run.experiment_results import slim_experiment_results
 from rsp.step_05_experiment_run.experiment_results_analysis import convert_list_of_experiment_results_analysis_to_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis import expand_experiment_results_for_analysis
 from rsp.step_05_experiment_run.experiment_results_analysis import ExperimentResultsAnalysis
@@ -19,14 +28,21 @@ from rsp.step_05_experiment_run.experiment_results_analysis_online_unrestricted
 )
 from rsp.step_05_experiment_run.experiment_results_analysis_online_unrestricted import expand_experiment_results_online_unrestricted
 from rsp.step_05_experiment_run.experiment_results_analysis_online_unrestricted import ExperimentResultsAnalysisOnlineUnrestricted
+from rsp.step_05_experiment_run.experiment_results_analysis_store import analysis_store_available
+from rsp.step_05_experiment_run.experiment_results_analysis_store import experiment_ids_in_analysis_store
+from rsp.step_05_experiment_run.experiment_results_analysis_store import load_experiment_results_analysis_from_store
+from rsp.step_05_experiment_run.experiment_results_analysis_store import save_experiment_results_analysis_to_store
 from rsp.utils.file_utils import get_experiment_id_from_filename
 from rsp.utils.file_utils import newline_and_flush_stdout_and_stderr
 from rsp.utils.pickle_helper import _pickle_dump
 from rsp.utils.pickle_helper import _pickle_load
+from rsp.utils.pickle_helper import default_pickle_compression
 from rsp.utils.rsp_logger import rsp_logger
 
 
-def save_experiment_results_to_file(experiment_results: ExperimentResults, file_name: str, csv_only: bool = False, online_unrestricted_only: bool = False):
+def save_experiment_results_to_file(
+    experiment_results: ExperimentResults, file_name: str, csv_only: bool = False, online_unrestricted_only: bool = False
+) -> str:
     """Save the data frame with all the result from an experiment into a given
     file.
     Parameters
@@ -37,22 +53,242 @@ def save_experiment_results_to_file(experiment_results: ExperimentResults, file_
         File name containing path and name of file we want to store the experiment results
     csv_only:bool
         write only csv or also pkl?
+        The pkl is written according to `GLOBAL_CONSTANTS.PERSISTENCE_PROFILE`.
     Returns
     -------
+    str
+        the file the data frame has been written to, see `_save_experiment_data`
     """
     if not csv_only:
-        _pickle_dump(obj=experiment_results, file_name=file_name)
+        _pickle_dump(
+            obj=slim_experiment_results(experiment_results) if GLOBAL_CONSTANTS.PERSISTENCE_PROFILE == PersistenceProfile.slim else experiment_results,
+            file_name=file_name,
+            # experiment results are by far the largest pickles
+            compression=default_pickle_compression(),
+        )
     if online_unrestricted_only:
         experiment_data = convert_list_of_experiment_results_analysis_online_unrestricted_to_data_frame(
             [expand_experiment_results_online_unrestricted(experiment_results)]
         )
     else:
         experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_to_data_frame([expand_experiment_results_for_analysis(experiment_results)])
-    experiment_data.to_csv(file_name.replace(".pkl", ".csv"))
+    return _save_experiment_data(experiment_data=experiment_data, file_name=file_name, online_unrestricted_only=online_unrestricted_only)
+
+
+def _save_experiment_data(experiment_data: DataFrame, file_name: str, online_unrestricted_only: bool) -> str:
+    """Write the data frame of an experiment to the analysis store if
+    `pyarrow` is installed, else (or if it does not fit the store) to its csv.
+
+    Returns
+    -------
+    str
+        the partition of the store or the csv written
+    """
+    if analysis_store_available():
+        partition_file_name = save_experiment_results_analysis_to_store(
+            experiment_data=experiment_data,
+            experiment_data_directory=os.path.dirname(file_name),
+            experiment_id=get_experiment_id_from_filename(file_name),
+            online_unrestricted_only=online_unrestricted_only,
+        )
+        if partition_file_name is not None:
+            return partition_file_name
+    csv_file_name = file_name.replace(".pkl", ".csv")
+    experiment_data.to_csv(csv_file_name)
+    return csv_file_name
+
+
+# the expanded results of a pickle can be cached next to it (opt-in), see `_load_and_expand_experiment_results_file`
+ANALYSIS_CACHE_SUFFIX = ".analysis"
+ANALYSIS_ONLINE_UNRESTRICTED_CACHE_SUFFIX = ".analysis_online_unrestricted"
+# expansion workers are recycled after this many files to bound their memory
+MAX_FILES_PER_EXPANSION_WORKER = 20
+
+
+def _analysis_cache_file_name(file_name: str, online_unrestricted_only: bool) -> str:
+    return file_name + (ANALYSIS_ONLINE_UNRESTRICTED_CACHE_SUFFIX if online_unrestricted_only else ANALYSIS_CACHE_SUFFIX)
+
+
+def _analysis_fields(online_unrestricted_only: bool) -> Tuple[str, ...]:
+    return ExperimentResultsAnalysisOnlineUnrestricted._fields if online_unrestricted_only else ExperimentResultsAnalysis._fields
+
+
+def _load_cached_analysis(
+    file_name: str, online_unrestricted_only: bool, checksum: Optional[str] = None
+) -> Optional[Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]:
+    """Cached expansion of the pickle, `None` if there is none or it is
+    outdated.
+
+    The cache is valid if the pickle has the same modification time as when the cache was written or, if not
+    (e.g. the data folder has been copied), the sha256 `checksum` from the manifest, which the cache has been written for;
+    and the analysis data structure has the same fields. The pickle is only hashed if the modification time differs.
+    """
+    cache_file_name = _analysis_cache_file_name(file_name, online_unrestricted_only)
+    if not os.path.isfile(cache_file_name):
+        return None
+    try:
+        mtime_ns, cached_checksum, fields, results_for_analysis = _pickle_load(file_name=cache_file_name)
+    except Exception as e:
+        rsp_logger.warning(f"ignoring analysis cache {cache_file_name} because of {e}")
+        return None
+    if fields != _analysis_fields(online_unrestricted_only):
+        return None
+    if mtime_ns != os.stat(file_name).st_mtime_ns and (checksum is None or cached_checksum != checksum or file_checksum(file_name) != checksum):
+        return None
+    return results_for_analysis
+
+
+def _save_cached_analysis(
+    file_name: str,
+    online_unrestricted_only: bool,
+    results_for_analysis: Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted],
+    checksum: Optional[str] = None,
+):
+    cache_file_name = _analysis_cache_file_name(file_name, online_unrestricted_only)
+    _pickle_dump(
+        obj=(os.stat(file_name).st_mtime_ns, checksum, _analysis_fields(online_unrestricted_only), results_for_analysis), file_name=cache_file_name + ".tmp",
+    )
+    # concurrent notebook sessions must never read a partial cache
+    os.replace(cache_file_name + ".tmp", cache_file_name)
+
+
+def _try_save_cached_analysis(
+    file_name: str,
+    online_unrestricted_only: bool,
+    results_for_analysis: Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted],
+    checksum: Optional[str],
+):
+    try:
+        _save_cached_analysis(file_name, online_unrestricted_only, results_for_analysis, checksum)
+    except Exception as e:
+        # e.g. read-only data folder: the expansion is still good
+        rsp_logger.warning(f"analysis of {file_name} not cached because of {e}")
+
+
+def _load_and_expand_experiment_results_file(
+    file_name_and_checksum: Tuple[str, Optional[str]],
+    re_save_csv_after_expansion: bool,
+    online_unrestricted_only: bool,
+    with_experiment_results: bool,
+    use_cache: bool,
+    write_cache: bool,
+) -> Optional[Tuple[Optional[ExperimentResults], Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]]:
+    """Load and expand a pickle, or take its cached expansion.
+
+    Parameters
+    ----------
+    file_name_and_checksum
+        the pickle and its sha256 from the manifest (`None` if not in the manifest)
+
+    Returns
+    -------
+    Optional[Tuple[Optional[ExperimentResults], Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]]
+        `None` if the file cannot be loaded or expanded; the experiment results are `None` unless `with_experiment_results`
+    """
+    file_name, checksum = file_name_and_checksum
+    try:
+        results_for_analysis = _load_cached_analysis(file_name, online_unrestricted_only, checksum) if use_cache else None
+        file_data: Optional[ExperimentResults] = None
+        if results_for_analysis is None or with_experiment_results:
+            file_data = _pickle_load(file_name=file_name)
+        if results_for_analysis is None:
+            if online_unrestricted_only:
+                results_for_analysis = expand_experiment_results_online_unrestricted(file_data)
+            else:
+                results_for_analysis = expand_experiment_results_for_analysis(file_data)
+            if write_cache:
+                _try_save_cached_analysis(file_name, online_unrestricted_only, results_for_analysis, checksum)
+        if re_save_csv_after_expansion:
+            if online_unrestricted_only:
+                experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_online_unrestricted_to_data_frame([results_for_analysis])
+            else:
+                # ensure it is nonified
+                experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_to_data_frame([results_for_analysis])
+            _save_experiment_data(experiment_data=experiment_data, file_name=file_name, online_unrestricted_only=online_unrestricted_only)
+        return file_data if with_experiment_results else None, results_for_analysis
+    except Exception as e:
+        rsp_logger.warn(f"skipping {file_name} because of {e}")
+        rsp_logger.warn(e, exc_info=True)
+        return None
+
+
+def iterate_expanded_experiment_results_from_data_folder(
+    experiment_data_folder_name: str,
+    experiment_ids: List[int] = None,
+    re_save_csv_after_expansion: bool = False,
+    online_unrestricted_only: bool = False,
+    with_experiment_results: bool = True,
+    use_cache: bool = True,
+    write_cache: bool = False,
+    nb_processes: int = 1,
+) -> Iterator[Tuple[Optional[ExperimentResults], Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]]:
+    """Load and expand the pickled experiment results of a data folder,
+    yielding each as soon as it is expanded (in the order of the files).
+
+    Parameters
+    ----------
+    experiment_data_folder_name: str
+        Folder name of experiment where all experiment files are stored
+    experiment_ids
+        List of experiment ids which should be loaded, if None all experiments in experiment_folder are loaded
+    re_save_csv_after_expansion
+    online_unrestricted_only
+    with_experiment_results
+        if `False`, the raw experiment results are not returned (`None`), so cached expansions need not unpickle them
+        and workers need not send them back
+    use_cache
+        take the expansion cached next to the pickle if up to date
+    write_cache
+        cache the expansion next to the pickle if there is no up to date cache (the data folder must be writable)
+    nb_processes
+        expand in a pool of this many worker processes (recycled after `MAX_FILES_PER_EXPANSION_WORKER` files)
+
+    Returns
+    -------
+    Iterator[Tuple[Optional[ExperimentResults], Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]]
+    """
+    file_names = [
+        os.path.join(experiment_data_folder_name, file)
+        for file in sorted(os.listdir(experiment_data_folder_name))
+        if "agenda" not in file and file.endswith(".pkl")
+        # filter experiments according to defined experiment_ids
+        and (experiment_ids is None or get_experiment_id_from_filename(file) in experiment_ids)
+    ]
+    # the checksums recorded when the pickles were written validate the caches of copied data folders
+    checksums = {entry.file_name: entry.checksum for entry in load_manifest(experiment_data_folder_name).values() if entry.status == ExperimentStatus.done}
+    file_names_and_checksums = [(file_name, checksums.get(os.path.basename(file_name))) for file_name in file_names]
+    load_and_expand = partial(
+        _load_and_expand_experiment_results_file,
+        re_save_csv_after_expansion=re_save_csv_after_expansion,
+        online_unrestricted_only=online_unrestricted_only,
+        with_experiment_results=with_experiment_results,
+        use_cache=use_cache,
+        write_cache=write_cache,
+    )
+    if nb_processes <= 1 or len(file_names) <= 1:
+        results = map(load_and_expand, file_names_and_checksums)
+        for result in tqdm.tqdm(results, total=len(file_names)):
+            if result is not None:
+                yield result
+        return
+    # experiment_run imports this module
+    from rsp.step_05_experiment_run.experiment_run import create_worker_pool
+
+    with create_worker_pool(processes=min(nb_processes, len(file_names)), max_tasks_per_worker=MAX_FILES_PER_EXPANSION_WORKER) as pool:
+        for result in tqdm.tqdm(pool.imap(load_and_expand, file_names_and_checksums), total=len(file_names)):
+            if result is not None:
+                yield result
 
 
 def load_and_expand_experiment_results_from_data_folder(
-    experiment_data_folder_name: str, experiment_ids: List[int] = None, re_save_csv_after_expansion: bool = False, online_unrestricted_only: bool = False,
+    experiment_data_folder_name: str,
+    experiment_ids: List[int] = None,
+    re_save_csv_after_expansion: bool = False,
+    online_unrestricted_only: bool = False,
+    with_experiment_results: bool = True,
+    use_cache: bool = True,
+    write_cache: bool = False,
+    nb_processes: int = 1,
 ) -> Tuple[List[ExperimentResults], List[Union[ExperimentResultsAnalysis, ExperimentResultsAnalysisOnlineUnrestricted]]]:
     """Load results as DataFrame to do further analysis.
     Parameters
@@ -61,6 +297,11 @@ def load_and_expand_experiment_results_from_data_folder(
         Folder name of experiment where all experiment files are stored
     experiment_ids
         List of experiment ids which should be loaded, if None all experiments in experiment_folder are loaded
+    with_experiment_results
+    use_cache
+    write_cache
+    nb_processes
+        see `iterate_expanded_experiment_results_from_data_folder`
     Returns
     -------
     DataFrame containing the loaded experiment results
@@ -69,38 +310,22 @@ def load_and_expand_experiment_results_from_data_folder(
     experiment_results_list_analysis = []
     experiment_results_list = []
 
-    files = os.listdir(experiment_data_folder_name)
     rsp_logger.info(f"loading and expanding experiment results from {experiment_data_folder_name}")
     # nicer printing when tdqm print to stderr and we have logging to stdout shown in to the same console (IDE, separated in files)
     newline_and_flush_stdout_and_stderr()
-    for file in tqdm.tqdm([file for file in files if "agenda" not in file]):
-        file_name = os.path.join(experiment_data_folder_name, file)
-        if not file_name.endswith(".pkl"):
-            continue
-
-        # filter experiments according to defined experiment_ids
-        exp_id = get_experiment_id_from_filename(file_name)
-        if experiment_ids is not None and exp_id not in experiment_ids:
-            continue
-        try:
-            file_data: ExperimentResults = _pickle_load(file_name=file_name)
+    for file_data, results_for_analysis in iterate_expanded_experiment_results_from_data_folder(
+        experiment_data_folder_name=experiment_data_folder_name,
+        experiment_ids=experiment_ids,
+        re_save_csv_after_expansion=re_save_csv_after_expansion,
+        online_unrestricted_only=online_unrestricted_only,
+        with_experiment_results=with_experiment_results,
+        use_cache=use_cache,
+        write_cache=write_cache,
+        nb_processes=nb_processes,
+    ):
+        if with_experiment_results:
             experiment_results_list.append(file_data)
-            if online_unrestricted_only:
-                results_for_analysis = expand_experiment_results_online_unrestricted(file_data)
-                experiment_results_list_analysis.append(results_for_analysis)
-                if re_save_csv_after_expansion:
-                    experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_online_unrestricted_to_data_frame([results_for_analysis])
-                    experiment_data.to_csv(file_name.replace(".pkl", ".csv"))
-            else:
-                results_for_analysis = expand_experiment_results_for_analysis(file_data)
-                experiment_results_list_analysis.append(results_for_analysis)
-                if re_save_csv_after_expansion:
-                    # ensure it is nonified
-                    experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_to_data_frame([results_for_analysis])
-                    experiment_data.to_csv(file_name.replace(".pkl", ".csv"))
-        except Exception as e:
-            rsp_logger.warn(f"skipping {file} because of {e}")
-            rsp_logger.warn(e, exc_info=True)
+        experiment_results_list_analysis.append(results_for_analysis)
 
     # nicer printing when tdqm print to stderr and we have logging to stdout shown in to the same console (IDE, separated in files)
     newline_and_flush_stdout_and_stderr()
@@ -153,20 +378,82 @@ def load_data_from_individual_csv_in_data_folder(
     return experiment_data
 
 
+def load_experiment_results_analysis_data_frame(
+    experiment_data_folder_name: str, experiment_ids: List[int] = None, columns: Optional[List[str]] = None, online_unrestricted_only: bool = False
+) -> DataFrame:
+    """Load results as DataFrame to do further analysis, from the analysis
+    store where possible.
+
+    Experiments not in the store (e.g. run without `pyarrow` or before the store was introduced)
+    are loaded from their csvs.
+
+    Parameters
+    ----------
+    experiment_data_folder_name: str
+        Folder name of experiment where all experiment files are stored
+    experiment_ids
+        List of experiment ids which should be loaded, if None all experiments in experiment_folder are loaded
+    columns
+        columns to load, if None all columns are loaded
+    online_unrestricted_only
+    Returns
+    -------
+    DataFrame containing the loaded experiment results
+    """
+    experiment_ids_in_store = experiment_ids_in_analysis_store(experiment_data_folder_name, online_unrestricted_only=online_unrestricted_only)
+    experiment_ids_from_csv = {
+        get_experiment_id_from_filename(file)
+        for file in os.listdir(experiment_data_folder_name)
+        if file.endswith(".csv") and "agenda" not in file and (experiment_ids is None or get_experiment_id_from_filename(file) in experiment_ids)
+    } - experiment_ids_in_store
+    list_of_frames = []
+    if len(experiment_ids_in_store) > 0:
+        rsp_logger.info(f"loading experiment results from analysis store of {experiment_data_folder_name}")
+        list_of_frames.append(
+            load_experiment_results_analysis_from_store(
+                experiment_data_folder_name, experiment_ids=experiment_ids, columns=columns, online_unrestricted_only=online_unrestricted_only
+            )
+        )
+    if len(experiment_ids_from_csv) > 0:
+        experiment_data = load_data_from_individual_csv_in_data_folder(
+            experiment_data_folder_name=experiment_data_folder_name,
+            experiment_ids=sorted(experiment_ids_from_csv),
+            online_unrestricted_only=online_unrestricted_only,
+        )
+        list_of_frames.append(experiment_data[columns] if columns is not None else experiment_data)
+    if len(list_of_frames) == 0:
+        return pd.DataFrame(columns=columns)
+    experiment_data = pd.concat(list_of_frames, sort=True)
+    return experiment_data[columns] if columns is not None else experiment_data
+
+
 def load_and_filter_experiment_results_analysis_online_unrestricted(
     experiment_base_directory: str = BASELINE_DATA_FOLDER,
     experiments_of_interest: List[int] = None,
     from_cache: bool = False,
     from_individual_csv: bool = True,
     local_filter_experiment_results_analysis_data_frame: Callable[[DataFrame], DataFrame] = None,
+    columns: Optional[List[str]] = None,
+    nb_processes: int = 1,
+    write_cache: bool = False,
 ) -> DataFrame:
+    """Load the analysis of an experiment folder, filter it and save it to
+    `<experiment_base_directory>.csv`.
+
+    Parameters
+    ----------
+    nb_processes
+    write_cache
+        expansion of the pickles if not `from_individual_csv`, see `iterate_expanded_experiment_results_from_data_folder`
+    """
     if from_cache:
         experiment_data_filtered = pd.read_csv(f"{experiment_base_directory}.csv")
     else:
         if from_individual_csv:
-            experiment_data: pd.DataFrame = load_data_from_individual_csv_in_data_folder(
+            experiment_data: pd.DataFrame = load_experiment_results_analysis_data_frame(
                 experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
                 experiment_ids=experiments_of_interest,
+                columns=columns,
                 online_unrestricted_only=True,
             )
         else:
@@ -174,6 +461,9 @@ def load_and_filter_experiment_results_analysis_online_unrestricted(
                 experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
                 experiment_ids=experiments_of_interest,
                 online_unrestricted_only=True,
+                with_experiment_results=False,
+                nb_processes=nb_processes,
+                write_cache=write_cache,
             )
             experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_online_unrestricted_to_data_frame(experiment_results_analysis_list)
 
@@ -0,0 +1,226 @@
+"""Columnar store of the experiment results for analysis.
+
+Instead of a csv per experiment, `save_experiment_results_to_file` writes the expanded results as a Parquet file into
+the analysis store of the experiment data folder, one file (partition) per experiment, so workers never write the
+same file. All partitions have the same fixed schema derived from the fields of `ExperimentResultsAnalysis`
+(or `ExperimentResultsAnalysisOnlineUnrestricted`), so loading needs no type inference.
+
+The store is read as a `pyarrow.dataset`: only the requested columns are read, and the experiment filter is pushed
+down to the files and row groups. `compact_analysis_store` (run at the end of `run_experiment_agenda`) merges the
+partitions into one file sorted by experiment id, so that loading does not open thousands of small files.
+A partition written after compaction (an experiment run again) takes precedence over the compacted row.
+
+The store requires the optional dependency `pyarrow`; without it, no store is written and the analysis data is written
+to csvs (see `load_experiment_results_analysis_data_frame`).
+
+Run this module to compact the analysis store of a data folder:
+
+    python src/python/rsp/step_05_experiment_run/experiment_results_analysis_store.py <experiment data folder>
+"""
+import glob
+import os
+import sys
+from functools import lru_cache
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from pandas import DataFrame
+
+from rsp.step_05_experiment_run.experiment_results_analysis import ExperimentResultsAnalysis
+from rsp.step_05_experiment_run.experiment_results_analysis_online_unrestricted import ExperimentResultsAnalysisOnlineUnrestricted
+from rsp.utils.file_utils import check_create_folder
+from rsp.utils.file_utils import get_experiment_id_from_filename
+from rsp.utils.rsp_logger import rsp_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    ds = None
+    pq = None
+
+ANALYSIS_STORE_SUBDIRECTORY_NAME = "analysis_store"
+ANALYSIS_STORE_ONLINE_UNRESTRICTED_SUBDIRECTORY_NAME = "analysis_store_online_unrestricted"
+COMPACTED_FILE_NAME = "compacted.parquet"
+# experiments per row group of the compacted file: the unit skipped when filtering by experiment id
+COMPACTED_ROW_GROUP_SIZE = 256
+
+# fields declared `int` which hold non-integral values (`np.inf` window size, ratio of conflicts)
+_INT_FIELDS_AS_FLOAT = {"max_window_size_from_earliest", "factor_resource_conflicts"}
+
+
+def analysis_store_available() -> bool:
+    """Is the optional dependency `pyarrow` installed?"""
+    return pa is not None
+
+
+@lru_cache()
+def analysis_store_schema(online_unrestricted_only: bool = False) -> "pa.Schema":
+    """Fixed schema of the store: the `int` and `float` fields of the analysis
+    data structure in declaration order (the other fields are dropped as in
+    `convert_list_of_experiment_results_analysis_to_data_frame`)."""
+    analysis_type = ExperimentResultsAnalysisOnlineUnrestricted if online_unrestricted_only else ExperimentResultsAnalysis
+    fields = []
+    for name in analysis_type._fields:
+        type_ = analysis_type.__annotations__[name]
+        if type_ == int and name not in _INT_FIELDS_AS_FLOAT:
+            fields.append(pa.field(name, pa.int64()))
+        elif type_ in [int, float]:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+
+def _analysis_store_directory(experiment_data_directory: str, online_unrestricted_only: bool) -> str:
+    return os.path.join(
+        experiment_data_directory, ANALYSIS_STORE_ONLINE_UNRESTRICTED_SUBDIRECTORY_NAME if online_unrestricted_only else ANALYSIS_STORE_SUBDIRECTORY_NAME
+    )
+
+
+def _analysis_store_files(experiment_data_directory: str, online_unrestricted_only: bool) -> List[str]:
+    return sorted(
+        glob.glob(os.path.join(_analysis_store_directory(experiment_data_directory, online_unrestricted_only), "experiment_[0-9][0-9][0-9][0-9].parquet"))
+    )
+
+
+def _compacted_file(experiment_data_directory: str, online_unrestricted_only: bool) -> str:
+    return os.path.join(_analysis_store_directory(experiment_data_directory, online_unrestricted_only), COMPACTED_FILE_NAME)
+
+
+def experiment_ids_in_analysis_store(experiment_data_directory: str, online_unrestricted_only: bool = False) -> Set[int]:
+    """Experiments in the store, compacted or not (empty if `pyarrow` is not
+    installed)."""
+    if not analysis_store_available():
+        return set()
+    experiment_ids = {get_experiment_id_from_filename(file_name) for file_name in _analysis_store_files(experiment_data_directory, online_unrestricted_only)}
+    compacted_file = _compacted_file(experiment_data_directory, online_unrestricted_only)
+    if os.path.isfile(compacted_file):
+        experiment_ids.update(pq.read_table(compacted_file, columns=["experiment_id"]).column("experiment_id").to_pylist())
+    return experiment_ids
+
+
+def save_experiment_results_analysis_to_store(
+    experiment_data: DataFrame, experiment_data_directory: str, experiment_id: int, online_unrestricted_only: bool = False
+) -> Optional[str]:
+    """Write the data frame of an experiment as its partition of the store.
+
+    Parameters
+    ----------
+    experiment_data
+        data frame as from `convert_list_of_experiment_results_analysis_to_data_frame`; columns missing in the data frame
+        are stored as nulls, if values do not fit the schema, the experiment is left out of the store
+    experiment_data_directory
+    experiment_id
+    online_unrestricted_only
+        data frame from `convert_list_of_experiment_results_analysis_online_unrestricted_to_data_frame`?
+
+    Returns
+    -------
+    Optional[str]
+        the partition written, `None` if the experiment has been left out
+    """
+    schema = analysis_store_schema(online_unrestricted_only)
+    try:
+        table = pa.Table.from_pandas(experiment_data.reindex(columns=schema.names), schema=schema, preserve_index=False)
+    except pa.ArrowInvalid as e:
+        # the caller writes a csv instead
+        rsp_logger.warning(f"experiment {experiment_id} not written to analysis store of {experiment_data_directory}: {e}")
+        return None
+    folder = _analysis_store_directory(experiment_data_directory, online_unrestricted_only)
+    check_create_folder(folder)
+    file_name = os.path.join(folder, f"experiment_{experiment_id:04d}.parquet")
+    # workers write their partitions concurrently, readers must never see a partial file
+    pq.write_table(table, file_name + ".tmp")
+    os.replace(file_name + ".tmp", file_name)
+    return file_name
+
+
+def _load_table_from_store(
+    experiment_data_directory: str, experiment_ids: Optional[List[int]], columns: Optional[List[str]], online_unrestricted_only: bool
+) -> Tuple["pa.Table", List[str]]:
+    """Table of the experiments in the store and the partitions it has been
+    read from."""
+    schema = analysis_store_schema(online_unrestricted_only)
+    all_files = _analysis_store_files(experiment_data_directory, online_unrestricted_only)
+    files = [file_name for file_name in all_files if experiment_ids is None or get_experiment_id_from_filename(file_name) in experiment_ids]
+    tables = []
+    compacted_file = _compacted_file(experiment_data_directory, online_unrestricted_only)
+    if os.path.isfile(compacted_file):
+        experiment_id = ds.field("experiment_id")
+        # partitions written after compaction supersede the compacted rows
+        expression = ~experiment_id.isin([get_experiment_id_from_filename(file_name) for file_name in all_files])
+        if experiment_ids is not None:
+            expression = expression & experiment_id.isin(list(experiment_ids))
+        tables.append(ds.dataset(compacted_file, schema=schema, format="parquet").to_table(columns=columns, filter=expression))
+    if len(files) > 0:
+        tables.append(ds.dataset(files, schema=schema, format="parquet").to_table(columns=columns))
+    if len(tables) == 0:
+        return schema.empty_table().select(columns if columns is not None else schema.names), files
+    return pa.concat_tables(tables), files
+
+
+def load_experiment_results_analysis_from_store(
+    experiment_data_directory: str, experiment_ids: Optional[List[int]] = None, columns: Optional[List[str]] = None, online_unrestricted_only: bool = False
+) -> DataFrame:
+    """Load the experiments from the store, reading only the requested
+    `columns` of the partitions and row groups of `experiment_ids`.
+
+    Parameters
+    ----------
+    experiment_data_directory
+    experiment_ids
+        if `None`, all experiments in the store are loaded
+    columns
+        if `None`, all columns of the schema are loaded
+    online_unrestricted_only
+
+    Returns
+    -------
+    DataFrame
+    """
+    table, _ = _load_table_from_store(
+        experiment_data_directory, experiment_ids=experiment_ids, columns=columns, online_unrestricted_only=online_unrestricted_only
+    )
+    return table.to_pandas()
+
+
+def compact_analysis_store(experiment_data_directory: str, online_unrestricted_only: bool = False) -> int:
+    """Merge the partitions of the store into its compacted file, sorted by
+    experiment id.
+
+    The compacted file is replaced atomically before the merged partitions are removed, so readers always see every
+    experiment. Must not run concurrently with another compaction of the same store.
+
+    Parameters
+    ----------
+    experiment_data_directory
+    online_unrestricted_only
+
+    Returns
+    -------
+    int
+        number of partitions merged (0 if `pyarrow` is not installed)
+    """
+    if not analysis_store_available():
+        return 0
+    table, files = _load_table_from_store(experiment_data_directory, experiment_ids=None, columns=None, online_unrestricted_only=online_unrestricted_only)
+    if len(files) == 0:
+        return 0
+    table = table.take(pc.sort_indices(table, sort_keys=[("experiment_id", "ascending")]))
+    compacted_file = _compacted_file(experiment_data_directory, online_unrestricted_only)
+    pq.write_table(table, compacted_file + ".tmp", row_group_size=COMPACTED_ROW_GROUP_SIZE)
+    os.replace(compacted_file + ".tmp", compacted_file)
+    for file_name in files:
+        os.remove(file_name)
+    rsp_logger.info(f"compacted {len(files)} partitions into {compacted_file} with {table.num_rows} experiments")
+    return len(files)
+
+
+if __name__ == "__main__":
+    for online_unrestricted_only in [False, True]:
+        compact_analysis_store(experiment_data_directory=sys.argv[1], online_unrestricted_only=online_unrestricted_only)
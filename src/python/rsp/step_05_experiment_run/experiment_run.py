@@ -23,7 +23,7 @@ load_experiment_results_to_file
 import datetime
 import itertools
 import logging
-import multiprocessing
+import multiprocessing.pool
 import os
 import platform
 import pprint
@@ -34,8 +34,10 @@ from functools import partial
 from typing import Callable
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 import tqdm as tqdm
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
@@ -44,13 +46,19 @@ from pandas import DataFrame
 from rsp.global_data_configuration import BASELINE_DATA_FOLDER
 from rsp.global_data_configuration import EXPERIMENT_DATA_SUBDIRECTORY_NAME
 from rsp.global_data_configuration import INFRAS_AND_SCHEDULES_FOLDER
+from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
+from rsp.scheduling.asp_wrapper import asp_reschedule_incremental_base
 from rsp.scheduling.asp_wrapper import asp_reschedule_wrapper
 from rsp.scheduling.schedule import exists_schedule
 from rsp.scheduling.schedule import load_schedule
 from rsp.scheduling.schedule import Schedule
+from rsp.scheduling.schedule import SchedulingExperimentResult
+from rsp.scheduling.scheduling_problem import get_number_of_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import path_stats
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.scheduling.scheduling_problem import topo_view
 from rsp.scheduling.scheduling_problem import TopoDict
 from rsp.step_01_agenda_expansion.agenda_expansion import expand_infrastructure_parameter_range
 from rsp.step_01_agenda_expansion.agenda_expansion import expand_schedule_parameter_range
@@ -63,21 +71,29 @@ from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import Schedu
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import SpeedData
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 from rsp.step_01_agenda_expansion.global_constants import GlobalConstants
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
 from rsp.step_02_infrastructure_generation.infrastructure import exists_infrastructure
 from rsp.step_02_infrastructure_generation.infrastructure import gen_infrastructure
 from rsp.step_02_infrastructure_generation.infrastructure import load_infrastructure
 from rsp.step_02_infrastructure_generation.infrastructure import save_infrastructure
 from rsp.step_03_schedule_generation.schedule_generation import gen_and_save_schedule
 from rsp.step_05_experiment_run.experiment_malfunction import gen_malfunction
+from rsp.step_05_experiment_run.experiment_manifest import append_to_manifest
+from rsp.step_05_experiment_run.experiment_manifest import create_manifest_entry
+from rsp.step_05_experiment_run.experiment_manifest import ExperimentStatus
+from rsp.step_05_experiment_run.experiment_manifest import load_done_experiment_ids
 from rsp.step_05_experiment_run.experiment_results import ExperimentResults
-from rsp.step_05_experiment_run.experiment_results import load_experiments_results
+from rsp.step_05_experiment_run.experiment_results import load_experiments_results  # noqa: F401
 from rsp.step_05_experiment_run.experiment_results import plausibility_check_experiment_results
 from rsp.step_05_experiment_run.experiment_results_analysis import convert_list_of_experiment_results_analysis_to_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis import expand_experiment_results_for_analysis
 from rsp.step_05_experiment_run.experiment_results_analysis import plausibility_check_experiment_results_analysis
 from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_and_expand_experiment_results_from_data_folder
-from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_data_from_individual_csv_in_data_folder
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_data_from_individual_csv_in_data_folder  # noqa: F401
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_experiment_results_analysis_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import save_experiment_results_to_file
+from rsp.step_05_experiment_run.experiment_results_analysis_store import compact_analysis_store
+from rsp.step_05_experiment_run.infrastructure_and_schedule_memo import load_infrastructure_and_schedule_memoized
 from rsp.step_05_experiment_run.scopers.scoper_offline_delta import scoper_offline_delta_for_all_agents
 from rsp.step_05_experiment_run.scopers.scoper_offline_delta_weak import scoper_offline_delta_weak_for_all_agents
 from rsp.step_05_experiment_run.scopers.scoper_offline_fully_restricted import scoper_offline_fully_restricted_for_all_agents
@@ -93,8 +109,10 @@ from rsp.utils.pickle_helper import _pickle_load
 from rsp.utils.psutil_helpers import current_process_stats_human_readable
 from rsp.utils.psutil_helpers import virtual_memory_human_readable
 from rsp.utils.rsp_logger import add_file_handler_to_rsp_logger
+from rsp.utils.rsp_logger import forward_rsp_logger_to_queue
 from rsp.utils.rsp_logger import remove_file_handler_from_rsp_logger
 from rsp.utils.rsp_logger import rsp_logger
+from rsp.utils.rsp_logger import rsp_logger_queue_listener
 
 #  B008 Do not perform function calls in argument defaults.
 #  The call is performed only once at function definition time.
@@ -102,8 +120,81 @@ from rsp.utils.rsp_logger import rsp_logger
 #  If this is intended, ass ign the function call to a module-level variable and use that variable as a default value.
 AVAILABLE_CPUS = os.cpu_count()
 
+# Worker processes are forked from a fork server which has already imported these modules (flatland, pandas, clingo etc.),
+# so a new worker does not pay interpreter start-up and imports. The fork server is single-threaded, so the workers
+# never inherit threads or clingo state from a parent that has already solved (https://github.com/potassco/clingo/issues/203).
+WORKER_PRELOAD_MODULES = ["rsp.step_05_experiment_run.experiment_run"]
+# Workers are recycled after this many tasks to bound the memory of long-lived solver processes; 1 means a fresh process per task.
+# Every experiment resets the process state it depends on when it starts, see `_reset_worker_state`.
+MAX_TASKS_PER_WORKER = 50
+
 _pp = pprint.PrettyPrinter(indent=4)
 
+if "forkserver" in multiprocessing.get_all_start_methods():
+
+    class _NonDaemonicForkServerProcess(multiprocessing.context.ForkServerProcess):
+        """Pool worker which may have children (the pool marks its workers
+        daemonic)."""
+
+        @property
+        def daemon(self):
+            return False
+
+        @daemon.setter
+        def daemon(self, value):
+            pass
+
+    class _NonDaemonicForkServerContext(multiprocessing.context.ForkServerContext):
+        Process = _NonDaemonicForkServerProcess
+
+
+def create_worker_log_queue() -> multiprocessing.Queue:
+    """Queue for `create_worker_pool(log_queue=...)`, created in the
+    multiprocessing context of the workers."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.Queue()
+    return multiprocessing.get_context("forkserver").Queue()
+
+
+def create_worker_pool(
+    processes: int, max_tasks_per_worker: Optional[int] = MAX_TASKS_PER_WORKER, daemonic: bool = True, log_queue: Optional[multiprocessing.Queue] = None
+) -> multiprocessing.pool.Pool:
+    """Pool of reusable solver worker processes forked from a fork server
+    with `WORKER_PRELOAD_MODULES` preloaded.
+
+    Tasks must not rely on process state left by previous tasks: `run_experiment_from_to_file` resets the process state
+    for every experiment (see `_reset_worker_state`), adds and removes the logging file handlers of the experiment, and every
+    clingo control is local to a solve call.
+
+    Parameters
+    ----------
+    processes
+        number of worker processes
+    max_tasks_per_worker
+        number of tasks after which a worker is replaced by a fresh one, `None` for no limit
+    daemonic
+        daemonic workers cannot have worker processes of their own (e.g. to solve the scopes of an experiment in parallel).
+        Non-daemonic workers are only available with the fork server.
+    log_queue
+        if given (see `create_worker_log_queue`), the workers put their log records into this queue instead of logging
+        to the handlers inherited from the fork server, to be handled by a `rsp_logger_queue_listener` in this process.
+
+    Returns
+    -------
+    multiprocessing.pool.Pool
+    """
+    initializer, initargs = (forward_rsp_logger_to_queue, (log_queue,)) if log_queue is not None else (None, ())
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        # e.g. Windows: workers are spawned, they import the modules once and are then re-used as well
+        return multiprocessing.Pool(processes=processes, initializer=initializer, initargs=initargs, maxtasksperchild=max_tasks_per_worker)
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+    if not daemonic:
+        return multiprocessing.pool.Pool(
+            processes=processes, initializer=initializer, initargs=initargs, maxtasksperchild=max_tasks_per_worker, context=_NonDaemonicForkServerContext()
+        )
+    return context.Pool(processes=processes, initializer=initializer, initargs=initargs, maxtasksperchild=max_tasks_per_worker)
+
 
 def run_experiment_in_memory(
     schedule: Schedule,
@@ -112,6 +203,7 @@ def run_experiment_in_memory(
     # TODO we should use logging debug levels instead
     debug: bool = False,
     online_unrestricted_only: bool = False,
+    scope_processes: int = 1,
 ) -> ExperimentResults:
     """A.2 + B Runs the main part of the experiment: re-scheduling full and
     delta perfect/naive.
@@ -130,6 +222,9 @@ def run_experiment_in_memory(
     online_unrestricted_only
         run only scope `online_unrestricted`.
         Used for "calibration runs" where we are only interested in the speed-up between `online_unrestricted` with different `GlobalConstants`.
+    scope_processes
+        number of processes to solve the scopes restricting `online_unrestricted` in parallel, 1 solves them in this process.
+        Must not be run in a daemonic process for more than 1, see `create_worker_pool`.
 
     Returns
     -------
@@ -162,8 +257,8 @@ def run_experiment_in_memory(
     # B.1. Re-schedule Full
     # --------------------------------------------------------------------------------------
     rsp_logger.info("2. reschedule full")
-    # clone topos since propagation will modify them
-    online_unrestricted_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    online_unrestricted_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     problem_online_unrestricted: ScheduleProblemDescription = scoper_online_unrestricted_for_all_agents(
         malfunction=experiment_malfunction,
         schedule_trainruns=schedule_trainruns,
@@ -175,11 +270,24 @@ def run_experiment_in_memory(
         weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
     )
 
+    # all other scopes are restrictions of online_unrestricted and can be solved on its grounding
+    incremental_base = (
+        asp_reschedule_incremental_base(
+            reschedule_problem_description=problem_online_unrestricted,
+            schedule=schedule_trainruns,
+            asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
+        )
+        if GLOBAL_CONSTANTS.INCREMENTAL_RESCHEDULING
+        else None
+    )
+
     results_online_unrestricted = asp_reschedule_wrapper(
         reschedule_problem_description=problem_online_unrestricted,
         schedule=schedule_trainruns,
         debug=debug,
         asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
+        incremental_base=incremental_base,
+        scope="online_unrestricted",
     )
 
     online_unrestricted_trainruns = results_online_unrestricted.trainruns_dict
@@ -218,8 +326,8 @@ def run_experiment_in_memory(
     # B.2.a Lower bound: Re-Schedule Delta Perfect
     # --------------------------------------------------------------------------------------
     rsp_logger.info("3a. reschedule delta perfect (lower bound)")
-    # clone topos since propagation will modify them
-    offline_delta_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    offline_delta_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     problem_offline_delta = scoper_offline_delta_for_all_agents(
         online_unrestricted_trainrun_dict=online_unrestricted_trainruns,
         malfunction=experiment_malfunction,
@@ -232,24 +340,13 @@ def run_experiment_in_memory(
         weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
     )
 
-    results_offline_delta = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_offline_delta,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(
-        f" results_offline_delta has costs {results_offline_delta.solver_statistics['summary']['costs'][0]}, "
-        f"took {results_offline_delta.solver_statistics['summary']['times']['total']}"
-    )
-
     # --------------------------------------------------------------------------------------
     # B.2.a Above Lower bound: Re-Schedule Delta Weak
     # --------------------------------------------------------------------------------------
 
     rsp_logger.info("3a. reschedule delta Weak (above lower bound)")
-    # clone topos since propagation will modify them
-    offline_delta_weak_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    offline_delta_weak_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     problem_offline_delta_weak = scoper_offline_delta_weak_for_all_agents(
         online_unrestricted_trainrun_dict=online_unrestricted_trainruns,
         online_unrestricted_problem=problem_online_unrestricted,
@@ -263,20 +360,12 @@ def run_experiment_in_memory(
         weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
     )
 
-    results_offline_delta_weak = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_offline_delta_weak,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(f" results_offline_delta_weak has costs {results_offline_delta_weak.solver_statistics['summary']['costs'][0]}")
-
     # --------------------------------------------------------------------------------------
     # B.2.b Lower bound: Re-Schedule Delta trivially_perfect
     # --------------------------------------------------------------------------------------
     rsp_logger.info("3b. reschedule delta trivially_perfect (lower bound)")
-    # clone topos since propagation will modify them
-    delta_trivially_perfect_reschedule_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    delta_trivially_perfect_reschedule_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     problem_offline_fully_restricted = scoper_offline_fully_restricted_for_all_agents(
         online_unrestricted_trainrun_dict=online_unrestricted_trainruns,
         malfunction=experiment_malfunction,
@@ -289,24 +378,12 @@ def run_experiment_in_memory(
         weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
     )
 
-    results_offline_fully_restricted = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_offline_fully_restricted,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(
-        f" results_offline_fully_restricted has costs "
-        f"{results_offline_fully_restricted.solver_statistics['summary']['costs'][0]}, "
-        f"took {results_offline_fully_restricted.solver_statistics['summary']['times']['total']}"
-    )
-
     # --------------------------------------------------------------------------------------
     # B.2.c Some restriction
     # --------------------------------------------------------------------------------------
     rsp_logger.info("4. reschedule no rerouting")
-    # clone topos since propagation will modify them
-    delta_no_rerouting_reschedule_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    delta_no_rerouting_reschedule_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     problem_online_route_restricted = scoper_online_route_restricted_for_all_agents(
         online_unrestricted_trainrun_dict=online_unrestricted_trainruns,
         online_unrestricted_problem=problem_online_unrestricted,
@@ -321,23 +398,12 @@ def run_experiment_in_memory(
         weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
     )
 
-    results_online_route_restricted = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_online_route_restricted,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(
-        f" results_online_route_restricted has costs {results_online_route_restricted.solver_statistics['summary']['costs'][0]}, "
-        f"took {results_online_route_restricted.solver_statistics['summary']['times']['total']}"
-    )
-
     # --------------------------------------------------------------------------------------
     # B.2.d Upper bound: online predictor
     # --------------------------------------------------------------------------------------
     rsp_logger.info("5a. reschedule delta online transmission chains: upper bound")
-    # clone topos since propagation will modify them
-    online_transmission_chains_fully_restricted_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    online_transmission_chains_fully_restricted_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     (
         problem_online_transmission_chains_fully_restricted,
         predicted_changed_agents_online_transmission_chains_fully_restricted_predicted,
@@ -355,24 +421,12 @@ def run_experiment_in_memory(
         time_flexibility=False,
     )
 
-    results_online_transmission_chains_fully_restricted = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_online_transmission_chains_fully_restricted,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(
-        f" results_online_transmission_chains_fully_restricted has costs "
-        f"{results_online_transmission_chains_fully_restricted.solver_statistics['summary']['costs'][0]}, "
-        f"took {results_online_transmission_chains_fully_restricted.solver_statistics['summary']['times']['total']}"
-    )
-
     # --------------------------------------------------------------------------------------
     # B.2.d Upper bound: online_no_time_flexibility predictor
     # --------------------------------------------------------------------------------------
     rsp_logger.info("5b. reschedule delta online_no_time_flexibility transmission chains: upper bound")
-    # clone topos since propagation will modify them
-    online_transmission_chains_route_restricted_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+    # copy-on-write views of the topos since propagation will remove nodes
+    online_transmission_chains_route_restricted_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
     (
         problem_online_transmission_chains_route_restricted,
         predicted_changed_agents_online_transmission_chains_route_restricted_predicted,
@@ -390,18 +444,6 @@ def run_experiment_in_memory(
         time_flexibility=True,
     )
 
-    results_online_transmission_chains_route_restricted = asp_reschedule_wrapper(
-        reschedule_problem_description=problem_online_transmission_chains_route_restricted,
-        schedule=schedule_trainruns,
-        debug=debug,
-        asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
-    )
-    rsp_logger.info(
-        f" results_online_transmission_chains_route_restricted has costs "
-        f"{results_online_transmission_chains_route_restricted.solver_statistics['summary']['costs'][0]}, "
-        f"took {results_online_transmission_chains_route_restricted.solver_statistics['summary']['times']['total']}"
-    )
-
     # --------------------------------------------------------------------------------------
     # B.2.e Sanity check: random predictor
     # if that also reduces solution time, our problem is not hard enough, showing the problem is not trivial
@@ -409,8 +451,8 @@ def run_experiment_in_memory(
     rsp_logger.info("6. reschedule delta random naive: upper bound")
     randoms = []
     for random_i in range(GLOBAL_CONSTANTS.NB_RANDOM):
-        # clone topos since propagation will modify them
-        online_random_topo_dict = {agent_id: topo.copy() for agent_id, topo in rescheduling_topo_dict.items()}
+        # copy-on-write views of the topos since propagation will remove nodes
+        online_random_topo_dict = {agent_id: topo_view(topo) for agent_id, topo in rescheduling_topo_dict.items()}
         problem_online_random, predicted_changed_agents_online_random = scoper_online_random_for_all_agents(
             online_unrestricted_problem=problem_online_unrestricted,
             malfunction=experiment_malfunction,
@@ -426,17 +468,63 @@ def run_experiment_in_memory(
             weight_lateness_seconds=experiment_parameters.re_schedule_parameters.weight_lateness_seconds,
             nb_changed_running_agents_online=len(predicted_changed_agents_online_transmission_chains_fully_restricted_predicted),
         )
-        results_online_random = asp_reschedule_wrapper(
-            reschedule_problem_description=problem_online_random,
-            schedule=schedule_trainruns,
-            debug=debug,
+        randoms.append((problem_online_random, predicted_changed_agents_online_random))
+
+    # --------------------------------------------------------------------------------------
+    # B.2.f Solve the scopes: given `results_online_unrestricted`, they are independent of each other
+    # --------------------------------------------------------------------------------------
+    scope_problems = [
+        ("offline_delta", problem_offline_delta),
+        ("offline_delta_weak", problem_offline_delta_weak),
+        ("offline_fully_restricted", problem_offline_fully_restricted),
+        ("online_route_restricted", problem_online_route_restricted),
+        ("online_transmission_chains_fully_restricted", problem_online_transmission_chains_fully_restricted),
+        ("online_transmission_chains_route_restricted", problem_online_transmission_chains_route_restricted),
+    ] + [(f"online_random_{random_i}", problem_online_random) for random_i, (problem_online_random, _) in enumerate(randoms)]
+    if scope_processes > 1 and multiprocessing.current_process().daemon:
+        rsp_logger.warning(f"cannot solve scopes in parallel in daemonic process {multiprocessing.current_process().name}, see `create_worker_pool`")
+        scope_processes = 1
+    if scope_processes > 1:
+        nb_workers = min(scope_processes, len(scope_problems))
+        rsp_logger.info(f"solving {len(scope_problems)} scopes in {nb_workers} processes")
+        # every worker grounds its own incremental base for its share of the scopes, clingo controls cannot be shared between processes;
+        # the base is therefore grounded once per worker instead of once per experiment (see `_solve_scopes_in_worker`)
+        solve_scopes_partial = partial(
+            _solve_scopes_in_worker,
+            problem_online_unrestricted=problem_online_unrestricted,
+            schedule_trainruns=schedule_trainruns,
             asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
+            debug=debug,
+            global_constants=GLOBAL_CONSTANTS._constants,
         )
+        # the workers' log records go to the log files of this experiment
+        log_queue = create_worker_log_queue()
+        log_listener = rsp_logger_queue_listener(log_queue)
+        log_listener.start()
+        try:
+            with create_worker_pool(processes=nb_workers, max_tasks_per_worker=1, log_queue=log_queue) as pool:
+                results_per_worker = pool.map(solve_scopes_partial, [scope_problems[worker::nb_workers] for worker in range(nb_workers)])
+                # let the workers exit normally so that they flush their log records into the queue
+                pool.close()
+                pool.join()
+        finally:
+            log_listener.stop()
+        results_per_scope = dict(itertools.chain.from_iterable(results_per_worker))
+    else:
+        results_per_scope = dict(
+            _solve_scopes(
+                scope_problems=scope_problems,
+                schedule_trainruns=schedule_trainruns,
+                asp_seed_value=experiment_parameters.schedule_parameters.asp_seed_value,
+                debug=debug,
+                incremental_base=incremental_base,
+            )
+        )
+    for scope, _ in scope_problems:
         rsp_logger.info(
-            f" results_online_random[{random_i}] has costs {results_online_random.solver_statistics['summary']['costs'][0]}, "
-            f"took {results_online_random.solver_statistics['summary']['times']['total']}"
+            f" results_{scope} has costs {results_per_scope[scope].solver_statistics['summary']['costs'][0]}, "
+            f"took {results_per_scope[scope].solver_statistics['summary']['times']['total']}"
         )
-        randoms.append((problem_online_random, results_online_random, predicted_changed_agents_online_random))
 
     # --------------------------------------------------------------------------------------
     # B.3. Result
@@ -455,33 +543,83 @@ def run_experiment_in_memory(
         problem_online_transmission_chains_route_restricted=problem_online_transmission_chains_route_restricted,
         results_schedule=schedule_result,
         results_online_unrestricted=results_online_unrestricted,
-        results_offline_delta=results_offline_delta,
-        results_offline_delta_weak=results_offline_delta_weak,
-        results_offline_fully_restricted=results_offline_fully_restricted,
-        results_online_route_restricted=results_online_route_restricted,
-        results_online_transmission_chains_fully_restricted=results_online_transmission_chains_fully_restricted,
-        results_online_transmission_chains_route_restricted=results_online_transmission_chains_route_restricted,
+        results_offline_delta=results_per_scope["offline_delta"],
+        results_offline_delta_weak=results_per_scope["offline_delta_weak"],
+        results_offline_fully_restricted=results_per_scope["offline_fully_restricted"],
+        results_online_route_restricted=results_per_scope["online_route_restricted"],
+        results_online_transmission_chains_fully_restricted=results_per_scope["online_transmission_chains_fully_restricted"],
+        results_online_transmission_chains_route_restricted=results_per_scope["online_transmission_chains_route_restricted"],
         predicted_changed_agents_online_transmission_chains_fully_restricted=predicted_changed_agents_online_transmission_chains_fully_restricted_predicted,
         predicted_changed_agents_online_transmission_chains_route_restricted=predicted_changed_agents_online_transmission_chains_route_restricted_predicted,
         **{f"problem_online_random_{i}": randoms[i][0] for i in range(GLOBAL_CONSTANTS.NB_RANDOM)},
-        **{f"results_online_random_{i}": randoms[i][1] for i in range(GLOBAL_CONSTANTS.NB_RANDOM)},
-        **{f"predicted_changed_agents_online_random_{i}": randoms[i][2] for i in range(GLOBAL_CONSTANTS.NB_RANDOM)},
+        **{f"results_online_random_{i}": results_per_scope[f"online_random_{i}"] for i in range(GLOBAL_CONSTANTS.NB_RANDOM)},
+        **{f"predicted_changed_agents_online_random_{i}": randoms[i][1] for i in range(GLOBAL_CONSTANTS.NB_RANDOM)},
     )
     rsp_logger.info(f"done re-schedule full and delta naive/perfect for experiment {experiment_parameters.experiment_id}")
     return current_results
 
 
+def _solve_scopes(
+    scope_problems: List[Tuple[str, ScheduleProblemDescription]],
+    schedule_trainruns: TrainrunDict,
+    asp_seed_value: Optional[int],
+    debug: bool,
+    incremental_base: Optional[ASPProblemDescription],
+) -> List[Tuple[str, SchedulingExperimentResult]]:
+    """Solve the scopes one after the other (on the grounding of
+    `incremental_base` if given)."""
+    return [
+        (
+            scope,
+            asp_reschedule_wrapper(
+                reschedule_problem_description=problem,
+                schedule=schedule_trainruns,
+                debug=debug,
+                asp_seed_value=asp_seed_value,
+                incremental_base=incremental_base,
+                scope=scope,
+            ),
+        )
+        for scope, problem in scope_problems
+    ]
+
+
+def _solve_scopes_in_worker(
+    scope_problems: List[Tuple[str, ScheduleProblemDescription]],
+    problem_online_unrestricted: ScheduleProblemDescription,
+    schedule_trainruns: TrainrunDict,
+    asp_seed_value: Optional[int],
+    debug: bool,
+    global_constants: GlobalConstants,
+) -> List[Tuple[str, SchedulingExperimentResult]]:
+    """Solve a share of the scopes of an experiment in a worker process, see
+    `run_experiment_in_memory`.
+
+    With `INCREMENTAL_RESCHEDULING`, every worker grounds the incremental base of `problem_online_unrestricted` once
+    for its share: a grounded clingo control cannot be passed between processes. The repeated grounding is bounded
+    by the number of workers, i.e. `scope_processes`, and the workers ground in parallel.
+    """
+    GLOBAL_CONSTANTS.set_defaults(constants=global_constants)
+    incremental_base = (
+        asp_reschedule_incremental_base(reschedule_problem_description=problem_online_unrestricted, schedule=schedule_trainruns, asp_seed_value=asp_seed_value)
+        if GLOBAL_CONSTANTS.INCREMENTAL_RESCHEDULING
+        else None
+    )
+    return _solve_scopes(
+        scope_problems=scope_problems, schedule_trainruns=schedule_trainruns, asp_seed_value=asp_seed_value, debug=debug, incremental_base=incremental_base
+    )
+
+
 def _make_restricted_topo(infrastructure_topo_dict: TopoDict, number_of_shortest_paths: int):
-    topo_dict = {agent_id: topo.copy() for agent_id, topo in infrastructure_topo_dict.items()}
+    topo_dict = {agent_id: topo_view(topo) for agent_id, topo in infrastructure_topo_dict.items()}
     nb_paths_before = []
     nb_paths_after = []
     for _, topo in topo_dict.items():
-        paths = get_paths_in_route_dag(topo)
-        nodes_to_keep = [node for path in paths[:number_of_shortest_paths] for node in path]
+        nodes_to_keep = {node for path in get_paths_in_route_dag(topo, number_of_paths=number_of_shortest_paths) for node in path}
         nodes_to_remove = {node for node in topo.nodes if node not in nodes_to_keep}
-        topo.remove_nodes_from(nodes_to_remove)
-        nb_paths_before.append(len(paths))
-        nb_paths_after.append(len(get_paths_in_route_dag(topo)))
+        nb_paths_before.append(get_number_of_paths_in_route_dag(topo))
+        remove_nodes_from_topo(topo, nodes_to_remove)
+        nb_paths_after.append(get_number_of_paths_in_route_dag(topo))
     rsp_logger.info(
         f"make restricted topo for re-scheduling with number_of_shortest_paths{number_of_shortest_paths}: "
         f"{path_stats(nb_paths_before)} -> {path_stats(nb_paths_after)}"
@@ -532,6 +670,21 @@ def _write_sha_txt(folder_name: str):
         out.write(sha)
 
 
+def _reset_worker_state(global_constants: GlobalConstants, experiment_parameters: ExperimentParameters):
+    """Reset the process state an experiment depends on, so that its results
+    do not depend on the experiments run before in the same worker process:
+
+    - `GLOBAL_CONSTANTS` of the agenda
+    - the global `numpy` random state (drawing the changed agents of the online random scopes) seeded from the
+      experiment's re-scheduling seed; otherwise, a fresh worker would start from the fork server's state and a
+      re-used worker from where its previous experiment left off.
+
+    The infrastructures and schedules memoized in the worker are read-only, see `load_infrastructure_and_schedule_memoized`.
+    """
+    GLOBAL_CONSTANTS.set_defaults(constants=global_constants)
+    np.random.seed(experiment_parameters.re_schedule_parameters.asp_seed_value)
+
+
 def run_experiment_from_to_file(
     experiment_parameters: ExperimentParameters,
     experiment_base_directory: str,
@@ -541,6 +694,7 @@ def run_experiment_from_to_file(
     debug: bool = False,
     online_unrestricted_only: bool = False,
     raise_exceptions: bool = False,
+    scope_processes: int = 1,
 ):
     """A.2 + B. Run and save one experiment from experiment parameters.
     Parameters
@@ -551,10 +705,12 @@ def run_experiment_from_to_file(
         contains reference to infrastructure and schedules
     experiment_output_directory
     debug
+    scope_processes
+        see `run_experiment_in_memory`
     """
     rsp_logger.info(f"run_experiment_from_to_file with {global_constants}")
-    # N.B. this works since we ensure that every experiment runs in its own process!
-    GLOBAL_CONSTANTS.set_defaults(constants=global_constants)
+    # N.B. this works since every experiment resets the state of its worker process, see `create_worker_pool`!
+    _reset_worker_state(global_constants=global_constants, experiment_parameters=experiment_parameters)
 
     experiment_data_directory = f"{experiment_output_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}"
 
@@ -565,13 +721,13 @@ def run_experiment_from_to_file(
     stderr_log_fh = add_file_handler_to_rsp_logger(stderr_log_file, logging.ERROR)
 
     rsp_logger.info(f"start experiment {experiment_parameters.experiment_id}")
+    start_time = time.time()
     try:
 
         check_create_folder(experiment_data_directory)
 
         start_datetime_str = datetime.datetime.now().strftime("%H:%M:%S")
         rsp_logger.info("Running experiment {} under pid {} at {}".format(experiment_parameters.experiment_id, os.getpid(), start_datetime_str))
-        start_time = time.time()
 
         rsp_logger.info("*** experiment parameters for experiment {}. {}".format(experiment_parameters.experiment_id, _pp.pformat(experiment_parameters)))
 
@@ -584,12 +740,12 @@ def run_experiment_from_to_file(
             return
 
         rsp_logger.info(f"load_schedule for {experiment_parameters.experiment_id}")
-        schedule, schedule_parameters = load_schedule(
-            base_directory=f"{experiment_base_directory}",
+        # read-only, shared with the next experiments in this worker
+        infrastructure, schedule = load_infrastructure_and_schedule_memoized(
+            base_directory=experiment_base_directory,
             infra_id=experiment_parameters.infra_parameters.infra_id,
             schedule_id=experiment_parameters.schedule_parameters.schedule_id,
         )
-        infrastructure, _ = load_infrastructure(base_directory=f"{experiment_base_directory}", infra_id=experiment_parameters.infra_parameters.infra_id)
 
         if debug:
             _render_route_dags_from_data(experiment_base_directory=experiment_output_directory, experiment_id=experiment_parameters.experiment_id)
@@ -601,6 +757,7 @@ def run_experiment_from_to_file(
             infrastructure_topo_dict=infrastructure.topo_dict,
             debug=debug,
             online_unrestricted_only=online_unrestricted_only,
+            scope_processes=scope_processes,
         )
 
         if experiment_results is None:
@@ -631,16 +788,27 @@ def run_experiment_from_to_file(
         rsp_logger.info(virtual_memory_human_readable())
         rsp_logger.info(current_process_stats_human_readable())
 
-        # fail fast!
+        # fail fast! (`expand_experiment_results_for_analysis` repeats the plausibility check of the experiment results)
         if not online_unrestricted_only:
-            plausibility_check_experiment_results(experiment_results=experiment_results)
+            if GLOBAL_CONSTANTS.VERIFICATION_LEVEL == VerificationLevel.full:
+                plausibility_check_experiment_results(experiment_results=experiment_results)
             plausibility_check_experiment_results_analysis(
                 experiment_results_analysis=expand_experiment_results_for_analysis(experiment_results=experiment_results)
             )
         filename = create_experiment_filename(experiment_data_directory, experiment_parameters.experiment_id)
-        save_experiment_results_to_file(
+        analysis_file_name = save_experiment_results_to_file(
             experiment_results=experiment_results, file_name=filename, csv_only=csv_only, online_unrestricted_only=online_unrestricted_only
         )
+        append_to_manifest(
+            experiment_data_directory=experiment_data_directory,
+            entry=create_manifest_entry(
+                experiment_id=experiment_parameters.experiment_id,
+                status=ExperimentStatus.csv_only if csv_only else ExperimentStatus.done,
+                file_name=analysis_file_name if csv_only else filename,
+                start_time=datetime.datetime.fromtimestamp(start_time).isoformat(),
+                elapsed_time=time.time() - start_time,
+            ),
+        )
 
         return os.getpid()
     except Exception as e:
@@ -650,6 +818,15 @@ def run_experiment_from_to_file(
             f"infra_id={experiment_parameters.infra_parameters.infra_id}, "
             f"schedule_id={experiment_parameters.schedule_parameters.schedule_id}"
         )
+        append_to_manifest(
+            experiment_data_directory=experiment_data_directory,
+            entry=create_manifest_entry(
+                experiment_id=experiment_parameters.experiment_id,
+                status=ExperimentStatus.failed,
+                start_time=datetime.datetime.fromtimestamp(start_time).isoformat(),
+                elapsed_time=time.time() - start_time,
+            ),
+        )
         if raise_exceptions:
             raise e
         return os.getpid()
@@ -665,17 +842,35 @@ def load_and_filter_experiment_results_analysis(
     from_cache: bool = False,
     from_individual_csv: bool = True,
     local_filter_experiment_results_analysis_data_frame: Callable[[DataFrame], DataFrame] = None,
+    columns: Optional[List[str]] = None,
+    nb_processes: int = 1,
+    write_cache: bool = False,
 ) -> DataFrame:
+    """Load the analysis of an experiment folder, filter it and save it to
+    `<experiment_base_directory>.csv`.
+
+    Parameters
+    ----------
+    nb_processes
+    write_cache
+        expansion of the pickles if not `from_individual_csv`, see `iterate_expanded_experiment_results_from_data_folder`
+    """
     if from_cache:
         experiment_data_filtered = pd.read_csv(f"{experiment_base_directory}.csv")
     else:
         if from_individual_csv:
-            experiment_data: pd.DataFrame = load_data_from_individual_csv_in_data_folder(
-                experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", experiment_ids=experiments_of_interest
+            experiment_data: pd.DataFrame = load_experiment_results_analysis_data_frame(
+                experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
+                experiment_ids=experiments_of_interest,
+                columns=columns,
             )
         else:
             _, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(
-                experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", experiment_ids=experiments_of_interest,
+                experiment_data_folder_name=f"{experiment_base_directory}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}",
+                experiment_ids=experiments_of_interest,
+                with_experiment_results=False,
+                nb_processes=nb_processes,
+                write_cache=write_cache,
             )
             experiment_data: pd.DataFrame = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_analysis_list)
 
@@ -697,6 +892,8 @@ def run_experiment_agenda(
     run_experiments_parallel: int = AVAILABLE_CPUS // 2,
     csv_only: bool = False,
     online_unrestricted_only: bool = False,
+    max_tasks_per_worker: Optional[int] = MAX_TASKS_PER_WORKER,
+    cpus_per_experiment: Optional[int] = None,
 ) -> str:
     """Run A.2 + B. Presupposes infras and schedules
     Parameters
@@ -714,6 +911,11 @@ def run_experiment_agenda(
     run_analysis
     online_unrestricted_only
     csv_only
+    max_tasks_per_worker
+        see `create_worker_pool`
+    cpus_per_experiment
+        number of processes to solve the scopes of one experiment in parallel, see `run_experiment_in_memory`;
+        by default, the `run_experiments_parallel` cpus are shared among the experiments if there are fewer experiments.
 
     Returns
     -------
@@ -774,13 +976,10 @@ def run_experiment_agenda(
         rsp_logger.info(f"filtering agenda by experiments not run yet <- {experiment_output_directory}")
         rsp_logger.info(f"============================================================================================================")
         len_before_filtering = len(experiment_agenda.experiments)
+        done_experiment_ids = load_done_experiment_ids(experiment_data_directory)
         experiment_agenda = ExperimentAgenda(
             experiment_name=experiment_agenda.experiments,
-            experiments=[
-                experiment
-                for experiment in experiment_agenda.experiments
-                if load_experiments_results(experiment_data_folder_name=experiment_data_directory, experiment_id=experiment.experiment_id) is None
-            ],
+            experiments=[experiment for experiment in experiment_agenda.experiments if experiment.experiment_id not in done_experiment_ids],
             global_constants=experiment_agenda.global_constants,
         )
         rsp_logger.info(
@@ -794,30 +993,37 @@ def run_experiment_agenda(
         rsp_logger.info(f"experiment_agenda.global_constants={experiment_agenda.global_constants}")
         rsp_logger.info(f"============================================================================================================")
 
-        # use processes in pool only once because of https://github.com/potassco/clingo/issues/203
-        # https://stackoverflow.com/questions/38294608/python-multiprocessing-pool-new-process-for-each-variable
-        # N.B. even with parallelization degree 1, we want to run each experiment in a new process
-        #      in order to get around https://github.com/potassco/clingo/issues/203
-        pool = multiprocessing.Pool(processes=run_experiments_parallel, maxtasksperchild=1)
-        rsp_logger.info(f"pool size {pool._processes} / {multiprocessing.cpu_count()} ({os.cpu_count()}) cpus on {platform.node()}")
-        # nicer printing when tdqm print to stderr and we have logging to stdout shown in to the same console (IDE, separated in files)
-        newline_and_flush_stdout_and_stderr()
+        if cpus_per_experiment is None:
+            cpus_per_experiment = max(1, run_experiments_parallel // max(1, len(experiment_agenda.experiments)))
 
-        run_and_save_one_experiment_partial = partial(
-            run_experiment_from_to_file,
-            experiment_base_directory=experiment_base_directory,
-            experiment_output_directory=experiment_output_directory,
-            csv_only=csv_only,
-            global_constants=experiment_agenda.global_constants,
-            online_unrestricted_only=online_unrestricted_only,
-        )
+        # N.B. even with parallelization degree 1, we run the experiments in worker processes forked from a fork server
+        #      in order to get around https://github.com/potassco/clingo/issues/203, see `create_worker_pool`
+        with create_worker_pool(processes=run_experiments_parallel, max_tasks_per_worker=max_tasks_per_worker, daemonic=cpus_per_experiment <= 1) as pool:
+            rsp_logger.info(
+                f"pool size {pool._processes} / {multiprocessing.cpu_count()} ({os.cpu_count()}) cpus on {platform.node()}, "
+                f"max_tasks_per_worker={max_tasks_per_worker}, cpus_per_experiment={cpus_per_experiment}"
+            )
+            # nicer printing when tdqm print to stderr and we have logging to stdout shown in to the same console (IDE, separated in files)
+            newline_and_flush_stdout_and_stderr()
+
+            run_and_save_one_experiment_partial = partial(
+                run_experiment_from_to_file,
+                experiment_base_directory=experiment_base_directory,
+                experiment_output_directory=experiment_output_directory,
+                csv_only=csv_only,
+                global_constants=experiment_agenda.global_constants,
+                online_unrestricted_only=online_unrestricted_only,
+                scope_processes=cpus_per_experiment,
+            )
 
-        for pid_done in tqdm.tqdm(
-            pool.imap_unordered(run_and_save_one_experiment_partial, experiment_agenda.experiments), total=len(experiment_agenda.experiments)
-        ):
-            # unsafe use of inner API
-            procs = [f"{str(proc)}={proc.pid}" for proc in pool._pool]
-            rsp_logger.info(f"pid {pid_done} done. Pool: {procs}")
+            for pid_done in tqdm.tqdm(
+                pool.imap_unordered(run_and_save_one_experiment_partial, experiment_agenda.experiments), total=len(experiment_agenda.experiments)
+            ):
+                # unsafe use of inner API
+                procs = [f"{str(proc)}={proc.pid}" for proc in pool._pool]
+                rsp_logger.info(f"pid {pid_done} done. Pool: {procs}")
+
+        compact_analysis_store(experiment_data_directory, online_unrestricted_only=online_unrestricted_only)
 
         # nicer printing when tdqm print to stderr and we have logging to stdout shown in to the same console (IDE)
         newline_and_flush_stdout_and_stderr()
@@ -887,12 +1093,12 @@ def create_infrastructure_and_schedule_from_ranges(
     )
 
     # generate schedules in parallel
-    pool = multiprocessing.Pool(processes=run_experiments_parallel, maxtasksperchild=1)
     gen_and_save_schedule_partial = partial(gen_and_save_schedule, base_directory=base_directory)
-    for done in tqdm.tqdm(
-        pool.imap_unordered(gen_and_save_schedule_partial, list_of_schedule_parameters_to_generate), total=len(list_of_schedule_parameters_to_generate)
-    ):
-        rsp_logger.info(f"done: {done}")
+    with create_worker_pool(processes=run_experiments_parallel) as pool:
+        for done in tqdm.tqdm(
+            pool.imap_unordered(gen_and_save_schedule_partial, list_of_schedule_parameters_to_generate), total=len(list_of_schedule_parameters_to_generate)
+        ):
+            rsp_logger.info(f"done: {done}")
 
     # expand schedule parameters and get full list
     list_of_schedule_parameters: List[ScheduleParameters] = list(
@@ -916,7 +1122,7 @@ def list_infrastructure_and_schedule_params_from_base_directory(
         infra, infra_parameters = load_infrastructure(base_directory=base_directory, infra_id=infra_id)
         if debug:
             for agent_id, topo in infra.topo_dict.items():
-                print(f"    {agent_id} has {len(get_paths_in_route_dag(topo))} paths in infra {infra_id}")
+                print(f"    {agent_id} has {get_number_of_paths_in_route_dag(topo)} paths in infra {infra_id}")
         infra_parameters_list.append(infra_parameters)
         schedule_dir = f"{base_directory}/infra/{infra_id:03d}/schedule"
         if not os.path.isdir(schedule_dir):
@@ -0,0 +1,62 @@
+"""Per-worker memo of infrastructures and schedules in an agenda run.
+
+Many experiments of an agenda share the same infrastructure and schedule. A worker unpickles them once and keeps the
+most recently used ones in memory for its next experiments. A memoized entry is only reused while the pickles have the
+same modification time.
+
+This is a memo in each worker process, not a store shared between the workers: every worker unpickles an
+infrastructure and schedule once. Sharing the pickled bytes between processes (shared memory or memory-mapped files)
+would only save reading the files, since the route DAGs are `networkx` graphs that every process has to rebuild as
+Python objects anyway.
+
+The memoized objects are shared between the experiments run in a worker and must not be modified
+(`run_experiment_in_memory` only works on copy-on-write views of the route DAGs, see `topo_view`).
+"""
+import os
+from functools import lru_cache
+from typing import Tuple
+
+from rsp.global_data_configuration import EXPERIMENT_INFRA_SUBDIRECTORY_NAME
+from rsp.global_data_configuration import EXPERIMENT_SCHEDULE_SUBDIRECTORY_NAME
+from rsp.scheduling.schedule import load_schedule
+from rsp.scheduling.schedule import Schedule
+from rsp.step_02_infrastructure_generation.infrastructure import Infrastructure
+from rsp.step_02_infrastructure_generation.infrastructure import load_infrastructure
+
+# number of infrastructure and schedule pairs a worker keeps in memory
+MEMO_SIZE = 4
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _load_infrastructure_and_schedule(
+    base_directory: str, infra_id: int, schedule_id: int, infrastructure_mtime_ns: int, schedule_mtime_ns: int
+) -> Tuple[Infrastructure, Schedule]:
+    infrastructure, _ = load_infrastructure(base_directory=base_directory, infra_id=infra_id)
+    schedule, _ = load_schedule(base_directory=base_directory, infra_id=infra_id, schedule_id=schedule_id)
+    return infrastructure, schedule
+
+
+def load_infrastructure_and_schedule_memoized(base_directory: str, infra_id: int, schedule_id: int) -> Tuple[Infrastructure, Schedule]:
+    """Load a persisted infrastructure and schedule on it; the last
+    `MEMO_SIZE` loaded in this process are kept in memory and must not be
+    modified.
+
+    Parameters
+    ----------
+    base_directory
+        base for infrastructures and schedules
+    infra_id
+    schedule_id
+
+    Returns
+    -------
+    Tuple[Infrastructure, Schedule]
+    """
+    infra_folder = os.path.join(base_directory, EXPERIMENT_INFRA_SUBDIRECTORY_NAME, f"{infra_id:03d}")
+    return _load_infrastructure_and_schedule(
+        base_directory=base_directory,
+        infra_id=infra_id,
+        schedule_id=schedule_id,
+        infrastructure_mtime_ns=os.stat(os.path.join(infra_folder, "infrastructure.pkl")).st_mtime_ns,
+        schedule_mtime_ns=os.stat(os.path.join(infra_folder, EXPERIMENT_SCHEDULE_SUBDIRECTORY_NAME, f"{schedule_id:03d}", "schedule.pkl")).st_mtime_ns,
+    )
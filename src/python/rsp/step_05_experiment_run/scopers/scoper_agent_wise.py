@@ -3,7 +3,9 @@ from enum import Enum
 import networkx as nx
 from flatland.envs.rail_trainrun_data_structures import Trainrun
 
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.scheduling.scheduling_problem import topo_view
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.step_05_experiment_run.scopers.scoper_online_unrestricted import scoper_online_unrestricted
 
@@ -37,17 +39,17 @@ def scoper_agent_wise(
 
     if agent_wise_change == AgentWiseChange.unrestricted:
         route_dag_constraints = online_unrestricted_problem.route_dag_constraints_dict[agent_id]
-        return route_dag_constraints.earliest.copy(), route_dag_constraints.latest.copy(), online_unrestricted_problem.topo_dict[agent_id].copy()
+        return route_dag_constraints.earliest.copy(), route_dag_constraints.latest.copy(), topo_view(online_unrestricted_problem.topo_dict[agent_id])
     elif agent_wise_change == AgentWiseChange.fully_restricted:
         schedule = {trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in set(schedule_trainrun)}
         nodes_to_keep = {trainrun_waypoint.waypoint for trainrun_waypoint in schedule_trainrun}
         nodes_to_remove = {node for node in topo_.nodes if node not in nodes_to_keep}
-        topo_.remove_nodes_from(nodes_to_remove)
+        remove_nodes_from_topo(topo_, nodes_to_remove)
         return schedule, schedule, topo_
     elif agent_wise_change == AgentWiseChange.route_restricted:
         schedule_waypoints = {trainrun_waypoint.waypoint for trainrun_waypoint in schedule_trainrun}
         to_remove = {node for node in topo_.nodes if node not in schedule_waypoints}
-        topo_.remove_nodes_from(to_remove)
+        remove_nodes_from_topo(topo_, to_remove)
         earliest, latest = scoper_online_unrestricted(
             agent_id=agent_id,
             topo_=topo_,
@@ -12,9 +12,11 @@ from rsp.scheduling.propagate import propagate
 from rsp.scheduling.propagate import verify_consistency_of_route_dag_constraints_for_agent
 from rsp.scheduling.propagate import verify_trainrun_satisfies_route_dag_constraints
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraints
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.scheduling.scheduling_problem import topo_view
 from rsp.scheduling.scheduling_problem import TopoDict
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.step_05_experiment_run.scopers.scoper_online_unrestricted import _extract_route_section_penalties
@@ -70,9 +72,9 @@ def scoper_offline_delta(
     if rsp_logger.isEnabledFor(logging.DEBUG):
         rsp_logger.debug(f"waypoints_same_location={waypoints_same_location}")
 
-    topo_out = topo_.copy()
+    topo_out = topo_view(topo_)
     to_remove = set(topo_out.nodes).difference(schedule_waypoints.union(reschedule_waypoints))
-    topo_out.remove_nodes_from(to_remove)
+    remove_nodes_from_topo(topo_out, to_remove)
 
     earliest_dict = {}
     latest_dict = {}
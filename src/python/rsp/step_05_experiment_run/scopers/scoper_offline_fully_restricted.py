@@ -5,6 +5,7 @@ import numpy as np
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
 from rsp.scheduling.propagate import verify_consistency_of_route_dag_constraints_for_agent
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraints
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
@@ -63,7 +64,7 @@ def scoper_offline_fully_restricted_for_all_agents(
         reschedule = {trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in set(online_unrestricted_trainrun)}
         nodes_to_keep = {trainrun_waypoint.waypoint for trainrun_waypoint in online_unrestricted_trainrun}
         nodes_to_remove = {node for node in topo_.nodes if node not in nodes_to_keep}
-        topo_.remove_nodes_from(nodes_to_remove)
+        remove_nodes_from_topo(topo_, nodes_to_remove)
         freeze_dict[agent_id] = RouteDAGConstraints(earliest=reschedule, latest=reschedule)
 
     # TODO SIM-324 pull out verification
@@ -5,6 +5,7 @@ import numpy as np
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
 from rsp.scheduling.propagate import verify_consistency_of_route_dag_constraints_for_agent
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.scheduling.scheduling_problem import TopoDict
@@ -62,7 +63,7 @@ def scoper_online_route_restricted_for_all_agents(
         topo_ = topo_dict_[agent_id]
         schedule_waypoints = {trainrun_waypoint.waypoint for trainrun_waypoint in schedule_trainrun}
         to_remove = {node for node in topo_.nodes if node not in schedule_waypoints}
-        topo_.remove_nodes_from(to_remove)
+        remove_nodes_from_topo(topo_, to_remove)
         freeze_dict[agent_id] = scoper_online_unrestricted(
             agent_id=agent_id,
             topo_=topo_,
@@ -12,6 +12,7 @@ from rsp.scheduling.propagate import propagate
 from rsp.scheduling.propagate import verify_consistency_of_route_dag_constraints_for_agent
 from rsp.scheduling.propagate import verify_trainrun_satisfies_route_dag_constraints
 from rsp.scheduling.scheduling_problem import get_sinks_for_topo
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraints
 from rsp.scheduling.scheduling_problem import RouteSectionPenaltiesDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
@@ -180,7 +181,7 @@ def scoper_online_unrestricted(
     elif malfunction.time_step >= schedule_trainrun[-2].scheduled_at:
         rsp_logger.log(level=VERBOSE, msg=f"_generic_route_dag_contraints_for_rescheduling (3) for {agent_id}: malfunction after scheduled arrival")
         visited = {trainrun_waypoint.waypoint for trainrun_waypoint in schedule_trainrun}
-        topo_.remove_nodes_from(set(topo_.nodes).difference(visited))
+        remove_nodes_from_topo(topo_, set(topo_.nodes).difference(visited))
         return RouteDAGConstraints(
             earliest={trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in schedule_trainrun},
             latest={trainrun_waypoint.waypoint: trainrun_waypoint.scheduled_at for trainrun_waypoint in schedule_trainrun},
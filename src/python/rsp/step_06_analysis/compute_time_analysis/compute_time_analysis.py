@@ -172,6 +172,8 @@ def hypothesis_one_analysis_visualize_speed_up(
             ("speed_up", "Speed-up full solver time"),
             ("speed_up_solve_time", "Speed-up solver time solving only"),
             ("speed_up_non_solve_time", "Speed-up solver time non-processing (grounding etc.)"),
+            ("speed_up_build_program_time", "Speed-up building the ASP program"),
+            ("speed_up_grounding_time", "Speed-up grounding"),
         ]:
             plot_binned_box_plot(
                 experiment_data=experiment_data,
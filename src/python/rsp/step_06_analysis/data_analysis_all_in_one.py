@@ -12,15 +12,18 @@ from rsp.global_data_configuration import BASELINE_DATA_FOLDER
 from rsp.global_data_configuration import EXPERIMENT_ANALYSIS_SUBDIRECTORY_NAME
 from rsp.global_data_configuration import EXPERIMENT_DATA_SUBDIRECTORY_NAME
 from rsp.resource_occupation.resource_occupation import extract_resource_occupations_for_all_scopes
-from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import get_number_of_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.scheduling.scheduling_problem import ScheduleProblemEnum
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.step_05_experiment_run.experiment_results import ExperimentResults
 from rsp.step_05_experiment_run.experiment_results_analysis import convert_list_of_experiment_results_analysis_to_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis import ExperimentResultsAnalysis
+from rsp.step_05_experiment_run.experiment_results_analysis import FILTER_EXPERIMENT_RESULTS_ANALYSIS_COLUMNS
 from rsp.step_05_experiment_run.experiment_results_analysis import filter_experiment_results_analysis_data_frame
 from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_and_expand_experiment_results_from_data_folder
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_experiment_results_analysis_data_frame
+from rsp.step_05_experiment_run.experiment_results_analysis_store import experiment_ids_in_analysis_store
 from rsp.step_06_analysis.compute_time_analysis.asp_plausi import visualize_asp_problem_reduction
 from rsp.step_06_analysis.compute_time_analysis.asp_plausi import visualize_asp_solver_stats
 from rsp.step_06_analysis.compute_time_analysis.compute_time_analysis import hypothesis_one_analysis_prediction_quality
@@ -33,6 +36,7 @@ from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analy
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_agent_speeds
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_changed_agents
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_histogram_from_delay_data
+from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_incumbent_traces
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_nb_route_alternatives
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_resource_occupation_heat_map
 from rsp.step_06_analysis.detailed_experiment_analysis.detailed_experiment_analysis import plot_route_dag
@@ -61,7 +65,15 @@ from rsp.transmission_chains.transmission_chains import extract_transmission_cha
 from rsp.utils.file_utils import check_create_folder
 
 
-def hypothesis_one_data_analysis(experiment_output_directory: str, qualitative_analysis_experiment_ids: List[int] = None, save_as_tsv: bool = False):
+def hypothesis_one_data_analysis(
+    experiment_output_directory: str,
+    qualitative_analysis_experiment_ids: List[int] = None,
+    save_as_tsv: bool = False,
+    experiment_ids: Optional[List[int]] = None,
+    columns: Optional[List[str]] = None,
+    nb_processes: int = 1,
+    write_cache: bool = False,
+):
     """
 
     Parameters
@@ -72,6 +84,14 @@ def hypothesis_one_data_analysis(experiment_output_directory: str, qualitative_a
     save_as_tsv
     qualitative_analysis_experiment_ids
         run detailed analysis and malfunction analysis on these experiments
+    experiment_ids
+        experiments for the quantitative analysis, all if `None`
+    columns
+        columns for the quantitative analysis, all if `None`; only used when loading from the analysis store,
+        the columns needed by `filter_experiment_results_analysis_data_frame` are always loaded
+    nb_processes
+    write_cache
+        expansion of the pickles, see `iterate_expanded_experiment_results_from_data_folder`
     """
 
     # Import the desired experiment results
@@ -81,10 +101,23 @@ def hypothesis_one_data_analysis(experiment_output_directory: str, qualitative_a
     # Create output directoreis
     check_create_folder(experiment_analysis_directory)
 
-    _, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(experiment_data_folder_name=experiment_data_directory)
+    if len(experiment_ids_in_analysis_store(experiment_data_directory)) > 0:
+        if columns is not None:
+            columns = columns + [column for column in FILTER_EXPERIMENT_RESULTS_ANALYSIS_COLUMNS if column not in columns]
+        experiment_data: DataFrame = load_experiment_results_analysis_data_frame(
+            experiment_data_folder_name=experiment_data_directory, experiment_ids=experiment_ids, columns=columns
+        )
+    else:
+        _, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(
+            experiment_data_folder_name=experiment_data_directory,
+            experiment_ids=experiment_ids,
+            with_experiment_results=False,
+            nb_processes=nb_processes,
+            write_cache=write_cache,
+        )
 
-    # convert to data frame for statistical analysis
-    experiment_data: DataFrame = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_analysis_list)
+        # convert to data frame for statistical analysis
+        experiment_data: DataFrame = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_analysis_list)
     experiment_data = filter_experiment_results_analysis_data_frame(experiment_data)
 
     if save_as_tsv:
@@ -98,7 +131,10 @@ def hypothesis_one_data_analysis(experiment_output_directory: str, qualitative_a
 
     if qualitative_analysis_experiment_ids:
         experiment_results_list, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(
-            experiment_data_folder_name=experiment_data_directory, experiment_ids=qualitative_analysis_experiment_ids
+            experiment_data_folder_name=experiment_data_directory,
+            experiment_ids=qualitative_analysis_experiment_ids,
+            nb_processes=nb_processes,
+            write_cache=write_cache,
         )
         for experiment_results, experiment_results_analysis in zip(experiment_results_list, experiment_results_analysis_list):
             _route_dag_constraints_analysis(
@@ -233,6 +269,7 @@ def _malfunction_analysis(experiment_results: ExperimentResults, experiment_resu
     plot_histogram_from_delay_data(experiment_results_analysis=experiment_results_analysis, output_folder=output_folder_of_interest)
     plot_lateness(experiment_results_analysis=experiment_results_analysis, output_folder=output_folder_of_interest)
     plot_agent_specific_delay(experiment_results_analysis=experiment_results_analysis, output_folder=output_folder_of_interest)
+    plot_incumbent_traces(experiment_results_analysis=experiment_results_analysis, output_folder=output_folder_of_interest)
 
 
 def _route_dag_constraints_analysis(
@@ -388,8 +425,8 @@ def _make_title(
         f"agent {agent_id}/{n_agents}\n"
         f"{malfunction}\n"
         f"k={k}\n"
-        f"all paths in topo {len(get_paths_in_route_dag(topo))}\n"
-        f"open paths in topo {len(get_paths_in_route_dag(topo))}\n"
+        f"all paths in topo {get_number_of_paths_in_route_dag(topo)}\n"
+        f"open paths in topo {get_number_of_paths_in_route_dag(topo)}\n"
     )
     if costs is not None:
         title += f"costs (all)={costs}\n"
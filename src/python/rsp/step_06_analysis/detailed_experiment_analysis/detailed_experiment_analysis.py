@@ -26,7 +26,8 @@ from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
 from rsp.resource_occupation.resource_occupation import extract_resource_occupations
 from rsp.resource_occupation.resource_occupation import ScheduleAsResourceOccupations
-from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
+from rsp.scheduling.schedule import get_answer_set
+from rsp.scheduling.scheduling_problem import get_number_of_paths_in_route_dag
 from rsp.scheduling.scheduling_problem import path_stats
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
@@ -62,7 +63,7 @@ def plot_shared_heatmap(plotting_information: PlottingInformation, experiment_re
     for scope in all_scopes:
         result = experiment_result._asdict()[f"results_{scope}"]
         title = scope
-        shared = list(filter(lambda s: s.startswith("shared"), result.solver_result))
+        shared = list(filter(lambda s: s.startswith("shared"), get_answer_set(result)))
         shared_per_resource = {}
         for sh in shared:
             sh = sh.replace("shared", "")
@@ -305,6 +306,47 @@ def plot_agent_specific_delay(experiment_results_analysis: ExperimentResultsAnal
         fig.write_image(pdf_file, width=PDF_WIDTH, height=PDF_HEIGHT)
 
 
+def plot_incumbent_traces(experiment_results_analysis: ExperimentResultsAnalysis, output_folder: Optional[str] = None, scopes: List[str] = None):
+    """Plot the costs of the incumbents over solve time per scope to see how
+    quickly the solver converges (anytime behaviour).
+
+    Parameters
+    ----------
+    experiment_results_analysis
+    output_folder
+    scopes
+        defaults to `rescheduling_scopes`
+    """
+    experiment_id = experiment_results_analysis.experiment_id
+    fig = go.Figure()
+    if scopes is None:
+        scopes = rescheduling_scopes
+    for scope in scopes:
+        incumbent_trace = experiment_results_analysis._asdict()[f"incumbent_trace_{scope}"]
+        if len(incumbent_trace) == 0:
+            continue
+        fig.add_trace(
+            go.Scatter(
+                x=[entry.elapsed for entry in incumbent_trace],
+                y=[entry.costs for entry in incumbent_trace],
+                mode="lines+markers",
+                line_shape="hv",
+                name=scope,
+                hovertext=[f"lateness={entry.costs_from_lateness}, route penalties={entry.costs_from_route_section_penalties}" for entry in incumbent_trace],
+            )
+        )
+    fig.update_layout(title_text=f"Costs of incumbents over solve time for experiment {experiment_id}")
+    fig.update_xaxes(title="Solve time [s]")
+    fig.update_yaxes(title="Costs [-]")
+    if output_folder is None:
+        fig.show()
+    else:
+        check_create_folder(output_folder)
+        pdf_file = os.path.join(output_folder, f"incumbent_traces_experiment_{experiment_id:03d}.pdf")
+        # https://plotly.com/python/static-image-export/
+        fig.write_image(pdf_file, width=PDF_WIDTH, height=PDF_HEIGHT)
+
+
 def plot_changed_agents(experiment_results: ExperimentResults, output_folder: Optional[str] = None):
     """Plot a histogram of the delay of agents in the full and reschedule delta
     perfect compared to the schedule.
@@ -716,7 +758,7 @@ def plot_nb_route_alternatives(experiment_results: ExperimentResults, output_fol
     fig = go.Figure()
     for scope in all_scopes:
         topo_dict = experiment_results._asdict()[f"problem_{scope}"].topo_dict
-        values = [len(get_paths_in_route_dag(topo)) for _, topo in topo_dict.items()]
+        values = [get_number_of_paths_in_route_dag(topo) for _, topo in topo_dict.items()]
         fig.add_trace(go.Bar(x=np.arange(len(values)), y=values, name=f"{scope}"))
     fig.update_traces(opacity=0.75)
     fig.update_layout(title_text="Routing alternatives")
@@ -781,7 +823,7 @@ def plot_time_window_sizes(experiment_results: ExperimentResults, output_folder:
 def print_path_stats(experiment_results: ExperimentResults):
     for scope in all_scopes:
         problem: ScheduleProblemDescription = experiment_results._asdict()[f"problem_{scope}"]
-        nb_paths = [len(get_paths_in_route_dag(topo)) for _, topo in problem.topo_dict.items()]
+        nb_paths = [get_number_of_paths_in_route_dag(topo) for _, topo in problem.topo_dict.items()]
         print(f"{scope}: " + path_stats(nb_paths))
 
 
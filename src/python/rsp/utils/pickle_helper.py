@@ -1,12 +1,44 @@
+"""Pickle files of rsp: infrastructures, schedules, agendas and experiment
+results.
+
+`_pickle_dump` optionally streams the pickle through a compression (experiment results are written with
+`default_pickle_compression()`: zstd or lz4 if installed, else gzip; everything else as raw pickle, which loads
+fastest) and `_pickle_load` detects the compression from the magic bytes of the file, so raw pickles keep loading.
+
+Run this module to compare size and load time of the compressions on a pickled file:
+
+    python src/python/rsp/utils/pickle_helper.py <file>
+"""
 import _pickle
+import gzip
+import io
 import os
 import pickle
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from enum import Enum
 from typing import Any
+from typing import BinaryIO
+from typing import Dict
+from typing import Iterator
 from typing import Optional
+from typing import Tuple
 
 from rsp.utils.file_utils import check_create_folder
 from rsp.utils.rsp_logger import rsp_logger
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
 MODULE_RENAME_MAPPING = {
     # -> rsp.scheduling
     ("rsp.schedule_problem_description.data_types_and_utils", "TopoDict"): ("rsp.scheduling.scheduling_problem", "TopoDict"),
@@ -100,25 +132,165 @@ class RenameUnpickler(pickle.Unpickler):
             raise e
 
 
-def _pickle_dump(obj: Any, file_name: str, folder: Optional[str] = None):
+class PickleCompression(Enum):
+    # raw pickle, as written before compression was introduced
+    none = "none"
+    gzip = "gzip"
+    # optional dependency `lz4`
+    lz4 = "lz4"
+    # optional dependency `zstandard`
+    zstd = "zstd"
+
+
+# magic bytes of the compressed streams, to detect the compression on load (a raw pickle starts with b"\x80")
+_MAGIC = {
+    PickleCompression.gzip: b"\x1f\x8b",
+    PickleCompression.lz4: b"\x04\x22\x4d\x18",
+    PickleCompression.zstd: b"\x28\xb5\x2f\xfd",
+}
+# fast compression: the results are I/O bound to load, not to compress
+GZIP_COMPRESSLEVEL = 1
+ZSTD_LEVEL = 3
+
+# errors of corrupt or truncated compressed streams (`gzip.BadGzipFile` is an `OSError`, lz4 raises `RuntimeError`)
+_DECOMPRESSION_ERRORS = (
+    (OSError, EOFError, zlib.error) + ((RuntimeError,) if lz4_frame is not None else ()) + ((zstandard.ZstdError,) if zstandard is not None else ())
+)
+
+
+def default_pickle_compression() -> PickleCompression:
+    """Best compression available: zstd, lz4 or gzip (from the standard
+    library)."""
+    if zstandard is not None:
+        return PickleCompression.zstd
+    if lz4_frame is not None:
+        return PickleCompression.lz4
+    return PickleCompression.gzip
+
+
+def _detect_pickle_compression(handle: BinaryIO) -> PickleCompression:
+    head = handle.read(4)
+    handle.seek(0)
+    for compression, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return PickleCompression.none
+
+
+@contextmanager
+def _compressed_writer(handle: BinaryIO, compression: PickleCompression) -> Iterator[BinaryIO]:
+    if compression == PickleCompression.none:
+        yield handle
+    elif compression == PickleCompression.gzip:
+        with gzip.GzipFile(fileobj=handle, mode="wb", compresslevel=GZIP_COMPRESSLEVEL) as writer:
+            yield writer
+    elif compression == PickleCompression.lz4:
+        with lz4_frame.LZ4FrameFile(handle, mode="wb") as writer:
+            yield writer
+    else:
+        with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(handle) as writer:
+            yield writer
+
+
+@contextmanager
+def _decompressed_reader(handle: BinaryIO, compression: PickleCompression) -> Iterator[BinaryIO]:
+    if compression == PickleCompression.none:
+        yield handle
+    elif compression == PickleCompression.gzip:
+        with gzip.GzipFile(fileobj=handle, mode="rb") as reader:
+            yield reader
+    elif compression == PickleCompression.lz4:
+        with lz4_frame.LZ4FrameFile(handle, mode="rb") as reader:
+            yield reader
+    else:
+        with zstandard.ZstdDecompressor().stream_reader(handle) as reader:
+            # the unpickler reads many small pieces
+            yield io.BufferedReader(reader)
+
+
+def _pickle_dump(obj: Any, file_name: str, folder: Optional[str] = None, compression: PickleCompression = PickleCompression.none):
+    """Pickle `obj` to a file, streamed through the compression.
+
+    Parameters
+    ----------
+    obj
+    file_name
+    folder
+        if given, `file_name` is relative to it
+    compression
+        raw pickle by default, which loads fastest
+    """
     file_path = file_name
     if folder is not None:
         file_path = os.path.join(folder, file_name)
         check_create_folder(folder)
     else:
         check_create_folder(os.path.dirname(file_name))
-    with open(file_path, "wb") as handle:
-        pickle.dump(obj, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(file_path, "wb") as handle, _compressed_writer(handle, compression) as writer:
+        pickle.dump(obj, writer, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 def _pickle_load(file_name: str, folder: Optional[str] = None):
+    """Unpickle a file written by `_pickle_dump`, with any compression (or
+    none), renaming moved classes (see `MODULE_RENAME_MAPPING`)."""
     file_path = file_name
     if folder is not None:
         file_path = os.path.join(folder, file_name)
     with open(file_path, "rb") as handle:
+        compression = _detect_pickle_compression(handle)
         try:
-            return RenameUnpickler(handle).load()
+            with _decompressed_reader(handle, compression) as reader:
+                return RenameUnpickler(reader).load()
         except (_pickle.UnpicklingError, ModuleNotFoundError) as e:
             rsp_logger.error(f"Failed unpickling {file_path}")
             rsp_logger.error(e, exc_info=True)
             raise e
+        except _DECOMPRESSION_ERRORS as e:
+            rsp_logger.error(f"Failed reading {file_path} ({compression.value})")
+            rsp_logger.error(e, exc_info=True)
+            raise e
+
+
+def benchmark_pickle_compression(file_name: str, folder: Optional[str] = None, repetitions: int = 3) -> Dict[PickleCompression, Tuple[int, float]]:
+    """Re-write a pickled file with every available compression and measure
+    the file size and the load time (best of `repetitions`).
+
+    Parameters
+    ----------
+    file_name
+    folder
+    repetitions
+
+    Returns
+    -------
+    Dict[PickleCompression, Tuple[int, float]]
+        size in bytes and load time in seconds per compression
+    """
+    obj = _pickle_load(file_name=file_name, folder=folder)
+    available = [PickleCompression.none, PickleCompression.gzip]
+    if lz4_frame is not None:
+        available.append(PickleCompression.lz4)
+    if zstandard is not None:
+        available.append(PickleCompression.zstd)
+    benchmark = {}
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        for compression in available:
+            tmp_file = os.path.join(tmp_folder, f"{compression.value}.pkl")
+            _pickle_dump(obj=obj, file_name=tmp_file, compression=compression)
+            load_times = []
+            for _ in range(repetitions):
+                start_time = time.perf_counter()
+                _pickle_load(file_name=tmp_file)
+                load_times.append(time.perf_counter() - start_time)
+            benchmark[compression] = (os.path.getsize(tmp_file), min(load_times))
+    size_none, load_time_none = benchmark[PickleCompression.none]
+    for compression, (size, load_time) in benchmark.items():
+        rsp_logger.info(
+            f"{compression.value:>5}: {size / 1024 ** 2:8.2f} MB ({size / size_none:5.1%}), load {load_time:7.3f}s ({load_time / load_time_none:5.1%}) "
+            f"of {file_name}"
+        )
+    return benchmark
+
+
+if __name__ == "__main__":
+    benchmark_pickle_compression(file_name=sys.argv[1])
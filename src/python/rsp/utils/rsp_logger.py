@@ -1,4 +1,4 @@
-import logging
+import logging.handlers
 import sys
 
 VERBOSE = 15
@@ -26,3 +26,20 @@ def add_file_handler_to_rsp_logger(file_name: str, log_level=logging.INFO) -> lo
 def remove_file_handler_from_rsp_logger(fh: logging.FileHandler):
     fh.close()
     rsp_logger.removeHandler(fh)
+
+
+# forwarding from worker processes
+def rsp_logger_queue_listener(queue) -> logging.handlers.QueueListener:
+    """Listener (to be started and stopped by the caller) passing the records
+    put into `queue` by `forward_rsp_logger_to_queue` in worker processes to
+    the current handlers of `rsp_logger`."""
+    return logging.handlers.QueueListener(queue, *rsp_logger.handlers, respect_handler_level=True)
+
+
+def forward_rsp_logger_to_queue(queue):
+    """Worker process initializer: replace the handlers of `rsp_logger` by a
+    handler putting the records into `queue`, see
+    `rsp_logger_queue_listener`."""
+    for handler in list(rsp_logger.handlers):
+        rsp_logger.removeHandler(handler)
+    rsp_logger.addHandler(logging.handlers.QueueHandler(queue))
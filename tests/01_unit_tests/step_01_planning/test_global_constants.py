@@ -0,0 +1,46 @@
+import pickle
+from typing import List
+from typing import NamedTuple
+
+from rsp.scheduling.asp.asp_data_types import ASPHeuristics
+from rsp.step_01_agenda_expansion import global_constants
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import GlobalConstants
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
+
+# `GlobalConstants` before `INCREMENTAL_RESCHEDULING` was introduced
+GlobalConstantsBefore = NamedTuple(
+    "GlobalConstants",
+    [
+        ("RELEASE_TIME", int),
+        ("SCHEDULE_HEURISTICS", List[ASPHeuristics]),
+        ("RESCHEDULE_HEURISTICS", List[ASPHeuristics]),
+        ("DELAY_MODEL_UPPER_BOUND_LINEAR_PENALTY", int),
+        ("DELAY_MODEL_PENALTY_AFTER_LINEAR", int),
+        ("DELAY_MODEL_RESOLUTION", int),
+        ("DL_PROPAGATE_PARTIAL", bool),
+        ("NB_RANDOM", int),
+    ],
+)
+GlobalConstantsBefore.__module__ = global_constants.__name__
+
+
+def test_load_global_constants_pickled_before_new_fields(monkeypatch):
+    """Constants pickled with the old field set (e.g. in an
+    `experiment_agenda.pkl`) are loaded with the defaults of the new
+    fields."""
+    constants_before = GlobalConstantsBefore(*tuple(get_defaults(release_time=2))[: len(GlobalConstantsBefore._fields)])
+    with monkeypatch.context() as m:
+        # pickle looks up the class by module and name
+        m.setattr(global_constants, "GlobalConstants", GlobalConstantsBefore)
+        pickled = pickle.dumps(constants_before)
+
+    constants = pickle.loads(pickled)
+    assert type(constants) == GlobalConstants
+    assert constants.RELEASE_TIME == 2
+    assert not constants.INCREMENTAL_RESCHEDULING
+    assert not constants.PRECOMPUTE_SHARED
+    assert constants.RESCHEDULE_DEADLINE is None
+    assert constants.VERIFICATION_LEVEL == VerificationLevel.full
+    assert constants.PERSISTENCE_PROFILE == PersistenceProfile.full
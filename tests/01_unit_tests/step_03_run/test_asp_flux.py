@@ -1,14 +1,19 @@
 import time
 
+import clingo
 from flatland.core.grid.grid4 import Grid4TransitionsEnum
 from flatland.envs.observations import TreeObsForRailEnv
 from flatland.envs.predictions import ShortestPathPredictorForRailEnv
 from flatland.envs.rail_env import RailEnv
 from flatland.envs.rail_generators import rail_from_grid_transition_map
+from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
+from flatland.envs.rail_trainrun_data_structures import Waypoint
 from flatland.envs.schedule_generators import random_schedule_generator
 from flatland.utils.simple_rail import make_simple_rail
 from importlib_resources import path
 
+from rsp.scheduling.asp.asp_answer_set import answer_set_as_strings
+from rsp.scheduling.asp.asp_answer_set import decode_answer_set
 from rsp.scheduling.asp.asp_helper import _asp_helper
 from rsp.scheduling.asp.asp_helper import flux_helper
 from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
@@ -20,7 +25,7 @@ from rsp.step_03_schedule_generation.schedule_generation import create_schedule_
 def test_asp_helper():
     with path("tests.01_unit_tests.data.asp.instances", "dummy.lp") as instance_in:
         with path("rsp_encodings", "encoding.lp") as encoding_in:
-            models, _, _, _, _ = _asp_helper([instance_in, encoding_in])
+            models = _asp_helper([instance_in, encoding_in]).answer_sets
 
     print(models)
     assert len(models) == 1
@@ -33,7 +38,7 @@ def test_asp_helper():
 def test_mutual_exclusion():
     with path("tests.01_unit_tests.data.asp.instances", "dummy_two_agents.lp") as instance_in:
         with path("rsp_encodings", "encoding.lp") as encoding_in:
-            models, statistics, _, _, _ = _asp_helper([instance_in, encoding_in])
+            models = _asp_helper([instance_in, encoding_in]).answer_sets
 
     # we do not optimize, we get two models!
     for k, model in enumerate(models):
@@ -69,8 +74,9 @@ def test_simple_rail_asp_one_agent():
     )
     problem = ASPProblemDescription.factory_scheduling(schedule_problem_description=tc)
 
-    print(problem.asp_program)
-    models, stats, _, _, _ = flux_helper(problem.asp_program)
+    print(problem.get_asp_program_dump())
+    result = flux_helper(problem.asp_program, asp_facts=problem.asp_facts)
+    models, stats = result.answer_sets, result.stats
 
     solve_time = time.time() - start_solver
     print("solve_time={:5.3f}ms".format(solve_time))
@@ -90,7 +96,7 @@ def test_asp_helper_forcing():
     """Case study to freeze variables by adding facts."""
     with path("tests.01_unit_tests.data.asp.instances", "dummy_forced.lp") as instance_in:
         with path("rsp_encodings", "encoding.lp") as encoding_in:
-            models, _, _, _, _ = _asp_helper([instance_in, encoding_in])
+            models = _asp_helper([instance_in, encoding_in]).answer_sets
 
     print(models)
     assert len(models) == 1
@@ -128,7 +134,8 @@ def test_minimize_sum_of_running_times_scheduling():
         encodings.append(encoding_in)
     with path("rsp_encodings", "minimize_total_sum_of_running_times.lp") as encoding_in:
         encodings.append(encoding_in)
-    models, all_statistics, _, _, _ = _asp_helper(encodings)
+    result = _asp_helper(encodings)
+    models, all_statistics = result.answer_sets, result.stats
 
     print(models)
     assert len(models) == 1
@@ -153,7 +160,8 @@ def test_minimize_delay_rescheduling():
         encodings.append(encoding_in)
     with path("rsp_encodings", "minimize_delay.lp") as encoding_in:
         encodings.append(encoding_in)
-    models, all_statistics, _, _, _ = _asp_helper(encoding_files=encodings)
+    result = _asp_helper(encoding_files=encodings)
+    models, all_statistics = result.answer_sets, result.stats
     print(models)
     assert len(models) == 1
     assert all_statistics["summary"]["costs"][0] == 6, "found {}".format(all_statistics["summary"]["costs"][0])
@@ -171,3 +179,79 @@ def test_minimize_delay_rescheduling():
         ), "actual {}\nexpected (1) {} \nor expected (2) {}\nor expected (3) {}\ndls {}\nstatistics {}".format(
             actual, expected, second_expected, third_expected, dls, all_statistics
         )
+
+
+def test_decode_answer_set():
+    symbols = [
+        clingo.parse_term("train(t1)"),
+        clingo.parse_term("shared(t1,(((3,1),1),((3,2),1)),t2,(((3,1),1),((3,2),1)))"),
+        clingo.parse_term("shared(t2,(((3,1),1),((3,2),1)),t1,(((3,1),1),((3,2),1)))"),
+        clingo.parse_term("late(t1,((3,2),1),7,50)"),
+        clingo.parse_term("active_penalty(30,t2,(((3,1),1),((3,2),1)))"),
+        clingo.parse_term("act_penalty_for_train(t1,5,1)"),
+    ]
+    dl_assignment = [
+        (clingo.parse_term("(t1,((3,2),1))"), 7),
+        (clingo.parse_term("(t1,((3,1),1))"), 0),
+        (clingo.parse_term("(t2,((3,1),1))"), 3),
+        # not a waypoint variable
+        (clingo.parse_term("(t1,4)"), 1),
+    ]
+    answer_set = decode_answer_set(symbols=symbols, dl_assignment=dl_assignment)
+
+    assert answer_set.trainruns == {
+        1: [
+            TrainrunWaypoint(scheduled_at=0, waypoint=Waypoint(position=(3, 1), direction=1)),
+            TrainrunWaypoint(scheduled_at=7, waypoint=Waypoint(position=(3, 2), direction=1)),
+        ],
+        2: [TrainrunWaypoint(scheduled_at=3, waypoint=Waypoint(position=(3, 1), direction=1))],
+    }
+    assert answer_set.late == [50]
+    assert answer_set.active_penalty == [30]
+    assert answer_set.act_penalty_for_train == [1]
+    assert answer_set.nb_shared == 2
+    strings = answer_set_as_strings(answer_set)
+    assert "dl((t1,((3,2),1)),7)" in strings
+    assert "dl((t1,4),1)" in strings
+    assert "late(t1,((3,2),1),7,50)" in strings
+
+
+def test_keep_only_incumbent():
+    encodings = []
+    with path("tests.01_unit_tests.data.asp.instances", "dummy_two_agents_rescheduling.lp") as instance_in:
+        encodings.append(instance_in)
+    with path("rsp_encodings", "encoding.lp") as encoding_in:
+        encodings.append(encoding_in)
+    with path("rsp_encodings", "minimize_delay.lp") as encoding_in:
+        encodings.append(encoding_in)
+    result = _asp_helper(encoding_files=encodings, keep_only_incumbent=True)
+
+    assert len(result.answer_sets) == 1
+    assert len(result.decoded_answer_sets) == 1
+    assert len(result.incumbent_trace) >= 1
+    times = [entry.elapsed for entry in result.incumbent_trace]
+    costs = [entry.costs for entry in result.incumbent_trace]
+    assert times == sorted(times)
+    assert all(c1 > c2 for c1, c2 in zip(costs, costs[1:])), f"costs must strictly improve, found {costs}"
+    assert costs[-1] == result.stats["summary"]["costs"][0]
+    assert result.incumbent_trace[-1].costs_from_lateness == costs[-1]
+    assert result.incumbent_trace[-1].costs_from_route_section_penalties == 0
+
+
+def test_deadline_returns_best_model_found():
+    # every model has cost 1, but proving optimality requires refuting the pigeonhole principle
+    pigeonhole = """
+    pigeon(1..13). hole(1..13).
+    1 { p(I,H) : hole(H) } 1 :- pigeon(I).
+    :- p(I,H), p(J,H), I<J.
+    #minimize{ 1,I : p(I,13) }.
+    """
+    start_time = time.time()
+    result = _asp_helper(encoding_files=[], plain_encoding=pigeonhole, deadline=1.0)
+    elapsed = time.time() - start_time
+
+    assert elapsed < 10, f"deadline not respected, took {elapsed}s"
+    assert not result.stats["summary"]["models"]["optimal"]
+    assert len(result.decoded_answer_sets) == 1
+    assert [entry.costs for entry in result.incumbent_trace] == [1]
+    assert result.incumbent_trace[0].elapsed < 1.0
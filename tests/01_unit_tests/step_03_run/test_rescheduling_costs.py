@@ -4,10 +4,12 @@ import networkx as nx
 from flatland.core.grid.grid4 import Grid4TransitionsEnum
 from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.scheduling.asp.asp_data_types import ASPHeuristics
 from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
 from rsp.scheduling.asp.asp_solve_problem import solve_problem
 from rsp.scheduling.scheduling_problem import route_dag_constraints_dict_pretty_print
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
 from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
 from rsp.step_03_schedule_generation.schedule_generation import _get_route_dag_constraints_for_scheduling
 
@@ -315,3 +317,55 @@ def _make_topo2(dummy_offset: int) -> nx.DiGraph:
     topo.add_edge(Waypoint(position=(2, 1), direction=int(Grid4TransitionsEnum.SOUTH)), Waypoint(position=(3, 1), direction=int(Grid4TransitionsEnum.SOUTH)))
     topo.add_edge(Waypoint(position=(3, 1), direction=int(Grid4TransitionsEnum.SOUTH)), target_waypoint)
     return topo, edge_on_left_path, edge_on_right_path, source_waypoint, target_waypoint
+
+
+def test_schedule_heuristic_warm_start():
+    """Re-scheduling with `HEURISTIC_SCHEDULE` prefers the routes and order
+    of the given schedule: if the schedule is optimal, the first model is
+    optimal."""
+    topo, _, edge_on_second_path, source_waypoint, target_waypoint = _make_topo()
+    topo_dict = {0: topo, 1: topo}
+    minimum_travel_time = 3
+    minimum_travel_time_dict = {0: minimum_travel_time, 1: minimum_travel_time}
+    latest_arrival = 300
+
+    route_dag_constraints_dict = {
+        agent_id: _get_route_dag_constraints_for_scheduling(
+            topo=topo, source_waypoint=source_waypoint, minimum_travel_time=minimum_travel_time_dict[agent_id], latest_arrival=latest_arrival
+        )
+        for agent_id, topo in topo_dict.items()
+    }
+    reschedule_problem_description = ScheduleProblemDescription(
+        route_dag_constraints_dict,
+        minimum_travel_time_dict=minimum_travel_time_dict,
+        topo_dict=topo_dict,
+        max_episode_steps=latest_arrival,
+        route_section_penalties={0: {edge_on_second_path: 5}, 1: {edge_on_second_path: 5}},
+        weight_lateness_seconds=1,
+    )
+    additional_costs_at_targets = {0: {target_waypoint: 0}, 1: {target_waypoint: 0}}
+
+    schedule, _ = solve_problem(
+        problem=ASPProblemDescription.factory_rescheduling(
+            schedule_problem_description=reschedule_problem_description, additional_costs_at_targets=additional_costs_at_targets
+        )
+    )
+
+    try:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults(reschedule_heuristics=[ASPHeuristics.HEURISTIC_SCHEDULE]))
+        reschedule_problem: ASPProblemDescription = ASPProblemDescription.factory_rescheduling(
+            schedule_problem_description=reschedule_problem_description,
+            additional_costs_at_targets=additional_costs_at_targets,
+            schedule_trainruns=schedule.trainruns_dict,
+        )
+        assert len([fact for fact in reschedule_problem.asp_program if fact.startswith("schedule_route(")]) == sum(
+            len(trainrun) - 1 for trainrun in schedule.trainruns_dict.values()
+        )
+        assert len([fact for fact in reschedule_problem.asp_program if fact.startswith("schedule_seq(")]) > 0
+        solution, asp_solution = solve_problem(problem=reschedule_problem)
+    finally:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
+
+    assert solution.optimization_costs == schedule.optimization_costs
+    first_model_costs = asp_solution.asp_solution.incumbent_trace[0].costs
+    assert first_model_costs == schedule.optimization_costs
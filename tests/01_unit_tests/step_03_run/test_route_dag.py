@@ -1,8 +1,34 @@
+import itertools
+
 import networkx as nx
+import numpy as np
+import pytest
+from flatland.envs.rail_trainrun_data_structures import Waypoint
 
+from rsp.scheduling.route_dag import route_dag_edges
+from rsp.scheduling.route_dag import route_dag_from_topo
+from rsp.scheduling.route_dag import route_dag_has_node
+from rsp.scheduling.route_dag import route_dag_nodes
+from rsp.scheduling.route_dag import route_dag_predecessors
+from rsp.scheduling.route_dag import route_dag_reachable_given_must_be_visited
+from rsp.scheduling.route_dag import route_dag_remove_nodes
+from rsp.scheduling.route_dag import route_dag_sinks
+from rsp.scheduling.route_dag import route_dag_sources
+from rsp.scheduling.route_dag import route_dag_successors
+from rsp.scheduling.route_dag import route_dag_to_topo
+from rsp.scheduling.schedule import load_schedule
+from rsp.scheduling.scheduling_problem import get_number_of_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import get_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import get_sinks_for_topo
+from rsp.scheduling.scheduling_problem import get_sources_for_topo
+from rsp.scheduling.scheduling_problem import get_waypoints_on_all_paths_in_route_dag
+from rsp.scheduling.scheduling_problem import has_path_in_route_dag
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import RouteDAGConstraints
 from rsp.scheduling.scheduling_problem import schedule_problem_description_equals
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
+from rsp.scheduling.scheduling_problem import topo_view
+from rsp.step_02_infrastructure_generation.infrastructure import load_infrastructure
 
 
 def test_schedule_problem_description_equals():
@@ -28,3 +54,144 @@ def test_schedule_problem_description_equals():
     assert s1 != s2
     assert not schedule_problem_description_equals(s1, s2)
     assert schedule_problem_description_equals(s2, s2)
+
+
+def _assert_route_dag_equals_topo(dag, topo: nx.DiGraph):
+    assert set(route_dag_nodes(dag)) == set(topo.nodes)
+    assert set(route_dag_edges(dag)) == set(topo.edges)
+    assert set(route_dag_sources(dag)) == set(get_sources_for_topo(topo))
+    assert set(route_dag_sinks(dag)) == set(get_sinks_for_topo(topo))
+    for waypoint in topo.nodes:
+        assert route_dag_has_node(dag, waypoint)
+        assert set(route_dag_successors(dag, waypoint)) == set(topo.successors(waypoint))
+        assert set(route_dag_predecessors(dag, waypoint)) == set(topo.predecessors(waypoint))
+
+
+def test_route_dag_remove_nodes():
+    topo = nx.DiGraph()
+    a, b, c, d = [Waypoint(position=(0, i), direction=1) for i in range(4)]
+    # diamond a -> {b, c} -> d
+    topo.add_edges_from([(a, b), (a, c), (b, d), (c, d)])
+    dag = route_dag_from_topo(topo)
+    assert route_dag_nodes(dag) == list(nx.topological_sort(topo))
+    _assert_route_dag_equals_topo(dag, topo)
+
+    restricted = route_dag_remove_nodes(dag, [b, Waypoint(position=(5, 5), direction=0)])
+    # the original is not modified, arrays are shared
+    _assert_route_dag_equals_topo(dag, topo)
+    assert restricted.edge_targets is dag.edge_targets
+    assert not route_dag_has_node(restricted, b)
+    topo.remove_node(b)
+    _assert_route_dag_equals_topo(restricted, topo)
+
+    # removing the only path leaves a and d as sources and sinks
+    restricted = route_dag_remove_nodes(restricted, [c])
+    assert route_dag_sources(restricted) == [a, d]
+    assert route_dag_sinks(restricted) == [a, d]
+
+
+def test_route_dag_from_topo_view():
+    """The route DAG of the base graph is shared by the route DAGs of its
+    views, and converted again if the base graph has been modified."""
+    topo = nx.DiGraph()
+    a, b, c, d = [Waypoint(position=(0, i), direction=1) for i in range(4)]
+    topo.add_edges_from([(a, b), (a, c), (b, d), (c, d)])
+    view_1 = topo_view(topo)
+    view_2 = topo_view(topo)
+    remove_nodes_from_topo(view_1, [b])
+    dag_1 = route_dag_from_topo(view_1)
+    dag_2 = route_dag_from_topo(view_2)
+    assert dag_1.edge_targets is dag_2.edge_targets
+    _assert_route_dag_equals_topo(dag_1, view_1)
+    _assert_route_dag_equals_topo(dag_2, view_2)
+    assert route_dag_from_topo(view_1).edge_targets is dag_1.edge_targets
+
+    topo.remove_node(c)
+    view_3 = topo_view(topo)
+    dag_3 = route_dag_from_topo(view_3)
+    assert dag_3.edge_targets is not dag_1.edge_targets
+    _assert_route_dag_equals_topo(dag_3, view_3)
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda", "tests/02_regression_tests/data/alpha_beta"])
+def test_route_dag_round_trip(base_directory: str):
+    schedule, _ = load_schedule(base_directory=base_directory, infra_id=0)
+    for topo in schedule.schedule_problem_description.topo_dict.values():
+        dag = route_dag_from_topo(topo)
+        _assert_route_dag_equals_topo(dag, topo)
+        round_trip = route_dag_to_topo(dag)
+        assert set(round_trip.nodes) == set(topo.nodes)
+        assert set(round_trip.edges) == set(topo.edges)
+
+
+def _reachable_given_must_be_visited_reference(topo: nx.DiGraph, must_be_visited):
+    reachable = set(topo.nodes)
+    for waypoint in must_be_visited:
+        reachable.intersection_update(nx.descendants(topo, waypoint) | nx.ancestors(topo, waypoint) | {waypoint})
+    return reachable
+
+
+def test_route_dag_reachable_given_must_be_visited():
+    topo = nx.DiGraph()
+    a, b, c, d, e, f = [Waypoint(position=(0, i), direction=1) for i in range(6)]
+    # two diamonds a -> {b, c} -> d -> {e, f}
+    topo.add_edges_from([(a, b), (a, c), (b, d), (c, d), (d, e), (d, f)])
+    dag = route_dag_from_topo(topo)
+    for must_be_visited in [[], [a], [b], [d], [b, d], [b, e], [a, b, d, f], [b, c], [e, f], [b, c, e]]:
+        # the last ones do not lie on one path and are not reachable themselves
+        assert route_dag_reachable_given_must_be_visited(dag, must_be_visited) == _reachable_given_must_be_visited_reference(
+            topo, must_be_visited
+        ), f"must_be_visited={must_be_visited}"
+    assert route_dag_reachable_given_must_be_visited(dag, [b, e]) == {a, b, d, e}
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda", "tests/02_regression_tests/data/alpha_beta"])
+def test_route_dag_reachable_given_must_be_visited_on_paths(base_directory: str):
+    """Frozen waypoints are a prefix of a path as in the scopers, or any
+    subset of a path."""
+    infrastructure, _ = load_infrastructure(base_directory=base_directory, infra_id=0)
+    np.random.seed(42)
+    for topo in infrastructure.topo_dict.values():
+        dag = route_dag_from_topo(topo)
+        path = get_paths_in_route_dag(topo)[0]
+        for must_be_visited in [path[: len(path) // 3], [path[i] for i in sorted(np.random.choice(len(path), size=3, replace=False))]]:
+            assert route_dag_reachable_given_must_be_visited(dag, must_be_visited) == _reachable_given_must_be_visited_reference(topo, must_be_visited)
+
+
+def _all_simple_paths(topo: nx.DiGraph):
+    return [path for source in get_sources_for_topo(topo) for sink in get_sinks_for_topo(topo) for path in nx.all_simple_paths(topo, source, sink)]
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda", "tests/02_regression_tests/data/alpha_beta"])
+def test_paths_in_route_dag(base_directory: str):
+    infrastructure, _ = load_infrastructure(base_directory=base_directory, infra_id=0)
+    for topo in infrastructure.topo_dict.values():
+        expected_paths = _all_simple_paths(topo)
+        assert get_paths_in_route_dag(topo) == expected_paths
+        assert get_paths_in_route_dag(topo, number_of_paths=3) == expected_paths[:3]
+        assert get_number_of_paths_in_route_dag(topo) == len(expected_paths)
+        assert has_path_in_route_dag(topo)
+        assert get_waypoints_on_all_paths_in_route_dag(topo) == set.intersection(*[set(path) for path in expected_paths])
+
+
+def test_paths_in_route_dag_many_paths():
+    """A ladder of 40 diamonds has 2^40 paths, only the first ones must be
+    generated."""
+    topo = nx.DiGraph()
+    nb_diamonds = 40
+    for i in range(nb_diamonds):
+        entry, upper, lower, next_entry = [Waypoint(position=(i, j), direction=0) for j in range(3)] + [Waypoint(position=(i + 1, 0), direction=0)]
+        topo.add_edges_from([(entry, upper), (entry, lower), (upper, next_entry), (lower, next_entry)])
+    assert get_number_of_paths_in_route_dag(topo) == 2 ** nb_diamonds
+    first_paths = get_paths_in_route_dag(topo, number_of_paths=10)
+    assert first_paths == list(
+        itertools.islice(nx.all_simple_paths(topo, Waypoint(position=(0, 0), direction=0), Waypoint(position=(nb_diamonds, 0), direction=0)), 10)
+    )
+    assert get_waypoints_on_all_paths_in_route_dag(topo) == {Waypoint(position=(i, 0), direction=0) for i in range(nb_diamonds + 1)}
+
+    # a single node is no path
+    topo = nx.DiGraph()
+    topo.add_node(Waypoint(position=(0, 0), direction=0))
+    assert not has_path_in_route_dag(topo)
+    assert get_number_of_paths_in_route_dag(topo) == 0
+    assert get_paths_in_route_dag(topo) == []
@@ -1,12 +1,19 @@
+import copy
+import copyreg
+import pickle
 import pprint
 from collections import OrderedDict
 from typing import Any
 from typing import Dict
 
+import networkx as nx
+import numpy as np
 from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
 from flatland.envs.rail_trainrun_data_structures import Waypoint
 
 from rsp.scheduling.scheduling_problem import _get_topology_from_agents_path_dict
+from rsp.scheduling.scheduling_problem import _topo_view_base
+from rsp.scheduling.scheduling_problem import remove_nodes_from_topo
 from rsp.scheduling.scheduling_problem import route_dag_constraints_dict_from_list_of_train_run_waypoint
 from rsp.scheduling.scheduling_problem import route_dag_constraints_dict_pretty_print
 from rsp.scheduling.scheduling_problem import route_dag_constraints_pretty_print
@@ -14,6 +21,8 @@ from rsp.scheduling.scheduling_problem import RouteDAGConstraints
 from rsp.scheduling.scheduling_problem import RouteDAGConstraintsDict
 from rsp.scheduling.scheduling_problem import ScheduleProblemDescription
 from rsp.scheduling.scheduling_problem import topo_from_agent_paths
+from rsp.scheduling.scheduling_problem import topo_view
+from rsp.scheduling.scheduling_problem import TopoView
 from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
 from rsp.step_05_experiment_run.scopers.scoper_online_unrestricted import scoper_online_unrestricted_for_all_agents
 from rsp.step_05_experiment_run.scopers.scoper_online_unrestricted import scoper_online_unrestricted_running
@@ -2318,3 +2327,75 @@ def compare_dicts(actual_dict: Dict[Any, Any], expected_dict: Dict[Any, Any]):
         expected_val = expected_dict[key]
         actual_val = actual_dict[key]
         assert actual_val == expected_val, f"{key}, actual={actual_val}, expected={expected_val}"
+
+
+def test_topo_from_agent_paths_skips_loopy_paths():
+    """Paths closing a cycle with the previous paths are skipped, their
+    nodes and edges must not be in the topology."""
+    a, b, c, d = [Waypoint(position=(0, column), direction=1) for column in range(4)]
+    topo = topo_from_agent_paths([[a, b, c], [c, d, b], [a, d, c]])
+    assert list(topo.nodes) == [a, b, c, d]
+    assert list(topo.edges) == [(a, b), (a, d), (b, c), (d, c)]
+
+
+def test_topo_from_agent_paths_same_as_copying_graph():
+    """The incremental cycle check must give the same topology (including
+    the order of nodes and edges) as adding every path to a copy and checking
+    the copy for cycles."""
+    np.random.seed(42)
+    waypoints = [Waypoint(position=(row, column), direction=0) for row in range(3) for column in range(4)]
+    for _ in range(200):
+        agent_paths = [
+            [waypoints[i] for i in np.random.choice(len(waypoints), size=np.random.randint(2, 8), replace=False)] for _ in range(np.random.randint(1, 10))
+        ]
+
+        expected = nx.DiGraph()
+        for path in agent_paths:
+            topo_copy = expected.copy()
+            topo_copy.add_edges_from(zip(path, path[1:]))
+            if nx.is_directed_acyclic_graph(topo_copy):
+                expected = topo_copy
+
+        actual = topo_from_agent_paths(agent_paths)
+        assert list(actual.nodes) == list(expected.nodes)
+        assert list(actual.edges) == list(expected.edges)
+
+
+def test_topo_view_copy_on_write():
+    """Removing nodes from a view must neither modify the base topology nor
+    other views of it; views must survive pickling."""
+    a, b, c, d = [Waypoint(position=(0, column), direction=1) for column in range(4)]
+    base = topo_from_agent_paths([[a, b, d], [a, c, d]])
+
+    view_1 = topo_view(base)
+    view_2 = topo_view(base)
+    remove_nodes_from_topo(view_1, {b})
+    remove_nodes_from_topo(view_2, {c})
+    assert list(base.nodes) == [a, b, d, c]
+    assert list(view_1.edges) == [(a, c), (c, d)]
+    assert list(view_2.edges) == [(a, b), (b, d)]
+    assert list(view_1.predecessors(d)) == [c]
+
+    # a view of a view is a view of the base with a copy of the removed nodes
+    view_3 = topo_view(view_1)
+    remove_nodes_from_topo(view_3, {c})
+    assert _topo_view_base(view_3) is base
+    assert list(view_3.nodes) == [a, d]
+    assert list(view_1.nodes) == [a, d, c]
+
+    # pickled as the base graph and the removed nodes, without changing how other graphs are pickled
+    assert nx.DiGraph not in copyreg.dispatch_table
+    pickled = pickle.dumps((view_1, view_2))
+    assert b"_topo_view_of_base" not in pickled
+    unpickled_1, unpickled_2 = pickle.loads(pickled)
+    assert isinstance(unpickled_1, TopoView)
+    assert _topo_view_base(unpickled_1) is _topo_view_base(unpickled_2)
+    assert list(unpickled_1.edges) == list(view_1.edges)
+    assert list(unpickled_2.edges) == list(view_2.edges)
+    assert list(copy.deepcopy(view_1).edges) == list(view_1.edges)
+
+    # copies are plain graphs
+    view_1_copy = view_1.copy()
+    view_1_copy.remove_node(a)
+    assert list(pickle.loads(pickle.dumps(view_1_copy)).edges) == [(c, d)]
+    assert list(view_1.edges) == [(a, c), (c, d)]
@@ -1,11 +1,15 @@
 import numpy as np
 from flatland.envs.rail_trainrun_data_structures import TrainrunDict
 
+from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
 from rsp.scheduling.asp_wrapper import asp_schedule_wrapper
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentParameters
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import InfrastructureParameters
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ReScheduleParameters
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParameters
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import PersistenceProfile
 from rsp.step_02_infrastructure_generation.infrastructure import create_env_from_experiment_parameters
 from rsp.step_02_infrastructure_generation.infrastructure import create_infrastructure_from_rail_env
 from rsp.step_03_schedule_generation.schedule_generation import create_schedule_problem_description_from_instructure
@@ -231,3 +235,44 @@ def test_scheduling():
     assert (
         actual_sum_running_times == expected_total_running_times
     ), f"actual_sum_running_times={actual_sum_running_times}, expected_total_running_times={expected_total_running_times}"
+
+
+def test_scheduling_program_resource_table():
+    """Resources and release times are given once per edge and resource, not
+    once per train."""
+    static_env = create_env_from_experiment_parameters(params=test_parameters.infra_parameters)
+    schedule_problem = create_schedule_problem_description_from_instructure(
+        infrastructure=create_infrastructure_from_rail_env(static_env, 10), number_of_shortest_paths_per_agent_schedule=10
+    )
+    asp_program = ASPProblemDescription.factory_scheduling(schedule_problem_description=schedule_problem).get_asp_program_dump()
+
+    assert len(asp_program) == len(set(asp_program))
+    edges = {edge for topo in schedule_problem.topo_dict.values() for edge in topo.edges}
+    resources = {entry_waypoint.position for entry_waypoint, _ in edges}
+    assert len([fact for fact in asp_program if fact.startswith("resource(")]) == len(edges)
+    assert len([fact for fact in asp_program if fact.startswith("b(")]) == len(resources)
+    # the two trains use common resources
+    assert len(resources) < sum(len({entry_waypoint.position for entry_waypoint, _ in topo.edges}) for topo in schedule_problem.topo_dict.values())
+
+
+def test_scheduling_program_dump_only_if_kept():
+    """The program text is only built if the persistence profile keeps it;
+    the number of facts is the same."""
+    static_env = create_env_from_experiment_parameters(params=test_parameters.infra_parameters)
+    schedule_problem = create_schedule_problem_description_from_instructure(
+        infrastructure=create_infrastructure_from_rail_env(static_env, 10), number_of_shortest_paths_per_agent_schedule=10
+    )
+    try:
+        results = {}
+        for persistence_profile in [PersistenceProfile.full, PersistenceProfile.slim]:
+            GLOBAL_CONSTANTS.set_defaults(constants=get_defaults(persistence_profile=persistence_profile))
+            results[persistence_profile] = asp_schedule_wrapper(schedule_problem_description=schedule_problem, asp_seed_value=94, no_optimize=False)
+    finally:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
+    full = results[PersistenceProfile.full]
+    slim = results[PersistenceProfile.slim]
+    assert full.nb_facts == len(full.solver_program)
+    assert full.program_size == len("\n".join(full.solver_program))
+    assert slim.solver_program is None
+    assert slim.program_size is None
+    assert slim.nb_facts == full.nb_facts
@@ -0,0 +1,88 @@
+import os
+
+from rsp.step_05_experiment_run import experiment_results_analysis_load_and_save
+from rsp.step_05_experiment_run.experiment_manifest import append_to_manifest
+from rsp.step_05_experiment_run.experiment_manifest import create_manifest_entry
+from rsp.step_05_experiment_run.experiment_manifest import ExperimentStatus
+from rsp.step_05_experiment_run.experiment_results_analysis import ExperimentResultsAnalysis
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import _load_cached_analysis
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import _save_cached_analysis
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import ANALYSIS_CACHE_SUFFIX
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_and_expand_experiment_results_from_data_folder
+from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
+from rsp.utils.file_utils import check_create_folder
+from rsp.utils.pickle_helper import _pickle_dump
+
+
+def _dummy_analysis(experiment_id: int) -> ExperimentResultsAnalysis:
+    return ExperimentResultsAnalysis(*([None] * len(ExperimentResultsAnalysis._fields)))._replace(experiment_id=experiment_id)
+
+
+def test_analysis_cache(monkeypatch):
+    """The cache is taken if the pickle has the same modification time or the
+    checksum from the manifest, and expansion is skipped in the worker pool."""
+    experiment_data_directory = "target/test_analysis_cache/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        file_names = [os.path.join(experiment_data_directory, f"experiment_{experiment_id:04d}_2020_01_01T00_00_00.pkl") for experiment_id in range(3)]
+        checksums = []
+        for experiment_id, file_name in enumerate(file_names):
+            # not experiment results: loading fails unless cached
+            _pickle_dump(obj=f"experiment {experiment_id}", file_name=file_name)
+            entry = create_manifest_entry(experiment_id=experiment_id, status=ExperimentStatus.done, file_name=file_name)
+            append_to_manifest(experiment_data_directory, entry)
+            checksums.append(entry.checksum)
+            _save_cached_analysis(file_name, online_unrestricted_only=False, results_for_analysis=_dummy_analysis(experiment_id), checksum=entry.checksum)
+
+        # the pickle is only hashed if its modification time has changed
+        with monkeypatch.context() as m:
+            m.setattr(experiment_results_analysis_load_and_save, "file_checksum", None)
+            assert _load_cached_analysis(file_names[0], online_unrestricted_only=False, checksum=checksums[0]) == _dummy_analysis(0)
+        # e.g. copied data folder
+        os.utime(file_names[0], ns=(0, 0))
+        assert _load_cached_analysis(file_names[0], online_unrestricted_only=False, checksum=checksums[0]) == _dummy_analysis(0)
+        assert _load_cached_analysis(file_names[0], online_unrestricted_only=False) is None
+        # no cache for the online unrestricted expansion
+        assert _load_cached_analysis(file_names[0], online_unrestricted_only=True) is None
+
+        _, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(
+            experiment_data_directory, with_experiment_results=False, nb_processes=2
+        )
+        assert experiment_results_analysis_list == [_dummy_analysis(experiment_id) for experiment_id in range(3)]
+
+        # changed pickle: the cache is outdated, loading fails and the experiment is skipped
+        _pickle_dump(obj="experiment 1 re-run", file_name=file_names[1])
+        assert os.path.isfile(file_names[1] + ANALYSIS_CACHE_SUFFIX)
+        assert _load_cached_analysis(file_names[1], online_unrestricted_only=False, checksum=checksums[1]) is None
+        experiment_results_list, experiment_results_analysis_list = load_and_expand_experiment_results_from_data_folder(experiment_data_directory)
+        assert experiment_results_list == ["experiment 0", "experiment 2"]
+        assert experiment_results_analysis_list == [_dummy_analysis(0), _dummy_analysis(2)]
+    finally:
+        delete_experiment_folder("target/test_analysis_cache")
+
+
+def test_analysis_cache_written_on_request(monkeypatch):
+    """The cache is only written if requested, and an experiment is not lost
+    if the cache cannot be written."""
+    experiment_data_directory = "target/test_analysis_cache_written_on_request/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        file_name = os.path.join(experiment_data_directory, "experiment_0000_2020_01_01T00_00_00.pkl")
+        _pickle_dump(obj="experiment 0", file_name=file_name)
+        monkeypatch.setattr(experiment_results_analysis_load_and_save, "expand_experiment_results_for_analysis", lambda _: _dummy_analysis(0))
+
+        assert load_and_expand_experiment_results_from_data_folder(experiment_data_directory)[1] == [_dummy_analysis(0)]
+        assert not os.path.isfile(file_name + ANALYSIS_CACHE_SUFFIX)
+
+        def _fail_to_save_cached_analysis(*args, **kwargs):
+            raise PermissionError("read-only")
+
+        with monkeypatch.context() as m:
+            m.setattr(experiment_results_analysis_load_and_save, "_save_cached_analysis", _fail_to_save_cached_analysis)
+            assert load_and_expand_experiment_results_from_data_folder(experiment_data_directory, write_cache=True)[1] == [_dummy_analysis(0)]
+        assert not os.path.isfile(file_name + ANALYSIS_CACHE_SUFFIX)
+
+        assert load_and_expand_experiment_results_from_data_folder(experiment_data_directory, write_cache=True)[1] == [_dummy_analysis(0)]
+        assert _load_cached_analysis(file_name, online_unrestricted_only=False) == _dummy_analysis(0)
+    finally:
+        delete_experiment_folder("target/test_analysis_cache_written_on_request")
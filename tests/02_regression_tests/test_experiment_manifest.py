@@ -0,0 +1,72 @@
+import os
+
+from rsp.step_05_experiment_run.experiment_manifest import append_to_manifest
+from rsp.step_05_experiment_run.experiment_manifest import create_manifest_entry
+from rsp.step_05_experiment_run.experiment_manifest import ExperimentStatus
+from rsp.step_05_experiment_run.experiment_manifest import file_checksum
+from rsp.step_05_experiment_run.experiment_manifest import load_done_experiment_ids
+from rsp.step_05_experiment_run.experiment_manifest import load_manifest
+from rsp.step_05_experiment_run.experiment_manifest import MANIFEST_FILE_NAME
+from rsp.step_05_experiment_run.experiment_manifest import repair_manifest
+from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
+from rsp.utils.file_utils import check_create_folder
+
+
+def _touch(experiment_data_directory: str, file_name: str, content: bytes = b"content"):
+    with open(os.path.join(experiment_data_directory, file_name), "wb") as file_out:
+        file_out.write(content)
+
+
+def test_experiment_manifest():
+    """The last manifest entry of an experiment wins, truncated lines are
+    skipped and the manifest can be rebuilt from the data folder."""
+    experiment_data_directory = "target/test_experiment_manifest/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        # experiment 0 done, experiment 1 csv only, experiment 2 with two pkls
+        _touch(experiment_data_directory, "experiment_0000_2020_01_01T00_00_00.pkl", b"pkl 0")
+        _touch(experiment_data_directory, "experiment_0000_2020_01_01T00_00_00.csv")
+        _touch(experiment_data_directory, "experiment_0001_2020_01_01T00_00_00.csv")
+        _touch(experiment_data_directory, "experiment_0002_2020_01_01T00_00_00.pkl")
+        _touch(experiment_data_directory, "experiment_0002_2020_01_02T00_00_00.pkl")
+
+        # without manifest, it is rebuilt from the data folder
+        assert load_done_experiment_ids(experiment_data_directory) == {0}
+        manifest = load_manifest(experiment_data_directory)
+        assert set(manifest.keys()) == {0, 1}
+        assert manifest[0].status == ExperimentStatus.done
+        assert manifest[0].file_name == "experiment_0000_2020_01_01T00_00_00.pkl"
+        assert manifest[0].size == len(b"pkl 0")
+        assert manifest[0].checksum == file_checksum(os.path.join(experiment_data_directory, "experiment_0000_2020_01_01T00_00_00.pkl"))
+        assert manifest[1].status == ExperimentStatus.csv_only
+
+        # the last entry wins
+        _touch(experiment_data_directory, "experiment_0001_2020_01_02T00_00_00.pkl")
+        append_to_manifest(
+            experiment_data_directory,
+            create_manifest_entry(
+                experiment_id=1,
+                status=ExperimentStatus.done,
+                file_name=os.path.join(experiment_data_directory, "experiment_0001_2020_01_02T00_00_00.pkl"),
+                start_time="2020-01-02T00:00:00",
+                elapsed_time=1.5,
+            ),
+        )
+        append_to_manifest(experiment_data_directory, create_manifest_entry(experiment_id=3, status=ExperimentStatus.failed, elapsed_time=0.5))
+        # e.g. a worker killed while writing
+        with open(os.path.join(experiment_data_directory, MANIFEST_FILE_NAME), "a") as file_out:
+            file_out.write('{"experiment_id": 4, "status": "do')
+        assert load_done_experiment_ids(experiment_data_directory) == {0, 1}
+        manifest = load_manifest(experiment_data_directory)
+        assert manifest[1].elapsed_time == 1.5
+        assert manifest[3].status == ExperimentStatus.failed
+        assert 4 not in manifest
+
+        # repair loses the timings and the failed experiment
+        repaired = repair_manifest(experiment_data_directory)
+        assert load_manifest(experiment_data_directory) == repaired
+        assert set(repaired.keys()) == {0, 1}
+        assert repaired[1].status == ExperimentStatus.done
+        assert repaired[1].elapsed_time is None
+    finally:
+        delete_experiment_folder("target/test_experiment_manifest")
@@ -0,0 +1,120 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rsp.step_05_experiment_run.experiment_results_analysis import ExperimentResultsAnalysis
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import _save_experiment_data
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_experiment_results_analysis_data_frame
+from rsp.step_05_experiment_run.experiment_results_analysis_store import experiment_ids_in_analysis_store
+from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
+from rsp.utils.file_utils import check_create_folder
+
+COLUMNS = ["experiment_id", "max_window_size_from_earliest", "costs_online_unrestricted"]
+
+
+def _experiment_data(experiment_id: int) -> pd.DataFrame:
+    return pd.DataFrame(columns=COLUMNS, data=[[experiment_id, np.inf, 10 * experiment_id]])
+
+
+def test_load_experiment_results_analysis_data_frame_from_csv():
+    """Without analysis store, the requested columns and experiments are loaded
+    from the csvs."""
+    experiment_data_directory = "target/test_load_experiment_results_analysis_data_frame_from_csv/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        for experiment_id in range(3):
+            _experiment_data(experiment_id).to_csv(f"{experiment_data_directory}/experiment_{experiment_id:04d}_2020_01_01T00_00_00.csv")
+
+        experiment_data = load_experiment_results_analysis_data_frame(
+            experiment_data_directory, experiment_ids=[0, 2], columns=["experiment_id", "costs_online_unrestricted"]
+        )
+        assert list(experiment_data.columns) == ["experiment_id", "costs_online_unrestricted"]
+        assert sorted(experiment_data["experiment_id"]) == [0, 2]
+        assert sorted(experiment_data["costs_online_unrestricted"]) == [0, 20]
+
+        # no experiment matches
+        experiment_data = load_experiment_results_analysis_data_frame(
+            experiment_data_directory, experiment_ids=[3], columns=["experiment_id", "costs_online_unrestricted"]
+        )
+        assert list(experiment_data.columns) == ["experiment_id", "costs_online_unrestricted"]
+        assert len(experiment_data) == 0
+    finally:
+        delete_experiment_folder("target/test_load_experiment_results_analysis_data_frame_from_csv")
+
+
+def test_analysis_store():
+    """Experiments in the store are loaded with the fixed schema, the others
+    from their csvs."""
+    pytest.importorskip("pyarrow")
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import analysis_store_schema
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import load_experiment_results_analysis_from_store
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import save_experiment_results_analysis_to_store
+
+    schema = analysis_store_schema()
+    assert schema.names == [name for name in ExperimentResultsAnalysis._fields if ExperimentResultsAnalysis.__annotations__[name] in [int, float]]
+    assert str(schema.field("experiment_id").type) == "int64"
+    assert str(schema.field("max_window_size_from_earliest").type) == "double"
+
+    experiment_data_directory = "target/test_analysis_store/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        for experiment_id in range(2):
+            save_experiment_results_analysis_to_store(_experiment_data(experiment_id), experiment_data_directory, experiment_id)
+        _experiment_data(2).to_csv(f"{experiment_data_directory}/experiment_0002_2020_01_01T00_00_00.csv")
+        assert experiment_ids_in_analysis_store(experiment_data_directory) == {0, 1}
+
+        experiment_data = load_experiment_results_analysis_from_store(experiment_data_directory, experiment_ids=[1], columns=COLUMNS)
+        assert list(experiment_data.columns) == COLUMNS
+        assert experiment_data["experiment_id"].tolist() == [1]
+        assert experiment_data["max_window_size_from_earliest"].tolist() == [np.inf]
+        # all columns of the schema, missing ones as nulls
+        assert list(load_experiment_results_analysis_from_store(experiment_data_directory).columns) == schema.names
+
+        experiment_data = load_experiment_results_analysis_data_frame(experiment_data_directory, experiment_ids=[0, 2], columns=COLUMNS)
+        assert sorted(experiment_data["experiment_id"]) == [0, 2]
+        assert sorted(experiment_data["costs_online_unrestricted"]) == [0, 20]
+
+        # no csv is written when the experiment goes to the store
+        file_name = f"{experiment_data_directory}/experiment_0003_2020_01_01T00_00_00.pkl"
+        assert _save_experiment_data(_experiment_data(3), file_name=file_name, online_unrestricted_only=False).endswith("experiment_0003.parquet")
+        assert not os.path.exists(file_name.replace(".pkl", ".csv"))
+        assert experiment_ids_in_analysis_store(experiment_data_directory) == {0, 1, 3}
+    finally:
+        delete_experiment_folder("target/test_analysis_store")
+
+
+def test_compact_analysis_store():
+    """Compaction merges the partitions, partitions written afterwards
+    supersede the compacted rows."""
+    pytest.importorskip("pyarrow")
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import compact_analysis_store
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import load_experiment_results_analysis_from_store
+    from rsp.step_05_experiment_run.experiment_results_analysis_store import save_experiment_results_analysis_to_store
+
+    experiment_data_directory = "target/test_compact_analysis_store/data"
+    try:
+        check_create_folder(experiment_data_directory)
+        for experiment_id in [2, 0, 1]:
+            save_experiment_results_analysis_to_store(_experiment_data(experiment_id), experiment_data_directory, experiment_id)
+        assert compact_analysis_store(experiment_data_directory) == 3
+        assert glob.glob(f"{experiment_data_directory}/analysis_store/experiment_*.parquet") == []
+        assert experiment_ids_in_analysis_store(experiment_data_directory) == {0, 1, 2}
+        assert load_experiment_results_analysis_from_store(experiment_data_directory, columns=["experiment_id"])["experiment_id"].tolist() == [0, 1, 2]
+        experiment_data = load_experiment_results_analysis_from_store(experiment_data_directory, experiment_ids=[1], columns=["costs_online_unrestricted"])
+        assert experiment_data["costs_online_unrestricted"].tolist() == [10]
+        assert len(load_experiment_results_analysis_from_store(experiment_data_directory, experiment_ids=[3], columns=COLUMNS)) == 0
+
+        # experiment 1 run again
+        save_experiment_results_analysis_to_store(_experiment_data(1).assign(costs_online_unrestricted=11), experiment_data_directory, 1)
+        experiment_data = load_experiment_results_analysis_from_store(experiment_data_directory, columns=COLUMNS)
+        assert sorted(zip(experiment_data["experiment_id"], experiment_data["costs_online_unrestricted"])) == [(0, 0), (1, 11), (2, 20)]
+
+        assert compact_analysis_store(experiment_data_directory) == 1
+        assert compact_analysis_store(experiment_data_directory) == 0
+        experiment_data = load_experiment_results_analysis_from_store(experiment_data_directory, columns=COLUMNS)
+        assert list(zip(experiment_data["experiment_id"], experiment_data["costs_online_unrestricted"])) == [(0, 0), (1, 11), (2, 20)]
+    finally:
+        delete_experiment_folder("target/test_compact_analysis_store")
@@ -1,10 +1,12 @@
 """Run tests for different experiment methods."""
 import glob
+import os
 
 import numpy as np
 
 from rsp.global_data_configuration import EXPERIMENT_DATA_SUBDIRECTORY_NAME
 from rsp.pipeline.rsp_pipeline import generate_infras_and_schedules
+from rsp.scheduling.schedule import get_answer_set
 from rsp.step_01_agenda_expansion.agenda_expansion import create_experiment_agenda_from_infrastructure_and_schedule_ranges
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentAgenda
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentParameters
@@ -16,8 +18,16 @@ from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import Schedu
 from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParametersRange
 from rsp.step_01_agenda_expansion.global_constants import get_defaults
 from rsp.step_02_infrastructure_generation.infrastructure import create_env_from_experiment_parameters
+from rsp.step_05_experiment_run.experiment_results import experiment_results_solver_program
+from rsp.step_05_experiment_run.experiment_results import slim_experiment_results
 from rsp.step_05_experiment_run.experiment_results_analysis import convert_list_of_experiment_results_analysis_to_data_frame
+from rsp.step_05_experiment_run.experiment_results_analysis import rescheduling_scopes
+from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import ANALYSIS_CACHE_SUFFIX
 from rsp.step_05_experiment_run.experiment_results_analysis_load_and_save import load_and_expand_experiment_results_from_data_folder
+from rsp.step_05_experiment_run.experiment_results_analysis_store import analysis_store_available
+from rsp.step_05_experiment_run.experiment_results_analysis_store import experiment_ids_in_analysis_store
+from rsp.step_05_experiment_run.experiment_results_analysis_store import load_experiment_results_analysis_from_store
+from rsp.step_05_experiment_run.experiment_run import _reset_worker_state
 from rsp.step_05_experiment_run.experiment_run import create_experiment_folder_name
 from rsp.step_05_experiment_run.experiment_run import create_infrastructure_and_schedule_from_ranges
 from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
@@ -279,8 +289,8 @@ def test_run_experiment_agenda():
         )
 
         # load results
-        _, experiment_results_for_analysis = load_and_expand_experiment_results_from_data_folder(
-            f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}"
+        experiment_results_list, experiment_results_for_analysis = load_and_expand_experiment_results_from_data_folder(
+            f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", write_cache=True
         )
         result_dict = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_for_analysis).to_dict()
 
@@ -304,11 +314,302 @@ def test_run_experiment_agenda():
             if expected_result_dict[key] != result_dict[key]:
                 rsp_logger.warn(f"{key} should be equal; expected{expected_result_dict[key]}, but got {result_dict[key]}")
             assert expected_result_dict[key] == result_dict[key], f"{key} should be equal; expected{expected_result_dict[key]}, but got {result_dict[key]}"
+
+        if analysis_store_available():
+            stored_result_dict = load_experiment_results_analysis_from_store(
+                f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", columns=list(expected_result_dict.keys())
+            ).to_dict()
+            assert stored_result_dict == expected_result_dict
+
+        # expanded results have been cached next to the pickle
+        assert os.path.isfile(glob.glob(f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}/experiment_0000_*.pkl")[0] + ANALYSIS_CACHE_SUFFIX)
+        _, experiment_results_for_analysis_from_cache = load_and_expand_experiment_results_from_data_folder(
+            f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}", with_experiment_results=False
+        )
+        assert convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_for_analysis_from_cache).equals(
+            convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_for_analysis)
+        )
+
+        # the schedule is loaded from a file, the re-scheduling problems are built and grounded in this run
+        for scope in rescheduling_scopes:
+            for prefix in [
+                "build_program_time",
+                "grounding_time",
+                "nb_facts",
+                "program_size",
+                "solver_statistics_grounded_rules",
+                "solver_statistics_grounded_atoms",
+            ]:
+                assert result_dict[f"{prefix}_{scope}"][0] > 0, f"{prefix}_{scope}={result_dict[f'{prefix}_{scope}'][0]}"
+            # solved to optimality: the last incumbent is the solution
+            incumbent_trace = experiment_results_for_analysis[0]._asdict()[f"incumbent_trace_{scope}"]
+            assert len(incumbent_trace) >= 1
+            assert incumbent_trace[-1].costs == result_dict[f"solver_statistics_costs_{scope}"][0]
+
+        # slim persistence: answer sets compressed, programs re-generated from the problems
+        experiment_results_slim = slim_experiment_results(experiment_results_list[0])
+        for scope in rescheduling_scopes:
+            results = experiment_results_list[0]._asdict()[f"results_{scope}"]
+            results_slim = experiment_results_slim._asdict()[f"results_{scope}"]
+            assert results_slim.solver_program is None
+            assert get_answer_set(results_slim) == results.solver_result
+            assert experiment_results_solver_program(experiment_results_slim, scope) == results.solver_program
     finally:
         delete_experiment_folder(experiment_output_directory)
 
 
-def assert_expected_experiment_pkl_and_csv(experiment_output_directory, nb_csvs, nb_pkls):
+def test_run_experiment_agenda_incremental_rescheduling():
+    """Run the agenda of `test_run_experiment_agenda` with incremental re-
+    scheduling: all scopes are solved on the grounding of online_unrestricted
+    and must have the same costs as when solved from scratch."""
+    agenda = ExperimentAgenda(
+        experiment_name="test_run_experiment_agenda_incremental_rescheduling",
+        global_constants=get_defaults(incremental_rescheduling=True),
+        experiments=[
+            ExperimentParameters(
+                experiment_id=0,
+                grid_id=0,
+                infra_id_schedule_id=0,
+                infra_parameters=InfrastructureParameters(
+                    infra_id=0,
+                    width=30,
+                    height=30,
+                    number_of_agents=2,
+                    flatland_seed_value=12,
+                    max_num_cities=20,
+                    grid_mode=True,
+                    max_rail_between_cities=2,
+                    max_rail_in_city=6,
+                    speed_data={1: 1.0},
+                    number_of_shortest_paths_per_agent=10,
+                ),
+                schedule_parameters=ScheduleParameters(infra_id=0, schedule_id=0, asp_seed_value=94, number_of_shortest_paths_per_agent_schedule=1),
+                re_schedule_parameters=ReScheduleParameters(
+                    earliest_malfunction=20,
+                    malfunction_duration=20,
+                    malfunction_agent_id=0,
+                    weight_route_change=1,
+                    weight_lateness_seconds=1,
+                    max_window_size_from_earliest=np.inf,
+                    number_of_shortest_paths_per_agent=10,
+                    asp_seed_value=94,
+                ),
+            )
+        ],
+    )
+
+    experiment_output_directory = "target/" + create_experiment_folder_name(agenda.experiment_name)
+    try:
+        experiment_folder_name = run_experiment_agenda(
+            experiment_agenda=agenda,
+            # do not clutter folder
+            experiment_output_directory=experiment_output_directory,
+            run_experiments_parallel=1,
+            experiment_base_directory="tests/02_regression_tests/data/regression_experiment_agenda",
+        )
+
+        # load results
+        _, experiment_results_for_analysis = load_and_expand_experiment_results_from_data_folder(
+            f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}"
+        )
+        assert len(experiment_results_for_analysis) == 1
+        result_dict = convert_list_of_experiment_results_analysis_to_data_frame(experiment_results_for_analysis).to_dict()
+
+        expected_result_dict = {
+            "solver_statistics_costs_schedule": {0: 0.0},
+            "solver_statistics_costs_online_unrestricted": {0: 20.0},
+            "solver_statistics_costs_offline_fully_restricted": {0: 20.0},
+            "solver_statistics_costs_offline_delta": {0: 20.0},
+            "solver_statistics_costs_offline_delta_weak": {0: 20.0},
+            "solver_statistics_costs_online_transmission_chains_fully_restricted": {0: 20.0},
+            "solver_statistics_costs_online_transmission_chains_route_restricted": {0: 20.0},
+            "solver_statistics_costs_online_random_average": {0: 20.0},
+        }
+        for key in expected_result_dict:
+            assert expected_result_dict[key] == result_dict[key], f"{key} should be equal; expected{expected_result_dict[key]}, but got {result_dict[key]}"
+    finally:
+        delete_experiment_folder(experiment_output_directory)
+
+
+def test_run_experiment_agenda_reused_workers():
+    """Run the same experiment many times in one reused worker process and
+    in fresh worker processes: the results of all scopes must be identical."""
+    nb_tasks_per_worker = 10
+    experiment_parameters = ExperimentParameters(
+        experiment_id=0,
+        grid_id=0,
+        infra_id_schedule_id=0,
+        infra_parameters=InfrastructureParameters(
+            infra_id=0,
+            width=30,
+            height=30,
+            number_of_agents=2,
+            flatland_seed_value=12,
+            max_num_cities=20,
+            grid_mode=True,
+            max_rail_between_cities=2,
+            max_rail_in_city=6,
+            speed_data={1: 1.0},
+            number_of_shortest_paths_per_agent=10,
+        ),
+        schedule_parameters=ScheduleParameters(infra_id=0, schedule_id=0, asp_seed_value=94, number_of_shortest_paths_per_agent_schedule=1),
+        re_schedule_parameters=ReScheduleParameters(
+            earliest_malfunction=20,
+            malfunction_duration=20,
+            malfunction_agent_id=0,
+            weight_route_change=1,
+            weight_lateness_seconds=1,
+            max_window_size_from_earliest=np.inf,
+            number_of_shortest_paths_per_agent=10,
+            asp_seed_value=94,
+        ),
+    )
+    agenda = ExperimentAgenda(
+        experiment_name="test_run_experiment_agenda_reused_workers",
+        global_constants=get_defaults(),
+        experiments=[
+            ExperimentParameters(**dict(experiment_parameters._asdict(), experiment_id=experiment_id)) for experiment_id in range(nb_tasks_per_worker)
+        ],
+    )
+
+    result_dicts = {}
+    experiment_output_directories = []
+    try:
+        for max_tasks_per_worker in [1, None]:
+            experiment_output_directory = "target/" + create_experiment_folder_name(f"{agenda.experiment_name}_{max_tasks_per_worker}")
+            experiment_output_directories.append(experiment_output_directory)
+            experiment_folder_name = run_experiment_agenda(
+                experiment_agenda=agenda,
+                experiment_output_directory=experiment_output_directory,
+                run_experiments_parallel=1,
+                experiment_base_directory="tests/02_regression_tests/data/regression_experiment_agenda",
+                max_tasks_per_worker=max_tasks_per_worker,
+            )
+            _, experiment_results_for_analysis = load_and_expand_experiment_results_from_data_folder(
+                f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}"
+            )
+            assert len(experiment_results_for_analysis) == nb_tasks_per_worker
+            result_dicts[max_tasks_per_worker] = {
+                experiment_results_analysis.experiment_id: experiment_results_analysis for experiment_results_analysis in experiment_results_for_analysis
+            }
+
+        for experiment_id in range(nb_tasks_per_worker):
+            fresh = result_dicts[1][experiment_id]
+            reused = result_dicts[None][experiment_id]
+            for scope in ["schedule"] + rescheduling_scopes:
+                assert getattr(fresh, f"solver_statistics_costs_{scope}") == getattr(reused, f"solver_statistics_costs_{scope}"), f"{scope} {experiment_id}"
+                assert getattr(fresh, f"solution_{scope}") == getattr(reused, f"solution_{scope}"), f"{scope} {experiment_id}"
+    finally:
+        for experiment_output_directory in experiment_output_directories:
+            delete_experiment_folder(experiment_output_directory)
+
+
+def test_reset_worker_state():
+    """The random draws of an experiment do not depend on the draws of the
+    experiments run before in the same worker process."""
+    experiment_parameters = ExperimentParameters(
+        experiment_id=0,
+        grid_id=0,
+        infra_id_schedule_id=0,
+        infra_parameters=None,
+        schedule_parameters=None,
+        re_schedule_parameters=ReScheduleParameters(
+            earliest_malfunction=20,
+            malfunction_duration=20,
+            malfunction_agent_id=0,
+            weight_route_change=1,
+            weight_lateness_seconds=1,
+            max_window_size_from_earliest=np.inf,
+            number_of_shortest_paths_per_agent=10,
+            asp_seed_value=94,
+        ),
+    )
+    _reset_worker_state(global_constants=get_defaults(), experiment_parameters=experiment_parameters)
+    first = np.random.choice(100, 10, replace=False)
+    np.random.choice(100, 10, replace=False)
+    _reset_worker_state(global_constants=get_defaults(), experiment_parameters=experiment_parameters)
+    assert list(np.random.choice(100, 10, replace=False)) == list(first)
+
+
+def test_run_experiment_agenda_parallel_scopes():
+    """Run one experiment with its scopes solved one after the other and in
+    parallel worker processes: the costs and the logging of the scopes must be
+    the same."""
+    experiment_parameters = ExperimentParameters(
+        experiment_id=0,
+        grid_id=0,
+        infra_id_schedule_id=0,
+        infra_parameters=InfrastructureParameters(
+            infra_id=0,
+            width=30,
+            height=30,
+            number_of_agents=2,
+            flatland_seed_value=12,
+            max_num_cities=20,
+            grid_mode=True,
+            max_rail_between_cities=2,
+            max_rail_in_city=6,
+            speed_data={1: 1.0},
+            number_of_shortest_paths_per_agent=10,
+        ),
+        schedule_parameters=ScheduleParameters(infra_id=0, schedule_id=0, asp_seed_value=94, number_of_shortest_paths_per_agent_schedule=1),
+        re_schedule_parameters=ReScheduleParameters(
+            earliest_malfunction=20,
+            malfunction_duration=20,
+            malfunction_agent_id=0,
+            weight_route_change=1,
+            weight_lateness_seconds=1,
+            max_window_size_from_earliest=np.inf,
+            number_of_shortest_paths_per_agent=10,
+            asp_seed_value=94,
+        ),
+    )
+    agenda = ExperimentAgenda(
+        experiment_name="test_run_experiment_agenda_parallel_scopes",
+        global_constants=get_defaults(incremental_rescheduling=True),
+        experiments=[experiment_parameters],
+    )
+
+    results = {}
+    nb_reschedule_log_lines = {}
+    experiment_output_directories = []
+    try:
+        for cpus_per_experiment in [1, 3]:
+            experiment_output_directory = "target/" + create_experiment_folder_name(f"{agenda.experiment_name}_{cpus_per_experiment}")
+            experiment_output_directories.append(experiment_output_directory)
+            experiment_folder_name = run_experiment_agenda(
+                experiment_agenda=agenda,
+                experiment_output_directory=experiment_output_directory,
+                run_experiments_parallel=1,
+                experiment_base_directory="tests/02_regression_tests/data/regression_experiment_agenda",
+                cpus_per_experiment=cpus_per_experiment,
+            )
+            _, experiment_results_for_analysis = load_and_expand_experiment_results_from_data_folder(
+                f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}"
+            )
+            assert len(experiment_results_for_analysis) == 1
+            results[cpus_per_experiment] = experiment_results_for_analysis[0]
+            with open(f"{experiment_folder_name}/{EXPERIMENT_DATA_SUBDIRECTORY_NAME}/log.txt") as log_file:
+                nb_reschedule_log_lines[cpus_per_experiment] = sum("reschedule_wrapper" in line for line in log_file)
+
+        for scope in rescheduling_scopes:
+            sequential = getattr(results[1], f"solver_statistics_costs_{scope}")
+            parallel = getattr(results[3], f"solver_statistics_costs_{scope}")
+            assert sequential == parallel, f"{scope}: {sequential} {parallel}"
+        # the log records of the scope workers are forwarded to the log file of the experiment
+        assert nb_reschedule_log_lines[1] == nb_reschedule_log_lines[3] > 1, nb_reschedule_log_lines
+    finally:
+        for experiment_output_directory in experiment_output_directories:
+            delete_experiment_folder(experiment_output_directory)
+
+
+def assert_expected_experiment_pkl_and_csv(experiment_output_directory, nb_csvs, nb_pkls, nb_in_analysis_store):
+    """The analysis data goes to a csv per run of an experiment or, if
+    available, to the analysis store instead."""
+    if analysis_store_available():
+        experiment_ids = experiment_ids_in_analysis_store(f"{experiment_output_directory}/data")
+        assert len(experiment_ids) == nb_in_analysis_store, f"found {experiment_ids} in the analysis store, expected {nb_in_analysis_store}"
+        nb_csvs = 0
     file_names = glob.glob(f"{experiment_output_directory}/data/experiment_*.csv")
     assert len(file_names) == nb_csvs, f"found {file_names} in {experiment_output_directory}, expected {nb_csvs}"
     file_names = glob.glob(f"{experiment_output_directory}/data/experiment_*.pkl")
@@ -371,7 +672,7 @@ def test_rerun_single_experiment_after_csv_only():
             csv_only=True,
         )
 
-        assert_expected_experiment_pkl_and_csv(experiment_output_directory, nb_csvs=1, nb_pkls=0)
+        assert_expected_experiment_pkl_and_csv(experiment_output_directory, nb_csvs=1, nb_pkls=0, nb_in_analysis_store=1)
 
         def filter_experiment_agenda(params: ExperimentParameters):
             return params.experiment_id == 0
@@ -383,7 +684,7 @@ def test_rerun_single_experiment_after_csv_only():
             filter_experiment_agenda=filter_experiment_agenda,
         )
         # the first csv is not removed, but the pkl is generated alongside
-        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=2, nb_pkls=1)
+        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=2, nb_pkls=1, nb_in_analysis_store=1)
         run_experiment_agenda(
             experiment_output_directory=experiment_output_directory,
             experiment_base_directory="tests/02_regression_tests/data/regression_experiment_agenda",
@@ -391,7 +692,7 @@ def test_rerun_single_experiment_after_csv_only():
             filter_experiment_agenda=filter_experiment_agenda,
         )
         # since there is a pkl, the experiment is not re-run
-        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=2, nb_pkls=1)
+        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=2, nb_pkls=1, nb_in_analysis_store=1)
 
     finally:
         delete_experiment_folder(experiment_output_directory)
@@ -482,7 +783,7 @@ def test_run_agenda_incremental():
             experiment_agenda=experiment_agenda,
             filter_experiment_agenda=lambda experiment_parameters: experiment_parameters.experiment_id == 2,
         )
-        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=1, nb_pkls=1)
+        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=1, nb_pkls=1, nb_in_analysis_store=1)
 
         # run experiments 0...3 (2 is not re-run)
         experiment_output_directory = run_experiment_agenda(
@@ -490,7 +791,7 @@ def test_run_agenda_incremental():
             experiment_output_directory=experiment_output_directory,
             filter_experiment_agenda=lambda experiment_parameters: experiment_parameters.experiment_id < 4,
         )
-        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=4, nb_pkls=4)
+        assert_expected_experiment_pkl_and_csv(experiment_output_directory=experiment_output_directory, nb_csvs=4, nb_pkls=4, nb_in_analysis_store=4)
 
     finally:
         delete_experiment_folder(experiment_base_directory)
@@ -0,0 +1,31 @@
+import os
+import shutil
+
+from rsp.scheduling.schedule import load_schedule
+from rsp.step_02_infrastructure_generation.infrastructure import load_infrastructure
+from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
+from rsp.step_05_experiment_run.infrastructure_and_schedule_memo import load_infrastructure_and_schedule_memoized
+
+
+def test_infrastructure_and_schedule_memo():
+    """Loading twice gives the memoized objects, unless the schedule has been
+    persisted again."""
+    base_directory = "target/test_infrastructure_and_schedule_memo"
+    try:
+        shutil.copytree("tests/02_regression_tests/data/regression_experiment_agenda", base_directory)
+
+        expected_infrastructure, _ = load_infrastructure(base_directory=base_directory, infra_id=0)
+        expected_schedule, _ = load_schedule(base_directory=base_directory, infra_id=0, schedule_id=0)
+        infrastructure, schedule = load_infrastructure_and_schedule_memoized(base_directory=base_directory, infra_id=0, schedule_id=0)
+        assert infrastructure.minimum_travel_time_dict == expected_infrastructure.minimum_travel_time_dict
+        assert list(infrastructure.topo_dict[0].edges) == list(expected_infrastructure.topo_dict[0].edges)
+        assert schedule.schedule_experiment_result == expected_schedule.schedule_experiment_result
+
+        assert load_infrastructure_and_schedule_memoized(base_directory=base_directory, infra_id=0, schedule_id=0)[1] is schedule
+
+        os.utime(os.path.join(base_directory, "infra", "000", "schedule", "000", "schedule.pkl"), ns=(0, 0))
+        infrastructure_reloaded, schedule_reloaded = load_infrastructure_and_schedule_memoized(base_directory=base_directory, infra_id=0, schedule_id=0)
+        assert schedule_reloaded is not schedule
+        assert schedule_reloaded.schedule_experiment_result == expected_schedule.schedule_experiment_result
+    finally:
+        delete_experiment_folder(base_directory)
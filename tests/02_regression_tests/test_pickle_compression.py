@@ -0,0 +1,55 @@
+import pytest
+
+from rsp.scheduling.schedule import load_schedule
+from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
+from rsp.utils.pickle_helper import _detect_pickle_compression
+from rsp.utils.pickle_helper import _pickle_dump
+from rsp.utils.pickle_helper import _pickle_load
+from rsp.utils.pickle_helper import benchmark_pickle_compression
+from rsp.utils.pickle_helper import PickleCompression
+
+SCHEDULE_FOLDER = "tests/02_regression_tests/data/regression_experiment_agenda/infra/000/schedule/000"
+
+
+@pytest.mark.parametrize("compression", [PickleCompression.none, PickleCompression.gzip])
+def test_pickle_compression(compression: PickleCompression):
+    """A schedule written with compression loads the same as the stored raw
+    pickle."""
+    folder = "target/test_pickle_compression"
+    try:
+        with open(f"{SCHEDULE_FOLDER}/schedule.pkl", "rb") as handle:
+            assert _detect_pickle_compression(handle) == PickleCompression.none
+        schedule, _ = load_schedule(base_directory="tests/02_regression_tests/data/regression_experiment_agenda", infra_id=0, schedule_id=0)
+
+        _pickle_dump(obj=schedule, folder=folder, file_name="schedule.pkl", compression=compression)
+        with open(f"{folder}/schedule.pkl", "rb") as handle:
+            assert _detect_pickle_compression(handle) == compression
+        loaded = _pickle_load(folder=folder, file_name="schedule.pkl")
+        assert loaded.schedule_experiment_result == schedule.schedule_experiment_result
+        assert list(loaded.schedule_problem_description.topo_dict[0].edges) == list(schedule.schedule_problem_description.topo_dict[0].edges)
+    finally:
+        delete_experiment_folder(folder)
+
+
+def test_benchmark_pickle_compression():
+    benchmark = benchmark_pickle_compression(file_name="schedule.pkl", folder=SCHEDULE_FOLDER, repetitions=1)
+    size_none, _ = benchmark[PickleCompression.none]
+    size_gzip, _ = benchmark[PickleCompression.gzip]
+    assert size_gzip < size_none
+
+
+def test_pickle_load_corrupt(caplog):
+    """A truncated compressed pickle raises and is logged with its file
+    name."""
+    folder = "target/test_pickle_load_corrupt"
+    try:
+        _pickle_dump(obj=list(range(10000)), folder=folder, file_name="truncated.pkl", compression=PickleCompression.gzip)
+        with open(f"{folder}/truncated.pkl", "rb") as handle:
+            data = handle.read()
+        with open(f"{folder}/truncated.pkl", "wb") as handle:
+            handle.write(data[: len(data) // 2])
+        with pytest.raises(EOFError):
+            _pickle_load(folder=folder, file_name="truncated.pkl")
+        assert f"Failed reading {folder}/truncated.pkl (gzip)" in caplog.text
+    finally:
+        delete_experiment_folder(folder)
@@ -0,0 +1,73 @@
+import pytest
+
+from rsp.scheduling.asp import asp_helper
+from rsp.scheduling.asp.asp_problem_description import ASPProblemDescription
+from rsp.scheduling.asp.asp_solve_problem import solve_problem
+from rsp.scheduling.schedule import load_schedule
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+
+
+def _ground_scheduling_problem(schedule_problem_description, precompute_shared: bool):
+    """Build and ground the scheduling problem; returns the grounded control,
+    build time and grounding time."""
+    GLOBAL_CONSTANTS.set_defaults(constants=get_defaults(precompute_shared=precompute_shared))
+    problem = ASPProblemDescription.factory_scheduling(schedule_problem_description=schedule_problem_description)
+    ctl, _ = asp_helper._asp_control(asp_heuristics=problem.asp_heuristics)
+    grounding_time = asp_helper._asp_ground(
+        ctl=ctl,
+        parts=[("base", [])],
+        encoding_files=asp_helper._get_encoding_paths(asp_objective=problem.asp_objective, asp_heuristics=problem.asp_heuristics, no_optimize=False),
+        plain_encoding="\n".join(problem.asp_program),
+        facts=problem.asp_facts,
+    )
+    return problem, ctl, problem.build_program_time, grounding_time
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda", "tests/02_regression_tests/data/alpha_beta"])
+def test_precompute_shared(base_directory: str):
+    """The precomputed `shared/4` facts must give the same grounding as the
+    join in `encoding.lp`; reports grounding size and time of both
+    variants."""
+    schedule, _ = load_schedule(base_directory=base_directory, infra_id=0)
+    try:
+        shared_atoms = {}
+        for precompute_shared in [False, True]:
+            problem, ctl, build_time, grounding_time = _ground_scheduling_problem(
+                schedule_problem_description=schedule.schedule_problem_description, precompute_shared=precompute_shared
+            )
+            shared_atoms[precompute_shared] = {str(atom.symbol) for atom in ctl.symbolic_atoms.by_signature("shared", 4)}
+            nb_facts = len(problem.asp_program) + len(problem.asp_facts)
+            print(
+                f"{base_directory} precompute_shared={precompute_shared}: "
+                f"{nb_facts} facts, {len(ctl.symbolic_atoms)} atoms, {len(shared_atoms[precompute_shared])} shared atoms, "
+                f"build {build_time:.3f}s, grounding {grounding_time:.3f}s"
+            )
+        assert len(shared_atoms[False]) > 0
+        assert shared_atoms[False] == shared_atoms[True]
+    finally:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
+
+
+def test_precompute_shared_without_latest_of_other_train():
+    """`encoding.lp` requires the latest exit only for the first edge of
+    `shared/4`: without latest times of a train, the precomputed facts and the
+    solutions must still be the same as with the join."""
+    schedule, _ = load_schedule(base_directory="tests/02_regression_tests/data/regression_experiment_agenda", infra_id=0)
+    schedule_problem_description = schedule.schedule_problem_description
+    route_dag_constraints_dict = dict(schedule_problem_description.route_dag_constraints_dict)
+    route_dag_constraints_dict[0] = route_dag_constraints_dict[0]._replace(latest={})
+    schedule_problem_description = schedule_problem_description._replace(route_dag_constraints_dict=route_dag_constraints_dict)
+    try:
+        shared_atoms = {}
+        costs = {}
+        for precompute_shared in [False, True]:
+            _, ctl, _, _ = _ground_scheduling_problem(schedule_problem_description=schedule_problem_description, precompute_shared=precompute_shared)
+            shared_atoms[precompute_shared] = {str(atom.symbol) for atom in ctl.symbolic_atoms.by_signature("shared", 4)}
+            result, _ = solve_problem(problem=ASPProblemDescription.factory_scheduling(schedule_problem_description=schedule_problem_description))
+            costs[precompute_shared] = result.optimization_costs
+        assert any(atom.startswith("shared(t0,") for atom in shared_atoms[False])
+        assert shared_atoms[False] == shared_atoms[True]
+        assert costs[False] == costs[True]
+    finally:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
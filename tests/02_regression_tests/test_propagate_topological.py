@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+import pytest
+
+from rsp.scheduling.propagate import _propagate_earliest
+from rsp.scheduling.propagate import _propagate_latest
+from rsp.scheduling.propagate import propagate_earliest_topological
+from rsp.scheduling.propagate import propagate_latest_topological
+from rsp.scheduling.route_dag import route_dag_from_topo
+from rsp.scheduling.scheduling_problem import get_sinks_for_topo
+from rsp.scheduling.scheduling_problem import get_sources_for_topo
+from rsp.step_02_infrastructure_generation.infrastructure import load_infrastructure
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda", "tests/02_regression_tests/data/alpha_beta"])
+def test_propagate_topological(base_directory: str):
+    """The topological propagation must give the same earliest and latest as
+    the queue-based propagation, with and without forced waypoints in the
+    middle of the route DAG; reports the time of both variants."""
+    infrastructure, _ = load_infrastructure(base_directory=base_directory, infra_id=0)
+    np.random.seed(42)
+    queue_time = 0.0
+    conversion_time = 0.0
+    topological_time = 0.0
+    for agent_id, topo in infrastructure.topo_dict.items():
+        minimum_travel_time = infrastructure.minimum_travel_time_dict[agent_id]
+        sources = set(get_sources_for_topo(topo))
+        sinks = set(get_sinks_for_topo(topo))
+        nodes = list(topo.nodes)
+        # waypoints frozen at arbitrary times as the scopers do for malfunctions
+        frozen = {nodes[i] for i in np.random.choice(len(nodes), size=min(3, len(nodes)), replace=False)}
+        for force_earliest, force_latest in [(sources, sinks), (sources | frozen, sinks | frozen)]:
+            earliest = {waypoint: 0 if waypoint in sources else int(np.random.randint(0, 100)) for waypoint in force_earliest}
+            latest = {waypoint: infrastructure.max_episode_steps if waypoint in sinks else int(np.random.randint(0, 100)) for waypoint in force_latest}
+
+            start_time = time.time()
+            expected_earliest = _propagate_earliest(
+                earliest_dict=dict(earliest), force_earliest=set(force_earliest), minimum_travel_time=minimum_travel_time, topo=topo
+            )
+            expected_latest = dict(latest)
+            _propagate_latest(force_latest=set(force_latest), latest_dict=expected_latest, minimum_travel_time=minimum_travel_time, topo=topo)
+            queue_time += time.time() - start_time
+
+            start_time = time.time()
+            dag = route_dag_from_topo(topo)
+            conversion_time += time.time() - start_time
+
+            start_time = time.time()
+            actual_earliest = propagate_earliest_topological(
+                dag=dag, earliest_dict=dict(earliest), force_earliest=set(force_earliest), minimum_travel_time=minimum_travel_time
+            )
+            actual_latest = propagate_latest_topological(
+                dag=dag, latest_dict=dict(latest), force_latest=set(force_latest), minimum_travel_time=minimum_travel_time
+            )
+            topological_time += time.time() - start_time
+
+            assert actual_earliest == expected_earliest
+            assert actual_latest == expected_latest
+    print(
+        f"{base_directory}: {len(infrastructure.topo_dict)} agents, "
+        f"queue {queue_time:.3f}s, topological {topological_time:.3f}s (+ {conversion_time:.3f}s conversion to RouteDAG)"
+    )
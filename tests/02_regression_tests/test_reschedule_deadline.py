@@ -0,0 +1,73 @@
+import logging
+
+import numpy as np
+import pytest
+
+from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ExperimentParameters
+from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import InfrastructureParameters
+from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ReScheduleParameters
+from rsp.step_01_agenda_expansion.experiment_parameters_and_ranges import ScheduleParameters
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_05_experiment_run.experiment_results_analysis import expand_experiment_results_for_analysis
+from rsp.step_05_experiment_run.experiment_results_analysis import plausibility_check_experiment_results_analysis
+from rsp.step_05_experiment_run.experiment_run import load_infrastructure
+from rsp.step_05_experiment_run.experiment_run import load_schedule
+from rsp.step_05_experiment_run.experiment_run import run_experiment_in_memory
+
+
+def test_plausibility_check_with_reschedule_deadline(caplog):
+    """With a re-scheduling deadline, solutions may be non-optimal: the
+    plausibility check must warn instead of failing the experiment."""
+    experiment_parameters = ExperimentParameters(
+        experiment_id=0,
+        grid_id=0,
+        infra_id_schedule_id=0,
+        infra_parameters=InfrastructureParameters(
+            infra_id=0,
+            width=30,
+            height=30,
+            number_of_agents=11,
+            flatland_seed_value=12,
+            max_num_cities=20,
+            grid_mode=True,
+            max_rail_between_cities=2,
+            max_rail_in_city=6,
+            speed_data={1.0: 1.0, 0.5: 0.0, 0.3333333333333333: 0.0, 0.25: 0.0},
+            number_of_shortest_paths_per_agent=10,
+        ),
+        schedule_parameters=ScheduleParameters(infra_id=0, schedule_id=0, asp_seed_value=94, number_of_shortest_paths_per_agent_schedule=1),
+        re_schedule_parameters=ReScheduleParameters(
+            earliest_malfunction=20,
+            malfunction_duration=20,
+            malfunction_agent_id=0,
+            weight_route_change=20,
+            weight_lateness_seconds=1,
+            max_window_size_from_earliest=np.inf,
+            number_of_shortest_paths_per_agent=10,
+            asp_seed_value=94,
+        ),
+    )
+    infra, _ = load_infrastructure(base_directory="tests/02_regression_tests/data/alpha_beta", infra_id=0)
+    schedule, _ = load_schedule(base_directory="tests/02_regression_tests/data/alpha_beta", infra_id=0, schedule_id=0)
+
+    try:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults(reschedule_deadline=60))
+        experiment_results = run_experiment_in_memory(schedule=schedule, experiment_parameters=experiment_parameters, infrastructure_topo_dict=infra.topo_dict)
+        # runs the plausibility check
+        experiment_results_analysis = expand_experiment_results_for_analysis(experiment_results=experiment_results)
+
+        # a non-optimal incumbent in a restricted scope is only reported
+        not_optimal = experiment_results_analysis._replace(
+            costs_offline_delta=experiment_results_analysis.costs_online_unrestricted + 1,
+            costs_from_lateness_offline_delta=experiment_results_analysis.costs_from_lateness_offline_delta + 1,
+        )
+        with caplog.at_level(logging.WARNING):
+            plausibility_check_experiment_results_analysis(experiment_results_analysis=not_optimal)
+        assert "not optimal with deadline" in caplog.text
+    finally:
+        GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
+
+    # without deadline, solutions are optimal and the check fails
+    with pytest.raises(AssertionError):
+        plausibility_check_experiment_results_analysis(experiment_results_analysis=not_optimal)
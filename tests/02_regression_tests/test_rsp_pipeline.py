@@ -18,7 +18,7 @@ from rsp.step_05_experiment_run.experiment_run import create_experiment_folder_n
 from rsp.step_05_experiment_run.experiment_run import delete_experiment_folder
 from rsp.step_05_experiment_run.experiment_run import gen_infrastructure
 from rsp.step_05_experiment_run.experiment_run import load_and_expand_experiment_results_from_data_folder
-from rsp.step_05_experiment_run.experiment_run import load_data_from_individual_csv_in_data_folder
+from rsp.step_05_experiment_run.experiment_run import load_experiment_results_analysis_data_frame
 from rsp.step_05_experiment_run.experiment_run import load_experiments_results
 from rsp.step_05_experiment_run.experiment_run import load_infrastructure
 from rsp.step_05_experiment_run.experiment_run import load_schedule
@@ -87,7 +87,7 @@ def test_rsp_pipeline():
             f"actual={experiment_results.results_offline_delta.solver_seed}, " f"expected={experiment_parameters.asp_seed_value}"
         )
 
-        loaded_df = load_data_from_individual_csv_in_data_folder(experiment_data_folder_name=experiment_data_folder)
+        loaded_df = load_experiment_results_analysis_data_frame(experiment_data_folder_name=experiment_data_folder)
         assert len(loaded_df) == 2, len(loaded_df)
 
         assert load_experiments_results(experiment_data_folder_name=experiment_data_folder, experiment_id=0) is not None, None
@@ -0,0 +1,205 @@
+from typing import Callable
+from typing import Optional
+
+import numpy as np
+import pytest
+from flatland.envs.rail_trainrun_data_structures import TrainrunWaypoint
+
+from rsp.resource_occupation.mutual_exclusion import find_overlapping_occupations
+from rsp.scheduling.asp.asp_answer_set import ASPAnswerSet
+from rsp.scheduling.asp.asp_helper import FluxHelperResult
+from rsp.scheduling.asp.asp_solution_description import ASPSolutionDescription
+from rsp.scheduling.propagate import _is_consistent_route_dag_constraints_fast
+from rsp.scheduling.propagate import verify_consistency_of_route_dag_constraints_for_agent
+from rsp.scheduling.schedule import load_schedule
+from rsp.scheduling.scheduling_problem import RouteDAGConstraints
+from rsp.scheduling.scheduling_problem import topo_view
+from rsp.step_01_agenda_expansion.global_constants import get_defaults
+from rsp.step_01_agenda_expansion.global_constants import GLOBAL_CONSTANTS
+from rsp.step_01_agenda_expansion.global_constants import VerificationLevel
+from rsp.step_05_experiment_run.experiment_malfunction import ExperimentMalfunction
+from rsp.step_05_experiment_run.scopers.scoper_online_unrestricted import scoper_online_unrestricted_for_all_agents
+
+
+def _passes(check: Callable) -> bool:
+    try:
+        check()
+    except (AssertionError, IndexError):
+        return False
+    return True
+
+
+def _flux_helper_result(trainruns, costs: int = 0) -> FluxHelperResult:
+    return FluxHelperResult(
+        answer_sets=[set()],
+        stats={"summary": {"costs": [costs]}},
+        ctl=None,
+        dl=None,
+        asp_seed_value=None,
+        decoded_answer_sets=[
+            ASPAnswerSet(symbols=(), dl_assignment=(), trainruns=trainruns, late=[], active_penalty=[], act_penalty_for_train=[], nb_shared=0)
+        ],
+        incumbent_trace=[],
+        grounding_time=0.0,
+    )
+
+
+def _first_conflict_by_time_steps(trainruns) -> Optional[str]:
+    """Mutual exclusion check of `verify_correctness_helper` by enumerating
+    the time steps of all resource occupations."""
+    resource_occupations = {}
+    for agent_id, trainrun in trainruns.items():
+        for wp1, wp2 in zip(trainrun, trainrun[1:]):
+            for time in range(wp1.scheduled_at, wp2.scheduled_at + 1):
+                occupation = (wp1.waypoint.position, time)
+                if occupation in resource_occupations and agent_id != resource_occupations[occupation]:
+                    return f"(3) conflicting resource occuptions {occupation} for {agent_id} and {resource_occupations[occupation]}"
+                resource_occupations[occupation] = agent_id
+    return None
+
+
+def test_find_overlapping_occupations():
+    """The interval sweep must find the same conflicting pairs as enumerating
+    the time steps."""
+    np.random.seed(42)
+    for _ in range(200):
+        nb_occupations = np.random.randint(0, 30)
+        rows = np.random.randint(0, 3, size=nb_occupations)
+        columns = np.random.randint(0, 2, size=nb_occupations)
+        from_incl = np.random.randint(-5, 40, size=nb_occupations)
+        to_excl = from_incl + np.random.randint(1, 8, size=nb_occupations)
+        agent_ids = np.random.randint(0, 4, size=nb_occupations)
+        expected = {
+            (i, j)
+            for i in range(nb_occupations)
+            for j in range(i + 1, nb_occupations)
+            if (rows[i], columns[i]) == (rows[j], columns[j])
+            and agent_ids[i] != agent_ids[j]
+            and set(range(from_incl[i], to_excl[i])) & set(range(from_incl[j], to_excl[j]))
+        }
+        actual = find_overlapping_occupations(rows=rows, columns=columns, from_incl=from_incl, to_excl=to_excl, agent_ids=agent_ids)
+        assert len(actual) == len(set(actual))
+        assert {(min(pair), max(pair)) for pair in actual} == expected
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda"])
+def test_verify_correctness_fast_same_as_full(base_directory: str):
+    """The fast verification of solutions must pass and fail on the same
+    (perturbed) solutions as the full verification."""
+    schedule, _ = load_schedule(base_directory=base_directory, infra_id=0)
+    schedule_problem = schedule.schedule_problem_description
+    trainruns_dict = schedule.schedule_experiment_result.trainruns_dict
+    agent_ids = list(trainruns_dict.keys())
+    np.random.seed(42)
+
+    nb_failing = 0
+    nb_conflicts = 0
+    for index in range(200):
+        trainruns = {agent_id: list(trainrun) for agent_id, trainrun in trainruns_dict.items()}
+        costs = 0
+        if index > 0:
+            agent_id = agent_ids[np.random.randint(len(agent_ids))]
+            trainrun = trainruns[agent_id]
+            perturbation = index % 5
+            if perturbation == 0:
+                # shift the tail of the train run
+                i = np.random.randint(len(trainrun))
+                shift = int(np.random.randint(-3, 4))
+                trainruns[agent_id] = trainrun[:i] + [TrainrunWaypoint(waypoint=twp.waypoint, scheduled_at=twp.scheduled_at + shift) for twp in trainrun[i:]]
+            elif perturbation == 1:
+                # run on another agent's route at the other agent's times
+                other = agent_ids[np.random.randint(len(agent_ids))]
+                trainruns[agent_id] = list(trainruns_dict[other])
+            elif perturbation == 2:
+                # drop a waypoint
+                del trainrun[np.random.randint(len(trainrun))]
+            elif perturbation == 3:
+                # shift the whole train run
+                shift = int(np.random.randint(-20, 21))
+                trainruns[agent_id] = [TrainrunWaypoint(waypoint=twp.waypoint, scheduled_at=twp.scheduled_at + shift) for twp in trainrun]
+            else:
+                costs = int(np.random.randint(0, 2))
+        asp_solution = _flux_helper_result(trainruns=trainruns, costs=costs)
+        expected = _passes(lambda: ASPSolutionDescription.verify_correctness_helper(schedule_problem, asp_solution))
+        conflict = _first_conflict_by_time_steps(trainruns)
+        if conflict is not None and expected is False:
+            # the interval sweep must report the same conflict, unless an earlier check fails
+            with pytest.raises(AssertionError) as e:
+                ASPSolutionDescription.verify_correctness_helper(schedule_problem, asp_solution)
+            assert str(e.value) == conflict or not str(e.value).startswith("(3)")
+        nb_conflicts += conflict is not None
+        actual = ASPSolutionDescription.is_correct_fast(schedule_problem, asp_solution)
+        assert actual == expected, f"perturbation {index}"
+        if index == 0:
+            assert expected
+        nb_failing += not expected
+    # the perturbations must cover both outcomes
+    assert 0 < nb_failing < 200
+    assert nb_conflicts > 0
+
+
+@pytest.mark.parametrize("base_directory", ["tests/02_regression_tests/data/regression_experiment_agenda"])
+def test_verify_consistency_fast_same_as_full(base_directory: str):
+    """The fast verification of route DAG constraints must pass and fail on
+    the same (perturbed) constraints as the full verification; `off` skips
+    it."""
+    schedule, _ = load_schedule(base_directory=base_directory, infra_id=0)
+    schedule_problem = schedule.schedule_problem_description
+    trainruns_dict = schedule.schedule_experiment_result.trainruns_dict
+    malfunction = ExperimentMalfunction(time_step=trainruns_dict[0][len(trainruns_dict[0]) // 2].scheduled_at, agent_id=0, malfunction_duration=20)
+    problem = scoper_online_unrestricted_for_all_agents(
+        malfunction=malfunction,
+        schedule_trainruns=trainruns_dict,
+        minimum_travel_time_dict=schedule_problem.minimum_travel_time_dict,
+        topo_dict_={agent_id: topo_view(topo) for agent_id, topo in schedule_problem.topo_dict.items()},
+        latest_arrival=schedule_problem.max_episode_steps + malfunction.malfunction_duration,
+        weight_route_change=1,
+        weight_lateness_seconds=1,
+        max_window_size_from_earliest=100,
+    )
+    np.random.seed(42)
+
+    nb_failing = 0
+    for index in range(200):
+        agent_id = int(np.random.choice(list(problem.topo_dict.keys())))
+        earliest = dict(problem.route_dag_constraints_dict[agent_id].earliest)
+        latest = dict(problem.route_dag_constraints_dict[agent_id].latest)
+        waypoints = list(earliest.keys())
+        waypoint = waypoints[np.random.randint(len(waypoints))]
+        perturbation = index % 4
+        if perturbation == 1:
+            earliest[waypoint] += int(np.random.randint(-5, 6))
+        elif perturbation == 2:
+            latest[waypoint] += int(np.random.randint(-5, 50))
+        elif perturbation == 3:
+            del earliest[waypoint]
+        route_dag_constraints = RouteDAGConstraints(earliest=earliest, latest=latest)
+        topo = problem.topo_dict[agent_id]
+        agent_malfunction = malfunction if agent_id == malfunction.agent_id or index % 2 == 0 else None
+        expected = _passes(
+            lambda: verify_consistency_of_route_dag_constraints_for_agent(
+                agent_id=agent_id, route_dag_constraints=route_dag_constraints, topo=topo, malfunction=agent_malfunction, max_window_size_from_earliest=100
+            )
+        )
+        actual = _is_consistent_route_dag_constraints_fast(
+            agent_id=agent_id, route_dag_constraints=route_dag_constraints, topo=topo, malfunction=agent_malfunction, max_window_size_from_earliest=100
+        )
+        assert actual == expected, f"perturbation {index}"
+        nb_failing += not expected
+
+        for verification_level in [VerificationLevel.fast, VerificationLevel.off]:
+            try:
+                GLOBAL_CONSTANTS.set_defaults(constants=get_defaults(verification_level=verification_level))
+                assert _passes(
+                    lambda: verify_consistency_of_route_dag_constraints_for_agent(
+                        agent_id=agent_id,
+                        route_dag_constraints=route_dag_constraints,
+                        topo=topo,
+                        malfunction=agent_malfunction,
+                        max_window_size_from_earliest=100,
+                    )
+                ) == (expected or verification_level == VerificationLevel.off)
+            finally:
+                GLOBAL_CONSTANTS.set_defaults(constants=get_defaults())
+    # the perturbations must cover both outcomes
+    assert 0 < nb_failing < 200